@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Gravação atômica de arquivos - exportador Atrio
+
+Compartilhada pelo export_from_supabase.py (artefatos publicados, marca
+d'água, hash) e pelo metrics.py (relatório, histórico, textfile do
+Prometheus): grava em <nome>.tmp, faz fsync e só então substitui o destino.
+
+Uso:
+    from atomic import AtomicFile, write_atomic
+
+    write_atomic(path, texto)
+
+    f = AtomicFile(path)
+    f.write(b'...')
+    f.commit()        # ou f.discard()
+"""
+
+import os
+from pathlib import Path
+
+
+def fsync_dir(directory: Path):
+    """fsync do diretório, para o rename sobreviver a uma queda (só POSIX)"""
+    if os.name != 'posix':
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+class AtomicFile:
+    """
+    Arquivo gravado em <nome>.tmp que só substitui o destino no commit()
+    
+    commit() faz flush + fsync antes do rename e fsync do diretório depois:
+    quem lê o destino (GitHub Pages, git add, o próximo run após uma queda)
+    vê o arquivo antigo inteiro ou o novo inteiro, nunca um pela metade.
+    """
+    
+    def __init__(self, filepath: Path):
+        self.filepath = filepath
+        self.tmp_path = filepath.with_name(filepath.name + '.tmp')
+        self.tmp_path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = open(self.tmp_path, 'wb')
+    
+    def write(self, data):
+        self._file.write(data.encode('utf-8') if isinstance(data, str) else data)
+    
+    def flush(self):
+        self._file.flush()
+    
+    def commit(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        os.replace(self.tmp_path, self.filepath)
+        fsync_dir(self.filepath.parent)
+    
+    def discard(self):
+        self._file.close()
+        self.tmp_path.unlink(missing_ok=True)
+
+
+def write_atomic(filepath: Path, content):
+    """Grava o conteúdo inteiro (str ou bytes) via AtomicFile"""
+    f = AtomicFile(filepath)
+    try:
+        f.write(content)
+    except BaseException:
+        f.discard()
+        raise
+    f.commit()
@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+Benchmarks do exportador - tempo e memória por etapa
+
+Roda as etapas reais do export_from_supabase.py (fetch, transform_data,
+ordenação + hash, gravação dos artefatos em uma passada, compressão) sobre um
+audit_log sintético (benchmarks/synthetic.py) de 1k, 100k e 1M linhas, em
+dois backends:
+- fake: cursor falso em processo (gera, projeta e ordena como o banco)
+- postgres: Postgres local (DB_* do .env), carregado via COPY no schema
+  atrio_bench_<linhas>
+
+Cada combinação (backend, pipeline, tamanho) roda num subprocesso, então os
+picos de RSS (do processo e dos workers) são só dela; por etapa, a memória é
+a variação do RSS durante a etapa. O pipeline 'list' é o caminho padrão, o 'stream' é o
+--stream e o 'parallel' é o 'list' com --decode-workers (um processo por
+núcleo). Etapas com o mesmo nome medem o mesmo trabalho em qualquer pipeline:
+no 'parallel' a busca já decodifica e valida ('fetch_decode' + 'dedup', no
+lugar de 'fetch' + 'transform'). Com --threshold, compara com a baseline e sai com código 1 se
+alguma etapa ficar mais lenta (ou usar mais memória) além do limite.
+
+Uso:
+    python benchmarks/run_benchmarks.py                          # fake, 1k/100k/1M
+    python benchmarks/run_benchmarks.py --sizes 1k,100k
+    python benchmarks/run_benchmarks.py --backend postgres       # Postgres local
+    python benchmarks/run_benchmarks.py --save-baseline          # grava a referência
+    python benchmarks/run_benchmarks.py --threshold 0.2          # falha se >20% pior
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+BENCH_DIR = Path(__file__).resolve().parent
+PROJECT_DIR = BENCH_DIR.parent
+
+DEFAULT_SIZES = '1k,100k,1M'
+PIPELINES = ('list', 'stream', 'parallel')
+BASELINE_FILE = BENCH_DIR / 'baseline.json'
+RESULTS_FILE = PROJECT_DIR / 'reports' / 'benchmarks.json'
+
+# Diferenças menores que isso são ruído, mesmo acima do limite percentual
+MIN_DELTA_SECONDS = 0.05
+MIN_DELTA_RSS = 16 * 1024 * 1024
+
+LOCAL_HOSTS = ('localhost', '127.0.0.1', '::1')
+
+
+def parse_size(text: str) -> int:
+    """'1k' → 1000, '1M' → 1000000"""
+    text = text.strip()
+    multiplier = {'k': 1000, 'K': 1000, 'm': 1000000, 'M': 1000000}.get(text[-1:], 1)
+    return int(float(text.rstrip('kKmM')) * multiplier)
+
+
+def size_label(count: int) -> str:
+    if count >= 1000000 and count % 1000000 == 0:
+        return f"{count // 1000000}M"
+    if count >= 1000 and count % 1000 == 0:
+        return f"{count // 1000}k"
+    return str(count)
+
+
+# ========== SUBPROCESSO (uma combinação) ==========
+
+def redirect_outputs(exporter, target: Path):
+    """Aponta todos os arquivos gerados pelo exportador para `target`"""
+    source = exporter.PROJECT_DIR
+    for name, value in list(vars(exporter).items()):
+        if name.isupper() and isinstance(value, Path):
+            try:
+                setattr(exporter, name, target / value.relative_to(source))
+            except ValueError:
+                pass
+    exporter.DATA_DIR.mkdir(parents=True, exist_ok=True)
+
+
+@contextlib.contextmanager
+def bench_connection(backend: str, count: int, exporter, database, synthetic):
+    """Conexão do backend com `count` linhas sintéticas"""
+    if backend == 'fake':
+        yield synthetic.FakeConnection(count)
+        return
+
+    schema = f"atrio_bench_{count}"
+    with database.connection(statement_timeout_ms=0) as conn:
+        if synthetic.load_postgres(conn, schema, count):
+            print(f"   (carregadas {count} linhas em {schema}.{exporter.TABLE_NAME})", file=sys.stderr)
+        exporter.SCHEMA_NAME = schema
+        yield conn
+
+
+def run_list(conn, exporter, metrics, decode_workers: int = 0):
+    """
+    Caminho padrão: lista em memória, etapa por etapa
+
+    Com `decode_workers` a decodificação e a validação rodam nos processos
+    durante a busca, então as duas primeiras etapas mudam de nome (e de
+    conteúdo): 'fetch_decode' (busca + decodificação + validação) e 'dedup'.
+    No caminho padrão são 'fetch' (busca + decodificação do psycopg2) e
+    'transform' (validação + deduplicação).
+    """
+    stats = exporter.new_transform_stats() if decode_workers else None
+    fetch_name, transform_name = ('fetch_decode', 'dedup') if decode_workers else ('fetch', 'transform')
+    with metrics.stage(fetch_name) as st:
+        raw_data, _ = exporter.fetch_applicants(conn, None, decode_workers, stats)
+        st['rows_out'] = len(raw_data)
+    with metrics.stage(transform_name, rows_in=len(raw_data)) as st:
+        applicants = exporter.transform_data(raw_data, stats)
+        st['rows_out'] = len(applicants)
+    del raw_data
+
+    total = len(applicants)
+    with metrics.stage('sort_hash', rows_in=total):
+        exporter.sort_canonical(applicants)
+        exporter.dataset_hash(applicants)
+    with exporter.CompressionPool() as compression:
+        with metrics.stage('write_artifacts', rows_in=total) as st:
+            exporter.write_dataset(applicants, hash_items=False, compression=compression)
+            st['bytes'] = metrics.file_bytes(*exporter.dataset_paths(False))
+        # Só o que sobra da compressão (começa quando cada arquivo fecha)
+        with metrics.stage('compress', rows_in=total):
+            compression.finish()
+    return total
+
+
+def run_parallel(conn, exporter, metrics):
+    """--decode-workers: details como texto, decodificado em um processo por núcleo"""
+    return run_list(conn, exporter, metrics, decode_workers=os.cpu_count() or 1)
+
+
+def run_stream(conn, exporter, metrics):
+    """
+    --stream: cursor server-side → arquivos, em memória constante
+
+    Uma etapa só ('stream': busca, validação, gravação e compressão), com os
+    mesmos bytes contados em 'write_artifacts' nos outros pipelines.
+    """
+    with metrics.stage('stream') as st:
+        total, _, _, _ = exporter.export_streaming(conn, exporter.ITERSIZE)
+        st['rows_out'] = total
+        st['bytes'] = metrics.file_bytes(*exporter.dataset_paths(False))
+    return total
+
+
+def worker(backend: str, pipeline: str, count: int, output: Path):
+    """Roda uma combinação e grava o relatório de etapas em `output`"""
+    sys.path.insert(0, str(PROJECT_DIR))
+    sys.path.insert(0, str(BENCH_DIR))
+    import database
+    import export_from_supabase as exporter
+    import metrics
+    import synthetic
+
+    with tempfile.TemporaryDirectory(prefix='atrio-bench-') as tmp:
+        redirect_outputs(exporter, Path(tmp))
+        metrics.start_run(f"{backend}/{pipeline}", database.STATS)
+        status = 'error'
+        try:
+            # Progresso do exportador vai para stderr (stdout fica limpo)
+            with contextlib.redirect_stdout(sys.stderr), \
+                    bench_connection(backend, count, exporter, database, synthetic) as conn:
+                run = {'list': run_list, 'stream': run_stream, 'parallel': run_parallel}[pipeline]
+                metrics.set_result(rows=run(conn, exporter, metrics))
+            status = 'ok'
+        finally:
+            report = metrics.finish_run(status, Path(tmp) / 'report.json', counters=database.STATS)
+            report['backend'], report['pipeline'], report['size'] = backend, pipeline, count
+            output.write_text(json.dumps(report, ensure_ascii=False), encoding='utf-8')
+            database.close_pool()
+
+
+# ========== ORQUESTRAÇÃO ==========
+
+def run_combination(backend: str, pipeline: str, count: int, verbose: bool) -> dict:
+    """Roda uma combinação num subprocesso e devolve o relatório"""
+    with tempfile.NamedTemporaryFile(suffix='.json', delete=False) as tmp:
+        output = Path(tmp.name)
+    try:
+        command = [sys.executable, str(Path(__file__).resolve()), '--worker',
+                   '--backend', backend, '--pipeline', pipeline,
+                   '--size', str(count), '--output', str(output)]
+        stderr = None if verbose else subprocess.DEVNULL
+        result = subprocess.run(command, stderr=stderr)
+        if not output.stat().st_size:
+            raise RuntimeError(f"{backend}/{pipeline}/{size_label(count)} falhou "
+                               f"(código {result.returncode}); rode com --verbose")
+        return json.loads(output.read_text(encoding='utf-8'))
+    finally:
+        output.unlink(missing_ok=True)
+
+
+def result_key(report: dict, stage: dict) -> str:
+    return f"{report['backend']}/{report['pipeline']}/{size_label(report['size'])}/{stage['name']}"
+
+
+def flatten(reports: list) -> dict:
+    """
+    chave backend/pipeline/tamanho/etapa → {seconds, rss_delta_bytes, rows_in, rows_out, bytes}
+
+    Os picos de RSS (acumulados, não por etapa) ficam na pseudo-etapa 'run'.
+    """
+    results = {}
+    for report in reports:
+        for stage in report['stages']:
+            results[result_key(report, stage)] = {
+                key: stage.get(key) for key in ('seconds', 'rss_delta_bytes', 'rows_in', 'rows_out', 'bytes')
+            }
+        results[result_key(report, {'name': 'run'})] = {
+            key: report.get(key) for key in ('seconds', 'peak_rss_bytes', 'children_peak_rss_bytes')
+        }
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Regressões além de `threshold` (fração) em tempo ou memória"""
+    regressions = []
+    for key, current in results.items():
+        base = baseline.get(key)
+        if not base:
+            continue
+        for metric, min_delta in (('seconds', MIN_DELTA_SECONDS), ('rss_delta_bytes', MIN_DELTA_RSS),
+                                  ('peak_rss_bytes', MIN_DELTA_RSS),
+                                  ('children_peak_rss_bytes', MIN_DELTA_RSS)):
+            now, before = current.get(metric), base.get(metric)
+            if now is None or not before:
+                continue
+            if now > before * (1 + threshold) and now - before > min_delta:
+                regressions.append((key, metric, before, now))
+    return regressions
+
+
+def print_results(reports: list, baseline: dict):
+    """Tabela de tempo, linhas e RSS por etapa (com a variação sobre a baseline)"""
+    for report in reports:
+        print(f"\n📊 {report['backend']} / {report['pipeline']} / {size_label(report['size'])} linhas"
+              + ("" if report['status'] == 'ok' else " ❌"))
+        for stage in report['stages']:
+            line = f"   {stage['name']:<16} {stage['seconds']:>9.3f}s"
+            base = baseline.get(result_key(report, stage))
+            if base and base.get('seconds'):
+                line += f" ({(stage['seconds'] / base['seconds'] - 1) * 100:+.0f}%)"
+            if stage['rows_out'] is not None:
+                line += f" | {stage['rows_out']} linhas"
+            if stage.get('rss_delta_bytes') is not None:
+                line += f" | RSS {stage['rss_delta_bytes'] / 1024 / 1024:+.0f} MB"
+            print(line)
+        line = f"   {'total':<16} {report['seconds']:>9.3f}s"
+        if report.get('peak_rss_bytes') is not None:
+            line += f" | pico RSS {report['peak_rss_bytes'] / 1024 / 1024:.0f} MB"
+        if report.get('children_peak_rss_bytes'):
+            line += f" (workers {report['children_peak_rss_bytes'] / 1024 / 1024:.0f} MB)"
+        print(line)
+
+
+def check_backend(backend: str, allow_remote: bool):
+    """Evita carregar 1M de linhas sintéticas no banco de produção"""
+    if backend != 'postgres':
+        return
+    sys.path.insert(0, str(PROJECT_DIR))
+    import database
+    if database.DB_HOST not in LOCAL_HOSTS and not allow_remote:
+        sys.exit(f"❌ DB_HOST={database.DB_HOST} não é local. Aponte o .env para um Postgres "
+                 f"local (ex.: DB_HOST=localhost) ou use --allow-remote.")
+
+
+def parse_args(argv=None):
+    """Lê os argumentos de linha de comando"""
+    parser = argparse.ArgumentParser(description="Benchmarks do exportador Atrio")
+    parser.add_argument('--backend', choices=('fake', 'postgres', 'all'), default='fake',
+                        help="fake (em processo), postgres (local) ou all")
+    parser.add_argument('--sizes', default=DEFAULT_SIZES,
+                        help=f"Tamanhos do audit_log sintético (padrão: {DEFAULT_SIZES})")
+    parser.add_argument('--pipelines', default=','.join(PIPELINES),
+                        help="list (padrão do exportador), stream (--stream), parallel (--decode-workers)")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="Regressão tolerada sobre a baseline (fração; padrão: 0.25 = 25%%)")
+    parser.add_argument('--baseline', type=Path, default=BASELINE_FILE,
+                        help=f"Arquivo de baseline (padrão: {BASELINE_FILE.relative_to(PROJECT_DIR)})")
+    parser.add_argument('--save-baseline', action='store_true',
+                        help="Grava os resultados como nova baseline")
+    parser.add_argument('--allow-remote', action='store_true',
+                        help="Permite --backend postgres com DB_HOST não local")
+    parser.add_argument('--verbose', action='store_true',
+                        help="Mostra a saída do exportador durante os benchmarks")
+    # Uso interno: uma combinação por subprocesso
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--pipeline', choices=PIPELINES, help=argparse.SUPPRESS)
+    parser.add_argument('--size', type=int, help=argparse.SUPPRESS)
+    parser.add_argument('--output', type=Path, help=argparse.SUPPRESS)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    if args.worker:
+        worker(args.backend, args.pipeline, args.size, args.output)
+        return
+
+    backends = ('fake', 'postgres') if args.backend == 'all' else (args.backend,)
+    for backend in backends:
+        check_backend(backend, args.allow_remote)
+    sizes = [parse_size(size) for size in args.sizes.split(',')]
+    pipelines = [pipeline.strip() for pipeline in args.pipelines.split(',')]
+
+    print("=" * 60)
+    print("⏱️ BENCHMARKS - EXPORTADOR ATRIO")
+    print("=" * 60)
+
+    baseline = {}
+    if args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text(encoding='utf-8'))['results']
+
+    reports = []
+    for backend in backends:
+        for count in sizes:
+            for pipeline in pipelines:
+                print(f"▶️ {backend} / {pipeline} / {size_label(count)} linhas...", flush=True)
+                reports.append(run_combination(backend, pipeline, count, args.verbose))
+
+    print_results(reports, baseline)
+
+    results = flatten(reports)
+    document = {'python': sys.version.split()[0], 'cpu_count': os.cpu_count(), 'results': results}
+    RESULTS_FILE.parent.mkdir(parents=True, exist_ok=True)
+    RESULTS_FILE.write_text(json.dumps(document, indent=2), encoding='utf-8')
+    print(f"\n📝 Resultados: {RESULTS_FILE.relative_to(PROJECT_DIR)}")
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(document, indent=2), encoding='utf-8')
+        print(f"💾 Baseline gravada em {args.baseline}")
+        return
+
+    if not baseline:
+        print("ℹ️ Sem baseline para comparar (rode com --save-baseline na máquina de referência)")
+        return
+
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"\n❌ {len(regressions)} regressões acima de {args.threshold:.0%}:")
+        for key, metric, before, now in regressions:
+            if metric == 'seconds':
+                print(f"   {key}: {before:.3f}s → {now:.3f}s")
+            else:
+                print(f"   {key}: {metric} {before / 1024 / 1024:.0f} MB → {now / 1024 / 1024:.0f} MB")
+        sys.exit(1)
+    print(f"\n✅ Nenhuma regressão acima de {args.threshold:.0%}")
+
+
+if __name__ == '__main__':
+    main()
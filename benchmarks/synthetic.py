@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+Gerador de audit_log sintético - benchmarks do exportador
+
+Gera linhas no formato do audit_log real (id, message, details, created_at)
+a partir do formato do applicants.json publicado:
+- `details` completo (talento com currículo, vaga, payload extra que o
+  exportador descarta), não só os campos projetados
+- `message` misturado (só parte é 'Candidato vinculado')
+- offices em snake_case na raiz, camelCase na raiz ou dentro de body
+- candidatos sem externalId, sem campos obrigatórios e eventos repetidos
+
+As linhas são geradas sob demanda (determinísticas pela semente), então 1M
+de linhas não ficam em memória. Servem tanto o cursor falso em processo
+(FakeConnection) quanto a carga num Postgres local (load_postgres).
+
+Uso:
+    from synthetic import generate_rows, FakeConnection, load_postgres
+"""
+
+import csv
+import io
+import json
+import random
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# Exportador (raiz do projeto)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import export_from_supabase as exporter
+
+SEED = 20240101
+
+# Proporções da massa sintética
+LINKED_RATIO = 0.7              # linhas com message = 'Candidato vinculado'
+REPLAY_RATIO = 0.1              # eventos repetidos do mesmo talento + vaga
+MISSING_EXTERNAL_ID_RATIO = 0.03
+MISSING_FIELD_RATIO = 0.01
+VACANCIES = 400
+
+OTHER_MESSAGES = (
+    'Candidato movido de etapa',
+    'Vaga atualizada',
+    'Candidato reprovado',
+    'Login realizado',
+)
+
+FIRST_NAMES = ('ANA', 'CARLOS', 'MARIA', 'JOÃO', 'JÚLIA', 'PEDRO', 'LUCAS', 'FERNANDA',
+               'JOSÉ', 'BRUNA', 'RAFAEL', 'CAMILA', 'ANDRÉ', 'LETÍCIA', 'MÁRCIO', 'ÉRICA')
+LAST_NAMES = ('SILVA', 'SOUZA', 'OLIVEIRA', 'SANTOS', 'PEREIRA', 'CONCEIÇÃO', 'ARAÚJO',
+              'FREITAS', 'MARINHO', 'GONÇALVES', 'RIBEIRO', 'LIMA')
+ROLES = ('Arrumadeira(o)', 'Recepcionista', 'Cozinheiro(a)', 'Garçom', 'Camareira(o)',
+         'Auxiliar de Manutenção', 'Mensageiro', 'Supervisor(a) de Governança')
+LEVELS = ('Jr.', 'Pl.', 'Sr.')
+
+
+def sample_offices() -> list:
+    """(branch, head) reais do applicants.json; um par genérico se não houver"""
+    pairs = {}
+    if exporter.JSON_FILE.exists():
+        with open(exporter.JSON_FILE, 'r', encoding='utf-8') as f:
+            for applicant in json.load(f):
+                branch, head = applicant.get('branch_office'), applicant.get('head_office')
+                if branch and head:
+                    pairs[json.dumps([branch, head], sort_keys=True)] = (branch, head)
+    if not pairs:
+        head = {'id': 'h-1', 'code': 1, 'name': 'ATRIO HOTEIS SA',
+                'externalId': 'B353032E36B5408EAC4632458BA81E0A', 'tradingName': 'Atrio Hoteis SA'}
+        branch = {'id': 'b-1', 'code': 5, 'name': 'ATRIO SA - Ibis Joinville',
+                  'externalId': '3E2AF0BF7DE148BEAAB5D308F6258F75', 'tradingName': 'Ibis Joinville'}
+        pairs['default'] = (branch, head)
+    return list(pairs.values())
+
+
+def _talent(rng, talent_id: int) -> dict:
+    name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {rng.choice(LAST_NAMES)}"
+    return {
+        'id': talent_id,
+        'user': {
+            'name': name,
+            'email': f"talento{talent_id}@example.com",
+            'city': rng.choice(('Joinville, SC, Brasil', 'São Paulo, SP, Brasil',
+                                'Curitiba, PR, Brasil', 'Florianópolis, SC, Brasil')),
+            'phone': f"+55 47 9{rng.randrange(10**7, 10**8)}",
+            'birthdate': f"19{rng.randrange(60, 99)}-0{rng.randrange(1, 9)}-1{rng.randrange(0, 9)}",
+        },
+        # Payload que o exportador descarta (o grosso do JSONB real)
+        'resume': {
+            'summary': 'Experiência em hotelaria e atendimento. ' * rng.randrange(3, 12),
+            'experiences': [
+                {'company': f"Hotel {i}", 'role': rng.choice(ROLES), 'months': rng.randrange(1, 60)}
+                for i in range(rng.randrange(1, 5))
+            ],
+        },
+        'tags': ['hotelaria', 'atendimento', 'turno'][:rng.randrange(1, 4)],
+    }
+
+
+def details_payload(rng, offices: list, talent_id: int, vacancy: int) -> dict:
+    """`details` completo de um evento, com as variações de formato do ETL"""
+    branch, head = rng.choice(offices)
+    if rng.random() < MISSING_EXTERNAL_ID_RATIO:
+        branch = {key: value for key, value in branch.items() if key != 'externalId'}
+        head = {key: value for key, value in head.items() if key != 'externalId'}
+
+    role = ROLES[vacancy % len(ROLES)]
+    details = {
+        'applicant': None,
+        'vacancy_title': f"{role} {LEVELS[vacancy % len(LEVELS)]} (Cód. {3000 + vacancy})",
+        'senior_vacancy_id': rng.choice(('undefined', str(90000 + vacancy))),
+        'recrutei_vacancy_id': str(120000 + vacancy),
+        'body': {
+            'talent': _talent(rng, talent_id),
+            'vacancy': {'id': 120000 + vacancy, 'status': 'open', 'positions': rng.randrange(1, 6)},
+            'pipeline': {'stage': 'Triagem', 'history': [{'stage': 'Inscrito'}] * rng.randrange(1, 4)},
+        },
+    }
+    details['applicant'] = details['body']['talent']['user']['name']
+
+    # Mesmas três formas que PROJECTED_DETAILS_SQL / transform_data aceitam
+    layout = rng.randrange(3)
+    if layout == 0:
+        details['branch_office'], details['head_office'] = branch, head
+    elif layout == 1:
+        details['branchOffice'], details['headOffice'] = branch, head
+    else:
+        details['body']['branchOffice'], details['body']['headOffice'] = branch, head
+
+    if rng.random() < MISSING_FIELD_RATIO:
+        del details[rng.choice(('applicant', 'vacancy_title'))]
+    return details
+
+
+def _row_rng(seed: int, index: int) -> random.Random:
+    """Gerador próprio de cada linha: qualquer linha sai igual em qualquer ordem"""
+    return random.Random(seed * 1_000_003 + index)
+
+
+def _base_key(rng, talents: int) -> tuple:
+    return rng.randrange(1, talents + 1), rng.randrange(VACANCIES)
+
+
+def make_row(index: int, count: int, seed: int, offices: list, start: datetime,
+             step: timedelta) -> dict:
+    """Linha `index` (0 = mais antiga) de uma massa de `count` linhas"""
+    rng = _row_rng(seed, index)
+    talents = max(count // 3, 1)
+    linked = rng.random() < LINKED_RATIO
+    talent_id, vacancy = _base_key(rng, talents)
+
+    if not linked:
+        message = rng.choice(OTHER_MESSAGES)
+        details = {'event': message, 'user': rng.randrange(1000)}
+    else:
+        message = exporter.MESSAGE_FILTER
+        if index and rng.random() < REPLAY_RATIO:
+            # Replay: mesmo talento + vaga de um evento recente
+            earlier = _row_rng(seed, max(0, index - rng.randrange(1, 1000)))
+            earlier.random()
+            talent_id, vacancy = _base_key(earlier, talents)
+        details = details_payload(rng, offices, talent_id, vacancy)
+
+    return {'id': index + 1, 'message': message, 'details': details,
+            'created_at': start + step * index}
+
+
+def generate_rows(count: int, seed: int = SEED, now: datetime = None, newest_first: bool = False):
+    """
+    Gera `count` linhas do audit_log (ids crescentes com created_at)
+
+    created_at fica espalhado dentro da janela de WINDOW_DAYS, então a
+    consulta da janela do exportador enxerga todas as linhas. Com
+    `newest_first` sai na ordem do ORDER BY do exportador, sem materializar.
+    """
+    offices = sample_offices()
+    now = now or datetime.now(timezone.utc)
+    span = timedelta(days=exporter.WINDOW_DAYS) - timedelta(minutes=5)
+    step = span / max(count, 1)
+    start = now - span
+
+    indexes = range(count - 1, -1, -1) if newest_first else range(count)
+    for index in indexes:
+        yield make_row(index, count, seed, offices, start, step)
+
+
+# ========== CURSOR FALSO (EM PROCESSO) ==========
+
+def _first_object(details: dict, *paths):
+    """Equivalente Python de _first_object_sql: primeiro objeto não nulo e não vazio"""
+    for path in paths:
+        value = details
+        for key in path:
+            value = value.get(key) if isinstance(value, dict) else None
+        if value is not None and value != {}:
+            return value
+    return None
+
+
+def project_details(details: dict) -> dict:
+    """Mesma projeção de PROJECTED_DETAILS_SQL, em Python (o que o banco devolveria)"""
+    body = details.get('body')
+    talent = (body or {}).get('talent') if isinstance(body, dict) else None
+    projected = {
+        'applicant': details.get('applicant'),
+        'vacancy_title': details.get('vacancy_title'),
+        'senior_vacancy_id': details.get('senior_vacancy_id'),
+        'recrutei_vacancy_id': details.get('recrutei_vacancy_id'),
+        'branch_office': _first_object(details, ('branch_office',), ('branchOffice',), ('body', 'branchOffice')),
+        'head_office': _first_object(details, ('head_office',), ('headOffice',), ('body', 'headOffice')),
+        'body': {},
+    }
+    if isinstance(body, dict) and 'talent' in body:
+        user = (talent or {}).get('user') or {}
+        projected['body'] = {'talent': {
+            'id': (talent or {}).get('id'),
+            'user': {'name': user.get('name'), 'email': user.get('email'), 'city': user.get('city')},
+        }}
+    # jsonb devolve um objeto novo por linha (nada compartilhado entre linhas)
+    return json.loads(json.dumps(projected))
+
+
+class FakeCursor:
+    """
+    Cursor server-side falso: filtra, projeta e ordena como a query do exportador
+
+    Entende os parâmetros de build_fetch_query: message, janela
+    (window_days), intervalo do backfill (since/until) e marca d'água
+    (wm_created_at - wm_lookback).
+    """
+
+    def __init__(self, connection):
+        self.connection = connection
+        self.itersize = exporter.ITERSIZE
+        self._rows = iter(())
+
+    def execute(self, query, params=None):
+        params = params or {}
+        rows = generate_rows(self.connection.count, self.connection.seed,
+                             self.connection.now, newest_first=True)
+        rows = (row for row in rows if row['message'] == params.get('message'))
+        # Mesmos filtros de created_at de build_fetch_query
+        if 'since' in params:
+            since, until = params['since'], params['until']
+            rows = (row for row in rows if since <= row['created_at'] < until)
+        if 'window_days' in params:
+            cutoff = datetime.now(timezone.utc) - timedelta(days=params['window_days'])
+            rows = (row for row in rows if row['created_at'] > cutoff)
+        if 'wm_created_at' in params:
+            cutoff = datetime.fromisoformat(params['wm_created_at']) - params['wm_lookback']
+            rows = (row for row in rows if row['created_at'] > cutoff)
+        # ::text (--decode-workers): o banco devolve o JSON sem decodificar
+        encode = json.dumps if f"::text AS {exporter.DETAILS_COLUMN}" in query else None
+        # Em streaming, já na ordem do ORDER BY (created_at DESC, id DESC)
+        self._rows = (
+            {'id': row['id'], 'created_at': row['created_at'],
+             exporter.DETAILS_COLUMN: (encode(project_details(row['details'])) if encode
+                                       else project_details(row['details']))}
+            for row in rows
+        )
+
+    def __iter__(self):
+        return self._rows
+
+    def close(self):
+        self._rows = iter(())
+
+
+class FakeConnection:
+    """Conexão falsa com `count` linhas sintéticas (aceita conn.cursor(name=..., ...))"""
+
+    def __init__(self, count: int, seed: int = SEED):
+        self.count = count
+        self.seed = seed
+        self.now = datetime.now(timezone.utc)
+
+    def cursor(self, *args, **kwargs):
+        return FakeCursor(self)
+
+
+# ========== POSTGRES LOCAL ==========
+
+class _CsvStream(io.RawIOBase):
+    """Arquivo somente leitura que gera o CSV do COPY sob demanda"""
+
+    def __init__(self, rows):
+        self._rows = rows
+        self._buffer = b''
+
+    def readable(self):
+        return True
+
+    def readinto(self, target):
+        while len(self._buffer) < len(target):
+            chunk = io.StringIO()
+            writer = csv.writer(chunk)
+            for _ in range(1000):
+                row = next(self._rows, None)
+                if row is None:
+                    break
+                writer.writerow((row['id'], row['message'],
+                                 json.dumps(row['details'], ensure_ascii=False),
+                                 row['created_at'].isoformat()))
+            data = chunk.getvalue().encode('utf-8')
+            if not data:
+                break
+            self._buffer += data
+        size = min(len(target), len(self._buffer))
+        target[:size] = self._buffer[:size]
+        self._buffer = self._buffer[size:]
+        return size
+
+
+def load_postgres(conn, schema: str, count: int, seed: int = SEED) -> bool:
+    """
+    Cria {schema}.audit_log com `count` linhas sintéticas (COPY em streaming)
+
+    Reaproveita a tabela se já tiver a mesma quantidade de linhas. Retorna
+    True se carregou.
+    """
+    table = f"{schema}.{exporter.TABLE_NAME}"
+    with conn.cursor() as cursor:
+        cursor.execute(f"CREATE SCHEMA IF NOT EXISTS {schema}")
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {table} (
+                id bigint PRIMARY KEY,
+                message text,
+                {exporter.DETAILS_COLUMN} jsonb,
+                created_at timestamptz NOT NULL DEFAULT now()
+            )
+        """)
+        # Reaproveita se tiver a mesma quantidade e ainda couber na janela
+        cursor.execute(
+            f"SELECT count(*), min(created_at) > NOW() - %s * INTERVAL '1 day' FROM {table}",
+            (exporter.WINDOW_DAYS,)
+        )
+        rows, fresh = cursor.fetchone()
+        if rows == count and fresh:
+            conn.commit()
+            return False
+
+        cursor.execute(f"TRUNCATE {table}")
+        cursor.copy_expert(
+            f"COPY {table} (id, message, {exporter.DETAILS_COLUMN}, created_at) FROM STDIN WITH (FORMAT csv)",
+            io.BufferedReader(_CsvStream(generate_rows(count, seed)), buffer_size=1024 * 1024)
+        )
+        cursor.execute(f"ANALYZE {table}")
+    conn.commit()
+    return True
@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+Camada de conexão compartilhada - PostgreSQL (Supabase)
+
+Usada pelo export_from_supabase.py e pelos scripts em scripts/:
+- Pool de conexões (psycopg2.pool) reaproveitado entre consultas
+- TCP keepalives e connect_timeout
+- statement_timeout por consulta
+- Retry com backoff exponencial (com jitter) em OperationalError
+
+Uso:
+    import database
+
+    rows = database.run_query("SELECT 1")
+
+    # Várias consultas na mesma conexão (com retry da operação inteira)
+    result = database.with_retry(lambda conn: minha_funcao(conn))
+
+    database.print_stats()
+    database.close_pool()
+"""
+
+import os
+import random
+import threading
+import time
+from contextlib import contextmanager
+from dotenv import load_dotenv
+import psycopg2
+import psycopg2.errors
+import psycopg2.pool
+
+# Carregar variáveis de ambiente do arquivo .env
+load_dotenv()
+
+# ========== CONFIGURAÇÕES ==========
+# Credenciais PostgreSQL (Supabase)
+DB_HOST = os.getenv('DB_HOST')
+DB_PORT = os.getenv('DB_PORT', '5432')
+DB_USER = os.getenv('DB_USER', 'postgres')
+DB_NAME = os.getenv('DB_NAME', 'postgres')
+DB_PASSWORD = os.getenv('DB_PASSWORD')
+
+# Tamanho máximo do pool (consultas concorrentes)
+POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '4'))
+
+# Timeout padrão por consulta (ms). Evita que um scan pendure a execução
+STATEMENT_TIMEOUT_MS = int(os.getenv('DB_STATEMENT_TIMEOUT_MS', '120000'))
+
+# Retry em falhas transitórias (OperationalError)
+MAX_ATTEMPTS = int(os.getenv('DB_MAX_ATTEMPTS', '4'))
+BACKOFF_BASE = 0.5   # segundos
+BACKOFF_MAX = 15.0   # segundos
+
+# Parâmetros de conexão (keepalives detectam conexões mortas pelo pooler)
+CONNECT_OPTIONS = {
+    'connect_timeout': 10,
+    'keepalives': 1,
+    'keepalives_idle': 30,
+    'keepalives_interval': 10,
+    'keepalives_count': 5,
+    'application_name': 'atrio-export',
+}
+
+# Contadores da execução (exibidos por print_stats)
+STATS = {
+    'connections_opened': 0,
+    'connections_reused': 0,
+    'connections_discarded': 0,
+    'retries': 0,
+    'connect_seconds': 0.0,
+}
+
+_pool = None
+_pool_lock = threading.Lock()
+_seen_connections = set()
+
+
+def validate_credentials():
+    """Garante que as credenciais mínimas estão configuradas"""
+    if not DB_HOST or not DB_PASSWORD:
+        raise ValueError(
+            "Credenciais não configuradas! "
+            "Verifique o arquivo .env (DB_HOST, DB_PASSWORD)"
+        )
+
+
+def connection_params() -> dict:
+    """Parâmetros passados ao psycopg2.connect"""
+    return dict(
+        host=DB_HOST,
+        port=DB_PORT,
+        user=DB_USER,
+        dbname=DB_NAME,
+        password=DB_PASSWORD,
+        **CONNECT_OPTIONS
+    )
+
+
+def get_pool():
+    """Pool compartilhado (criado na primeira chamada; conexões abertas sob demanda)"""
+    global _pool
+
+    with _pool_lock:
+        if _pool is None:
+            validate_credentials()
+            _pool = psycopg2.pool.ThreadedConnectionPool(0, POOL_SIZE, **connection_params())
+        return _pool
+
+
+def close_pool():
+    """Fecha todas as conexões do pool"""
+    global _pool
+
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
+            _seen_connections.clear()
+
+
+def is_retryable(error: Exception) -> bool:
+    """
+    Falhas transitórias (rede, pooler, reinício do banco)
+
+    Timeout de consulta (QueryCanceled) não é repetido: a mesma consulta
+    estouraria o tempo de novo.
+    """
+    if isinstance(error, psycopg2.errors.QueryCanceled):
+        return False
+    return isinstance(error, (psycopg2.OperationalError, psycopg2.InterfaceError))
+
+
+def backoff_delay(attempt: int) -> float:
+    """Backoff exponencial com jitter completo: uniforme em [0, base * 2^(tentativa-1)]"""
+    return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** (attempt - 1))))
+
+
+def _sleep_before_retry(attempt: int, error: Exception):
+    delay = backoff_delay(attempt)
+    STATS['retries'] += 1
+    print(f"   ⚠️ Falha transitória no banco ({str(error).strip() or type(error).__name__}). "
+          f"Tentativa {attempt + 1}/{MAX_ATTEMPTS} em {delay:.1f}s...")
+    time.sleep(delay)
+
+
+def release(conn, close: bool = False):
+    """Devolve a conexão ao pool (ou descarta, se estiver quebrada)"""
+    if conn is None or _pool is None:
+        return
+
+    close = close or bool(conn.closed)
+    if close:
+        STATS['connections_discarded'] += 1
+        _seen_connections.discard(id(conn))
+    _pool.putconn(conn, close=close)
+
+
+def get_connection(statement_timeout_ms: int = None):
+    """
+    Pega uma conexão do pool, com retry, já com o statement_timeout aplicado
+
+    Devolva com release(conn) (ou use o context manager connection()).
+    """
+    timeout = STATEMENT_TIMEOUT_MS if statement_timeout_ms is None else statement_timeout_ms
+    pool = get_pool()
+
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        conn = None
+        start = time.perf_counter()
+        try:
+            conn = pool.getconn()
+
+            if id(conn) in _seen_connections:
+                STATS['connections_reused'] += 1
+            else:
+                _seen_connections.add(id(conn))
+                STATS['connections_opened'] += 1
+
+            # Também valida a conexão (pode ter morrido parada no pool)
+            with conn.cursor() as cursor:
+                cursor.execute("SET statement_timeout = %s", (timeout,))
+            conn.commit()
+            STATS['connect_seconds'] += time.perf_counter() - start
+            return conn
+
+        except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+            STATS['connect_seconds'] += time.perf_counter() - start
+            if conn is not None:
+                release(conn, close=True)
+            if attempt == MAX_ATTEMPTS:
+                print(f"❌ Erro ao conectar no banco: {e}")
+                print("\n💡 Dicas:")
+                print("   • Verifique se DB_HOST está correto")
+                print("   • Verifique se DB_PASSWORD está correto")
+                print("   • Verifique se o IP está liberado no Supabase")
+                raise
+            _sleep_before_retry(attempt, e)
+
+
+@contextmanager
+def connection(statement_timeout_ms: int = None):
+    """
+    Conexão do pool para um bloco `with`
+
+    Commit ao sair normalmente, rollback em erro; conexões quebradas são
+    descartadas em vez de voltarem ao pool.
+    """
+    conn = get_connection(statement_timeout_ms)
+    broken = False
+    try:
+        yield conn
+        conn.commit()
+    except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+        broken = not isinstance(e, psycopg2.errors.QueryCanceled)
+        if not broken:
+            conn.rollback()
+        raise
+    except BaseException:
+        if not conn.closed:
+            conn.rollback()
+        raise
+    finally:
+        release(conn, close=broken)
+
+
+def with_retry(fn, *args, statement_timeout_ms: int = None, **kwargs):
+    """
+    Executa fn(conn, *args, **kwargs) com retry da operação inteira
+
+    Cada tentativa usa uma conexão do pool; em falha transitória a conexão é
+    descartada e a operação é repetida após o backoff. fn deve ser idempotente.
+    """
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        try:
+            with connection(statement_timeout_ms) as conn:
+                return fn(conn, *args, **kwargs)
+        except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+            if attempt == MAX_ATTEMPTS or not is_retryable(e):
+                raise
+            _sleep_before_retry(attempt, e)
+
+
+def run_query(query: str, params=None, fetch: str = 'all', cursor_factory=None,
+              statement_timeout_ms: int = None):
+    """
+    Executa uma consulta somente leitura com retry
+
+    fetch: 'all' (lista), 'one' (uma linha ou None) ou None (sem resultado).
+    """
+    def _run(conn):
+        with conn.cursor(cursor_factory=cursor_factory) as cursor:
+            cursor.execute(query, params)
+            if fetch == 'all':
+                return cursor.fetchall()
+            if fetch == 'one':
+                return cursor.fetchone()
+            return None
+
+    return with_retry(_run, statement_timeout_ms=statement_timeout_ms)
+
+
+def print_stats():
+    """Mostra reuso de conexões e retries da execução"""
+    print(f"🔌 Conexões: {STATS['connections_opened']} abertas, "
+          f"{STATS['connections_reused']} reutilizadas, "
+          f"{STATS['connections_discarded']} descartadas "
+          f"({STATS['connect_seconds']:.2f}s conectando) | "
+          f"🔁 Retries: {STATS['retries']}")
@@ -5,35 +5,63 @@ Script de Exportação Automática - PostgreSQL (Supabase) → GitHub Pages
 Fluxo:
 1. Conecta no PostgreSQL (Supabase) diretamente
 2. Busca candidatos vinculados da tabela audit_log
-3. Exporta para applicants.json
-4. Converte para applicants-data.js
+3. Grava applicants.json e os artefatos de data/ em uma única passada
+4. Gera applicants-data.js na mesma passada (sem reler o JSON)
 5. Faz commit e push para GitHub
 
 Uso:
-    python export_from_supabase.py
+    python export_from_supabase.py           # incremental (usa a marca d'água)
+    python export_from_supabase.py --full    # reconstrói a janela inteira
     
 Ou agendar no cron/Task Scheduler para rodar a cada X horas
 """
 
+import argparse
+import cProfile
+import gzip
+import hashlib
 import json
 import os
+import pstats
+import re
+import select
+import shutil
 import subprocess
-from datetime import datetime
+import sys
+import textwrap
+import time
+import unicodedata
+from collections import deque
+from concurrent.futures import (
+    FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, as_completed, wait
+)
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from dotenv import load_dotenv
 import psycopg2
-from psycopg2.extras import RealDictCursor
+import psycopg2.errors
+from psycopg2.extensions import ISOLATION_LEVEL_AUTOCOMMIT
+from psycopg2.extras import Json, RealDictCursor, execute_values
 
-# Carregar variáveis de ambiente do arquivo .env
-load_dotenv()
+import database
+import git_publish
+import metrics
+import mirror
+from atomic import AtomicFile, fsync_dir, write_atomic
+
+# Brotli é opcional: sem ele, apenas as variantes .gz são geradas
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# PyICU é opcional: sem ele a ordenação pt-BR usa collation_key (acentos/caixa)
+try:
+    import icu
+except ImportError:
+    icu = None
 
 # ========== CONFIGURAÇÕES ==========
-# Credenciais PostgreSQL (Supabase)
-DB_HOST = os.getenv('DB_HOST')
-DB_PORT = os.getenv('DB_PORT', '5432')
-DB_USER = os.getenv('DB_USER', 'postgres')
-DB_NAME = os.getenv('DB_NAME', 'postgres')
-DB_PASSWORD = os.getenv('DB_PASSWORD')
+# Credenciais e conexão: ver database.py (DB_* no .env)
 
 # Configuração da tabela
 SCHEMA_NAME = 'public'
@@ -41,96 +69,277 @@ TABLE_NAME = 'audit_log'
 DETAILS_COLUMN = 'details'
 MESSAGE_FILTER = 'Candidato vinculado'  # Filtro para pegar apenas candidatos vinculados
 
+def _first_object_sql(*paths: str) -> str:
+    """
+    Primeiro caminho JSONB de `details` que não seja null nem objeto vazio
+    (mesma semântica do `a or b or c` usado em transform_data)
+    """
+    options = [
+        f"NULLIF(NULLIF({DETAILS_COLUMN}{path}, 'null'::jsonb), '{{}}'::jsonb)"
+        for path in paths
+    ]
+    return f"COALESCE({', '.join(options)})"
+
+
+# Projeção server-side: apenas os caminhos de `details` que transform_data mantém.
+# Evita trafegar/decodificar o payload completo (~98% descartado no Python)
+PROJECTED_DETAILS_SQL = f"""jsonb_build_object(
+                'applicant', {DETAILS_COLUMN}->'applicant',
+                'vacancy_title', {DETAILS_COLUMN}->'vacancy_title',
+                'senior_vacancy_id', {DETAILS_COLUMN}->'senior_vacancy_id',
+                'recrutei_vacancy_id', {DETAILS_COLUMN}->'recrutei_vacancy_id',
+                'branch_office', {_first_object_sql("->'branch_office'", "->'branchOffice'", "->'body'->'branchOffice'")},
+                'head_office', {_first_object_sql("->'head_office'", "->'headOffice'", "->'body'->'headOffice'")},
+                'body', CASE WHEN {DETAILS_COLUMN}->'body' ? 'talent' THEN jsonb_build_object(
+                    'talent', jsonb_build_object(
+                        'id', {DETAILS_COLUMN}->'body'->'talent'->'id',
+                        'user', jsonb_build_object(
+                            'name', {DETAILS_COLUMN}->'body'->'talent'->'user'->'name',
+                            'email', {DETAILS_COLUMN}->'body'->'talent'->'user'->'email',
+                            'city', {DETAILS_COLUMN}->'body'->'talent'->'user'->'city'
+                        )
+                    )
+                ) ELSE '{{}}'::jsonb END
+            )"""
+
+# Janela de busca (em dias). Janelas maiores dão timeout na tabela sem índice
+WINDOW_DAYS = 2
+
+# Modo incremental: relê esta margem antes da marca d'água. Uma transação que
+# grava created_at antes da marca mas só faz commit depois dela seria perdida;
+# a sobreposição é absorvida pela deduplicação do merge
+WATERMARK_LOOKBACK = timedelta(minutes=5)
+
+# Tamanho dos lotes lidos do cursor server-side (modo streaming)
+ITERSIZE = 2000
+
+# Decodificação paralela (--decode-workers): details chega do banco como texto
+# e json.loads + iter_transform rodam em processos, em lotes de DECODE_CHUNK
+DECODE_CHUNK = 2000
+
+# Quantidade de avisos guardados para exibir no resumo
+MAX_WARNING_SAMPLES = 5
+
+# Modo --watch (LISTEN/NOTIFY): canal do trigger em migrations/001_audit_log_notify.sql
+WATCH_CHANNEL = 'atrio_audit_log'
+WATCH_DEBOUNCE = 5.0            # segundos sem notificações antes de exportar a rajada
+WATCH_MAX_DELAY = 30.0          # espera máxima acumulando uma rajada contínua
+WATCH_IDLE_REFRESH = 30 * 60    # exporta mesmo sem notificações (expira a janela)
+
+# Backfill (--since/--until): fatias buscadas em paralelo, com checkpoint
+BACKFILL_SLICE_HOURS = 24       # tamanho inicial de cada fatia
+BACKFILL_MIN_SLICE = timedelta(minutes=15)  # abaixo disso não divide mais no timeout
+
+# Snapshot compacto no banco (--snapshot): migrations/003_applicant_snapshot.sql
+SNAPSHOT_TABLE = 'applicant_snapshot'
+SNAPSHOT_STATE_TABLE = 'applicant_snapshot_state'
+SNAPSHOT_BATCH = 500            # linhas por INSERT ... ON CONFLICT
+
 # Diretório do projeto
 PROJECT_DIR = Path(__file__).parent
 
+# Arquivos gerados
+JSON_FILE = PROJECT_DIR / 'applicants.json'
+JS_FILE = PROJECT_DIR / 'applicants-data.js'
+# Marca d'água do modo incremental (último created_at lido do audit_log)
+WATERMARK_FILE = PROJECT_DIR / 'applicants.watermark.json'
+# Hash do conteúdo publicado (pula gravação/deploy se nada mudou)
+HASH_FILE = PROJECT_DIR / 'applicants.hash.json'
+# Artefatos auxiliares publicados no GitHub Pages
+DATA_DIR = PROJECT_DIR / 'data'
+# Um arquivo por externalId (filial/matriz) + manifest.json
+SHARDS_DIR = DATA_DIR / 'shards'
+# Formato compacto opcional (--compact): tabela de offices referenciada por índice
+COMPACT_FILE = DATA_DIR / 'applicants.compact.json'
+COMPACT_FORMAT = 'atrio-compact-v1'
+# JSON minificado (base das variantes comprimidas .gz/.br)
+MIN_JSON_FILE = DATA_DIR / 'applicants.min.json'
+# Manifest de integridade: tamanho, sha256 e encoding de cada variante
+ARTIFACTS_MANIFEST = DATA_DIR / 'artifacts.json'
+# Índice vaga → posições dos candidatos (títulos já ordenados em pt-BR)
+VACANCY_INDEX_FILE = DATA_DIR / 'vacancy-index.json'
+VACANCY_INDEX_FORMAT = 'atrio-vacancy-index-v1'
+UNKNOWN_VACANCY = 'Vaga Desconhecida'
+# Índice de busca invertido (tokens sem acento → posições), carregado sob demanda
+SEARCH_INDEX_FILE = DATA_DIR / 'search-index.json'
+SEARCH_INDEX_FORMAT = 'atrio-search-v1'
+SEARCH_ARTIFACT = 'search'      # formato das variantes .gz/.br do índice em artifacts.json
+# Manifest de versão (poucos bytes, o único arquivo que o site consulta a cada
+# visita) e cópias imutáveis dos artefatos com o hash do conteúdo no nome
+VERSION_FILE = DATA_DIR / 'version.json'
+VERSION_FORMAT = 'atrio-version-v2'
+VERSIONED_DIR = DATA_DIR / 'v'
+VERSION_HASH_CHARS = 16
 
-def connect_database():
-    """Conecta no PostgreSQL (Supabase)"""
-    print("🔌 Conectando no PostgreSQL (Supabase)...")
+# Deltas entre versões publicadas (versão = hash do conteúdo, ver applicants.hash.json)
+DELTAS_DIR = DATA_DIR / 'deltas'
+DELTAS_INDEX = DELTAS_DIR / 'index.json'
+DELTAS_FORMAT = 'atrio-deltas-v1'
+DELTA_FORMAT = 'atrio-delta-v1'
+DELTA_CHAIN = 24                # deltas mantidos (cliente mais antigo baixa tudo)
+DELTA_MAX_RATIO = 0.5           # acima disso (fração da versão anterior) não vale o delta
+# Checkpoints do backfill (fatias concluídas; apagados ao publicar)
+BACKFILL_DIR = PROJECT_DIR / '.backfill'
+BACKFILL_STATE_FILE = BACKFILL_DIR / 'state.json'
+# Espelho local das linhas lidas (--mirror, consultado por scripts/lookup.py)
+MIRROR_FILE = PROJECT_DIR / '.mirror' / 'audit_log.sqlite'
+# Relatórios da execução (metrics.py): não publicados, fora de data/
+REPORTS_DIR = PROJECT_DIR / 'reports'
+RUN_REPORT_FILE = REPORTS_DIR / 'run-report.json'
+RUN_HISTORY_FILE = REPORTS_DIR / 'run-history.jsonl'
+PROM_FILE = REPORTS_DIR / 'atrio_export.prom'
+PROFILE_FILE = REPORTS_DIR / 'run-profile.pstats'
+PROFILE_TOP = 25                # funções exibidas no resumo do --profile
+
+# Multi-tenant (--tenants): um subprocesso por tenant, no máximo N ao mesmo tempo
+TENANT_WORKERS = 4
+TENANT_TIMEOUT = 30 * 60        # segundos por tenant (0 = sem limite)
+TENANTS_REPORT_FILE = REPORTS_DIR / 'tenants-report.json'
+TENANT_LOG_NAME = 'export.log'  # em <output>/reports/
+# Campos de conexão por tenant → variável do database.py
+TENANT_DB_FIELDS = {
+    'host': 'DB_HOST',
+    'port': 'DB_PORT',
+    'user': 'DB_USER',
+    'dbname': 'DB_NAME',
+    'password': 'DB_PASSWORD'
+}
+# Threads de compressão (zlib e brotli liberam o GIL durante a compressão)
+COMPRESSION_WORKERS = 4
+COMPRESSION_CHUNK = 1024 * 1024
+
+
+def build_fetch_query(watermark: dict = None, time_range: tuple = None,
+                      as_text: bool = False) -> tuple:
+    """
+    Monta a query da janela (ou incremental, se houver marca d'água) e seus parâmetros
     
-    # Validar credenciais
-    if not DB_HOST or not DB_PASSWORD:
-        raise ValueError(
-            "Credenciais não configuradas! "
-            "Verifique o arquivo .env (DB_HOST, DB_PASSWORD)"
-        )
+    `time_range` (início, fim) troca a janela por um intervalo fixo
+    [início, fim) de created_at (fatias do backfill). Com `as_text`, details
+    vem como texto JSON (o psycopg2 não decodifica; ver decode_rows).
+    """
+    # ESTRATÉGIA OTIMIZADA:
+    # 1. Pegar apenas os registros da janela (mais rápido)
+    # 2. Filtrar por message no banco (só trafegam candidatos vinculados)
+    # 3. Projetar no banco apenas os campos usados por transform_data
+    # 4. Ordenar no banco: o conjunto já filtrado é pequeno e permite streaming
+    details_sql = f"({PROJECTED_DETAILS_SQL})::text" if as_text else PROJECTED_DETAILS_SQL
+    query = f"""
+        SELECT id, created_at, {details_sql} AS {DETAILS_COLUMN}
+        FROM {SCHEMA_NAME}.{TABLE_NAME}
+        WHERE {DETAILS_COLUMN} IS NOT NULL
+        AND message = %(message)s
+    """
+    params = {'message': MESSAGE_FILTER}
+    
+    if time_range:
+        query += "    AND created_at >= %(since)s AND created_at < %(until)s\n"
+        params['since'], params['until'] = time_range
+    else:
+        query += "    AND created_at > NOW() - %(window_days)s * INTERVAL '1 day'\n"
+        params['window_days'] = WINDOW_DAYS
+    
+    if watermark:
+        query += "    AND created_at > %(wm_created_at)s::timestamptz - %(wm_lookback)s\n"
+        params['wm_created_at'] = watermark['created_at']
+        params['wm_lookback'] = WATERMARK_LOOKBACK
+    
+    query += "        ORDER BY created_at DESC, id DESC\n"
+    return query, params
+
+
+def iter_applicants(conn, watermark: dict = None, itersize: int = ITERSIZE,
+                    state: dict = None, time_range: tuple = None, as_text: bool = False,
+                    with_ids: bool = False):
+    """
+    Gera os candidatos vinculados a partir de um cursor server-side (nomeado)
+    
+    Os registros chegam do banco em lotes de `itersize`, então a memória não
+    cresce com o tamanho da janela. Se `state` for informado, recebe a nova
+    marca d'água em state['watermark'] (registro mais recente) e a contagem
+    em state['rows']. Com `as_text`, gera (id, created_at, texto_json) sem
+    decodificar: a decodificação (e o espelho) ficam com decode_rows. Com
+    `with_ids`, gera (id, details) (o snapshot guarda o id do audit_log).
+    """
+    if state is None:
+        state = {}
+    state.setdefault('watermark', None)
+    state.setdefault('rows', 0)
+    
+    query, params = build_fetch_query(watermark, time_range, as_text)
     
+    cursor = conn.cursor(name='atrio_export_applicants', cursor_factory=RealDictCursor)
+    cursor.itersize = itersize
     try:
-        conn = psycopg2.connect(
-            host=DB_HOST,
-            port=DB_PORT,
-            user=DB_USER,
-            database=DB_NAME,
-            password=DB_PASSWORD,
-            connect_timeout=10
-        )
-        print("✅ Conectado com sucesso!")
-        return conn
-        
-    except psycopg2.OperationalError as e:
-        print(f"❌ Erro ao conectar no banco: {e}")
-        print("\n💡 Dicas:")
-        print("   • Verifique se DB_HOST está correto")
-        print("   • Verifique se DB_PASSWORD está correto")
-        print("   • Verifique se o IP está liberado no Supabase")
-        raise
-    except Exception as e:
-        print(f"❌ Erro inesperado: {e}")
-        raise
+        cursor.execute(query, params)
+        
+        for row in cursor:
+            if state['watermark'] is None:
+                # Ordenado por created_at DESC: o primeiro é o mais recente
+                state['watermark'] = {
+                    'created_at': row['created_at'].isoformat(),
+                    'id': row['id'],
+                    'window_days': WINDOW_DAYS
+                }
+            state['rows'] += 1
+            
+            if as_text:
+                yield row['id'], row['created_at'].isoformat(), row[DETAILS_COLUMN]
+                continue
+            
+            details = row[DETAILS_COLUMN]
+            # created_at do audit_log (usado para expirar registros da janela)
+            details['created_at'] = row['created_at'].isoformat()
+            mirror.record(row['id'], MESSAGE_FILTER, details)
+            yield (row['id'], details) if with_ids else details
+    finally:
+        cursor.close()
 
 
-def fetch_applicants(conn) -> list:
+def fetch_applicants(conn, watermark: dict = None, decode_workers: int = 0,
+                     stats: dict = None) -> tuple:
     """
     Busca candidatos vinculados do PostgreSQL (tabela audit_log)
     
     Estratégia otimizada: busca os últimos registros da tabela e filtra por message
     Isso é muito mais rápido do que scan completo em tabela sem índice
+    
+    Se `watermark` for informado (modo incremental), busca apenas os registros
+    mais novos que a marca d'água da execução anterior, menos a margem
+    WATERMARK_LOOKBACK (commits atrasados; a sobreposição sai no merge).
+    
+    Com `decode_workers`, details vem como texto e é decodificado e
+    transformado em processos (iter_parallel_transform): os candidatos já
+    saem limpos e os contadores vão para `stats` (passe o mesmo dict para
+    transform_data).
+    
+    Retorna (candidatos, nova_marca_dagua). A marca d'água é None quando
+    nenhum registro novo foi encontrado.
     """
     print(f"📡 Buscando candidatos vinculados de '{SCHEMA_NAME}.{TABLE_NAME}'...")
-    print(f"   (Buscando registros dos últimos 15 dias, filtrando '{MESSAGE_FILTER}')")
+    if watermark:
+        print(f"   (Modo incremental: registros após {watermark['created_at']} "
+              f"- {WATERMARK_LOOKBACK}, filtrando '{MESSAGE_FILTER}')")
+    else:
+        print(f"   (Buscando registros dos últimos {WINDOW_DAYS} dias, filtrando '{MESSAGE_FILTER}')")
     
     try:
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-        
-        # ESTRATÉGIA OTIMIZADA:
-        # 1. Pegar apenas os últimos 5000 registros (mais rápido)
-        # 2. Filtrar por message no Python (rápido)
-        # Isso evita timeout em scans completos de tabela grande sem índice
-        
-        query = f"""
-            SELECT id, message, {DETAILS_COLUMN}, created_at
-            FROM {SCHEMA_NAME}.{TABLE_NAME}
-            WHERE {DETAILS_COLUMN} IS NOT NULL
-            AND created_at > NOW() - INTERVAL '2 days'
-
-        """
-        
-        print(f"   Executando query otimizada...")
-        cursor.execute(query)
-        rows = cursor.fetchall()
-        cursor.close()
-        
-        # Ordenar em memória (Python) para aliviar o banco
-        print("   Ordenando registros em memória...")
-        rows.sort(key=lambda x: x['created_at'], reverse=True)
-        
-        print(f"   ✅ {len(rows)} registros recuperados, filtrando...")
-        
-        # Filtrar apenas candidatos vinculados
-        applicants = []
-        for row in rows:
-            if row.get('message') == MESSAGE_FILTER:
-                details = row.get(DETAILS_COLUMN)
-                if details:
-                    applicants.append(details)
+        print("   Executando query otimizada...")
+        state = {}
+        if decode_workers:
+            # Nova tentativa (with_retry) recomeça a contagem
+            stats.update(new_transform_stats())
+            rows = iter_applicants(conn, watermark, state=state, as_text=True)
+            applicants = list(iter_parallel_transform(decode_tasks(rows), decode_workers, stats))
+        else:
+            applicants = list(iter_applicants(conn, watermark, state=state))
         
-        if not applicants:
-            print("⚠️ Nenhum candidato vinculado encontrado nos últimos 10000 registros")
-            return []
+        if not state['rows']:
+            print("⚠️ Nenhum candidato vinculado novo encontrado")
+            return [], state['watermark']
         
-        print(f"✅ {len(applicants)} candidatos vinculados encontrados")
-        return applicants
+        print(f"✅ {state['rows']} candidatos vinculados encontrados")
+        return applicants, state['watermark']
         
     except psycopg2.Error as e:
         print(f"❌ Erro ao buscar dados: {e}")
@@ -140,39 +349,476 @@ def fetch_applicants(conn) -> list:
         raise
 
 
-def transform_data(raw_data: list) -> list:
+# ========== BACKFILL ==========
+
+def parse_timestamp(value: str) -> datetime:
+    """Data/hora ISO (YYYY-MM-DD ou YYYY-MM-DDTHH:MM); sem fuso = UTC"""
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+def split_range(start: datetime, end: datetime, size: timedelta) -> list:
+    """Divide [start, end) em fatias consecutivas de até `size`"""
+    slices = []
+    while start < end:
+        slices.append((start, min(start + size, end)))
+        start += size
+    return slices
+
+
+def missing_ranges(since: datetime, until: datetime, done: list) -> list:
+    """Trechos de [since, until) ainda não cobertos pelas fatias concluídas"""
+    gaps = []
+    cursor = since
+    for start, end in sorted(done):
+        if start > cursor:
+            gaps.append((cursor, min(start, until)))
+        cursor = max(cursor, end)
+    if cursor < until:
+        gaps.append((cursor, until))
+    return [(start, end) for start, end in gaps if start < end]
+
+
+def checkpoint_until(since: datetime):
+    """Fim do intervalo do checkpoint existente para o mesmo `since` (retomada sem --until)"""
+    try:
+        with open(BACKFILL_STATE_FILE, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+        if state.get('since') == since.isoformat():
+            return datetime.fromisoformat(state['until'])
+    except (OSError, ValueError, AttributeError, KeyError):
+        pass
+    return None
+
+
+def load_backfill_state(since: datetime, until: datetime, slice_format: str = 'json') -> dict:
+    """
+    Checkpoint do backfill anterior, se for do mesmo intervalo
+    
+    Checkpoint de outro intervalo, de outro formato de fatia ('json' ou
+    'text', ver save_slice) ou corrompido é descartado.
+    """
+    fresh = {'since': since.isoformat(), 'until': until.isoformat(),
+             'format': slice_format, 'slices': []}
+    
+    if not BACKFILL_STATE_FILE.exists():
+        return fresh
+    try:
+        with open(BACKFILL_STATE_FILE, 'r', encoding='utf-8') as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        state = None
+    
+    if (not isinstance(state, dict)
+            or state.get('since') != fresh['since']
+            or state.get('until') != fresh['until']
+            or state.get('format', 'json') != slice_format):
+        print("   ⚠️ Checkpoint de outro intervalo (ou formato) descartado")
+        shutil.rmtree(BACKFILL_DIR, ignore_errors=True)
+        return fresh
+    
+    return state
+
+
+def save_backfill_state(state: dict):
+    """
+    Grava o checkpoint via write_atomic (fsync + rename)
+    
+    Só é chamado depois de save_slice, que também faz fsync: após uma queda,
+    toda fatia marcada como concluída tem o arquivo inteiro no disco.
+    """
+    write_atomic(BACKFILL_STATE_FILE, json.dumps(state, ensure_ascii=False, indent=2))
+
+
+def save_slice(start: datetime, end: datetime, rows: list, as_text: bool = False) -> str:
+    """
+    Grava as linhas de uma fatia concluída; retorna o nome do arquivo
+    
+    Com `as_text` (--decode-workers) grava uma linha "id<TAB>created_at<TAB>json"
+    por registro, sem decodificar: o texto do jsonb nunca tem quebra de linha
+    nem TAB literais.
+    """
+    stamp = f"slice-{start.strftime('%Y%m%dT%H%M%S')}-{end.strftime('%Y%m%dT%H%M%S')}"
+    name = stamp + ('.tsv' if as_text else '.json')
+    f = AtomicFile(BACKFILL_DIR / name)
+    try:
+        if as_text:
+            for row_id, created_at, text in rows:
+                f.write(f"{row_id}\t{created_at}\t{text}\n")
+        else:
+            json.dump(rows, f, ensure_ascii=False, separators=(',', ':'))
+    except BaseException:
+        f.discard()
+        raise
+    f.commit()
+    return name
+
+
+def iter_text_slice(path: Path):
+    """Linhas (id, created_at, texto_json) de uma fatia gravada com as_text"""
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            row_id, created_at, text = line.rstrip('\n').split('\t', 2)
+            yield int(row_id), created_at, text
+
+
+def fetch_slice(conn, start: datetime, end: datetime, as_text: bool = False) -> tuple:
+    """Busca uma fatia [start, end); retorna (linhas, marca_dagua_da_fatia)"""
+    state = {}
+    rows = list(iter_applicants(conn, state=state, time_range=(start, end), as_text=as_text))
+    return rows, state['watermark']
+
+
+def newest_watermark(watermarks) -> dict:
+    """Marca d'água mais recente (created_at, id) entre as fatias"""
+    present = [wm for wm in watermarks if wm]
+    if not present:
+        return None
+    return max(present, key=lambda wm: (datetime.fromisoformat(wm['created_at']), wm['id']))
+
+
+def backfill(since: datetime, until: datetime, slice_size: timedelta,
+             workers: int, decode_workers: int = 0) -> tuple:
     """
-    Valida, transforma e limpa os dados do banco
+    Busca [since, until) em fatias paralelas, com checkpoint em disco
     
-    Valida campos críticos, conta quantos têm externalId e remove campos desnecessários
-    para reduzir o tamanho do arquivo (~98% de redução)
+    Cada fatia usa uma conexão do pool (com retry em falha transitória).
+    Fatia que estoura o statement_timeout é dividida ao meio e as metades
+    voltam para a fila. Fatias concluídas vão para BACKFILL_DIR, então um
+    backfill interrompido retoma só o que faltou.
+    
+    Com `decode_workers`, as fatias são buscadas como texto e decodificadas
+    e transformadas no fim, em processos.
+    
+    Retorna (linhas, marca_dagua, stats) na ordem da consulta normal
+    (created_at DESC, id DESC). `stats` é None quando as linhas ainda não
+    passaram por iter_transform (sem decode_workers).
     """
-    print("🔄 Validando e limpando dados...")
+    BACKFILL_DIR.mkdir(exist_ok=True)
+    as_text = bool(decode_workers)
+    state = load_backfill_state(since, until, 'text' if as_text else 'json')
+    done = [(datetime.fromisoformat(item['start']), datetime.fromisoformat(item['end']))
+            for item in state['slices']]
+    
+    pending = []
+    for gap in missing_ranges(since, until, done):
+        pending.extend(split_range(*gap, slice_size))
+    
+    print(f"📡 Backfill de {since.isoformat()} a {until.isoformat()}")
+    print(f"   {len(state['slices'])} fatias já concluídas (checkpoint), "
+          f"{len(pending)} pendentes, {workers} conexões em paralelo")
+    
+    # Em erro, para de enviar fatias mas grava as que ainda estão rodando
+    failure = None
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        running = {}
+        while (pending and failure is None) or running:
+            while pending and failure is None and len(running) < workers:
+                start, end = pending.pop(0)
+                future = executor.submit(database.with_retry, fetch_slice, start, end, as_text)
+                running[future] = (start, end)
+            
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                start, end = running.pop(future)
+                try:
+                    rows, watermark = future.result()
+                except psycopg2.errors.QueryCanceled as e:
+                    if end - start <= BACKFILL_MIN_SLICE:
+                        print(f"❌ Fatia mínima {start.isoformat()} → {end.isoformat()} "
+                              f"ainda estoura o statement_timeout")
+                        failure = failure or e
+                        continue
+                    middle = start + (end - start) / 2
+                    print(f"   ✂️ Timeout em {start.isoformat()} → {end.isoformat()}: dividindo ao meio")
+                    pending[:0] = [(start, middle), (middle, end)]
+                    continue
+                except Exception as e:
+                    failure = failure or e
+                    continue
+                
+                state['slices'].append({
+                    'start': start.isoformat(),
+                    'end': end.isoformat(),
+                    'file': save_slice(start, end, rows, as_text),
+                    'rows': len(rows),
+                    'watermark': watermark
+                })
+                save_backfill_state(state)
+                print(f"   ✅ {start.isoformat()} → {end.isoformat()}: {len(rows)} registros")
+    
+    if failure is not None:
+        print(f"💾 Checkpoint: {len(state['slices'])} fatias concluídas em {BACKFILL_DIR.name}/ "
+              f"(rode o mesmo comando para retomar)")
+        raise failure
+    
+    # Mais recentes primeiro: mesma ordem (e desempate da deduplicação) da consulta única
+    ordered = sorted(state['slices'], key=lambda item: item['start'], reverse=True)
+    total = sum(item['rows'] for item in ordered)
+    stats = None
+    if as_text:
+        print(f"🧮 Decodificando {total} registros em {decode_workers} processos...")
+        stats = new_transform_stats()
+        texts = (row for item in ordered for row in iter_text_slice(BACKFILL_DIR / item['file']))
+        rows = list(iter_parallel_transform(decode_tasks(texts), decode_workers, stats))
+    else:
+        rows = []
+        for item in ordered:
+            with open(BACKFILL_DIR / item['file'], 'r', encoding='utf-8') as f:
+                rows.extend(json.load(f))
+    
+    watermark = newest_watermark(item['watermark'] for item in state['slices'])
+    print(f"✅ {total} candidatos vinculados em {len(state['slices'])} fatias")
+    return rows, watermark, stats
+
+
+def clear_backfill():
+    """Remove os checkpoints depois de publicar"""
+    shutil.rmtree(BACKFILL_DIR, ignore_errors=True)
+
+
+# ========== SNAPSHOT (--snapshot) ==========
+
+SNAPSHOT_COLUMNS = (
+    'talent_id', 'vacancy_id', 'created_at', 'audit_log_id', 'applicant', 'vacancy_title',
+    'senior_vacancy_id', 'recrutei_vacancy_id', 'branch_office', 'head_office',
+    'talent', 'branch_external_id', 'head_external_id'
+)
+
+
+def snapshot_key(applicant: dict) -> tuple:
+    """
+    Chave primária do snapshot: a mesma de dedup_key
+    
+    Sem talento/vaga o registro nunca é deduplicado; a chave vira o hash do
+    conteúdo (reaplicar o mesmo registro continua idempotente).
+    """
+    key = dedup_key(applicant)
+    if key is not None:
+        return key
+    return ('', 'sha256:' + hashlib.sha256(canonical_bytes(applicant)).hexdigest())
+
+
+def snapshot_row(applicant: dict, audit_log_id: int) -> tuple:
+    """Candidato já transformado (e id da linha de origem) → valores na ordem de SNAPSHOT_COLUMNS"""
+    branch = applicant.get('branch_office')
+    head = applicant.get('head_office')
+    talent = applicant['body'].get('talent')
+    return (
+        *snapshot_key(applicant),
+        applicant['created_at'],
+        audit_log_id,
+        Json(applicant['applicant']),
+        Json(applicant['vacancy_title']),
+        Json(applicant.get('senior_vacancy_id')),
+        Json(applicant.get('recrutei_vacancy_id')),
+        Json(branch),
+        Json(head),
+        None if talent is None else Json(talent),
+        branch.get('externalId') if isinstance(branch, dict) else None,
+        head.get('externalId') if isinstance(head, dict) else None,
+    )
+
+
+def snapshot_applicant(row: dict) -> dict:
+    """Linha do snapshot → candidato no formato de iter_transform"""
+    applicant = {
+        'applicant': row['applicant'],
+        'vacancy_title': row['vacancy_title'],
+        'senior_vacancy_id': row['senior_vacancy_id'],
+        'recrutei_vacancy_id': row['recrutei_vacancy_id'],
+        'created_at': row['created_at'].isoformat(),
+        'branch_office': row['branch_office'],
+        'head_office': row['head_office'],
+        'body': {}
+    }
+    if row['talent'] is not None:
+        applicant['body']['talent'] = row['talent']
+    return applicant
+
+
+def load_snapshot_state(conn):
+    """Marca d'água do snapshot (último registro do audit_log aplicado) ou None"""
+    with conn.cursor() as cursor:
+        cursor.execute(
+            f"SELECT created_at, audit_log_id FROM {SCHEMA_NAME}.{SNAPSHOT_STATE_TABLE} "
+            f"WHERE name = %s",
+            (TABLE_NAME,)
+        )
+        row = cursor.fetchone()
+    if row is None:
+        return None
+    return {'created_at': row[0].isoformat(), 'id': row[1], 'window_days': WINDOW_DAYS}
+
+
+def snapshot_rows(conn, watermark: dict, state: dict) -> list:
+    """
+    Registros novos do audit_log → linhas do snapshot, uma por chave
+    
+    Mesma regra da consulta única: em ordem (created_at DESC, id DESC) a
+    primeira ocorrência de cada chave vence (o ON CONFLICT também não pode
+    tocar uma linha duas vezes no mesmo comando).
+    """
+    stats = new_transform_stats()
+    seen = set()
+    rows = []
+    for row_id, details in iter_applicants(conn, watermark, state=state, with_ids=True):
+        for applicant in iter_transform([details], stats):
+            key = snapshot_key(applicant)
+            if key in seen:
+                stats['duplicates'] += 1
+                continue
+            seen.add(key)
+            rows.append(snapshot_row(applicant, row_id))
+    print_transform_stats(stats)
+    return rows
+
+
+def prune_snapshot(cursor) -> int:
+    """Remove do snapshot o que saiu da janela: a tabela não cresce com o audit_log"""
+    cursor.execute(
+        f"DELETE FROM {SCHEMA_NAME}.{SNAPSHOT_TABLE} "
+        f"WHERE created_at <= NOW() - %s * INTERVAL '1 day'",
+        (WINDOW_DAYS,)
+    )
+    return cursor.rowcount
+
+
+def sync_snapshot(conn, full: bool = False) -> tuple:
+    """
+    Aplica no snapshot os registros novos do audit_log (uma transação)
+    
+    Upsert por (talento, vaga) em que só um (created_at, id) mais recente
+    sobrescreve: reaplicar os mesmos registros não muda nada, então a operação
+    pode ser repetida com segurança (with_retry, --full). Linhas fora da
+    janela de WINDOW_DAYS são removidas na mesma transação. Retorna
+    (linhas_alteradas, marca_dagua).
+    """
+    watermark = None if full else load_snapshot_state(conn)
+    if watermark:
+        print(f"📡 Sincronizando snapshot: registros após {watermark['created_at']}")
+    else:
+        print(f"📡 Sincronizando snapshot: últimos {WINDOW_DAYS} dias do audit_log")
+    
+    state = {}
+    rows = snapshot_rows(conn, watermark, state)
+    if not rows:
+        with conn.cursor() as cursor:
+            pruned = prune_snapshot(cursor)
+        print(f"✅ Snapshot já está em dia ({pruned} fora da janela removidos)")
+        return pruned, newest_watermark([watermark, state['watermark']])
+    
+    with conn.cursor() as cursor:
+        changed = execute_values(
+            cursor,
+            f"""
+            INSERT INTO {SCHEMA_NAME}.{SNAPSHOT_TABLE} AS s ({', '.join(SNAPSHOT_COLUMNS)})
+            VALUES %s
+            ON CONFLICT (talent_id, vacancy_id) DO UPDATE SET
+                {', '.join(f"{column} = EXCLUDED.{column}" for column in SNAPSHOT_COLUMNS[2:])},
+                updated_at = now()
+            WHERE (s.created_at, s.audit_log_id) < (EXCLUDED.created_at, EXCLUDED.audit_log_id)
+            RETURNING 1
+            """,
+            rows,
+            page_size=SNAPSHOT_BATCH,
+            fetch=True
+        )
+        
+        new_watermark = state['watermark']
+        cursor.execute(
+            f"""
+            INSERT INTO {SCHEMA_NAME}.{SNAPSHOT_STATE_TABLE} AS s (name, created_at, audit_log_id)
+            VALUES (%s, %s, %s)
+            ON CONFLICT (name) DO UPDATE SET
+                created_at = EXCLUDED.created_at,
+                audit_log_id = EXCLUDED.audit_log_id,
+                updated_at = now()
+            WHERE (s.created_at, s.audit_log_id) < (EXCLUDED.created_at, EXCLUDED.audit_log_id)
+            """,
+            (TABLE_NAME, new_watermark['created_at'], new_watermark['id'])
+        )
+        pruned = prune_snapshot(cursor)
+    
+    print(f"✅ Snapshot: {len(changed)} de {len(rows)} candidatos inseridos/atualizados, "
+          f"{pruned} fora da janela removidos")
+    return len(changed) + pruned, newest_watermark([watermark, new_watermark])
+
+
+def fetch_snapshot(conn) -> list:
+    """Candidatos da janela lidos do snapshot (mais recentes primeiro)"""
+    print(f"📡 Lendo '{SCHEMA_NAME}.{SNAPSHOT_TABLE}' (últimos {WINDOW_DAYS} dias)...")
+    with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+        cursor.execute(
+            f"""
+            SELECT applicant, vacancy_title, senior_vacancy_id, recrutei_vacancy_id,
+                   created_at, branch_office, head_office, talent
+            FROM {SCHEMA_NAME}.{SNAPSHOT_TABLE}
+            WHERE created_at > NOW() - %s * INTERVAL '1 day'
+            ORDER BY created_at DESC, audit_log_id DESC
+            """,
+            (WINDOW_DAYS,)
+        )
+        applicants = [snapshot_applicant(row) for row in cursor]
     
-    valid_applicants = []
-    warnings = []
-    stats = {
-        'total': len(raw_data),
+    print(f"✅ {len(applicants)} candidatos no snapshot")
+    return intern_offices(applicants)
+
+
+def new_transform_stats() -> dict:
+    """Contadores preenchidos por iter_transform"""
+    return {
+        'total': 0,
         'with_external_id': 0,
         'without_external_id': 0,
-        'missing_fields': 0
+        'missing_fields': 0,
+        'valid': 0,
+        # Removidos por deduplicação (mesmo talento + vaga)
+        'duplicates': 0,
+        'warnings': 0,
+        # Amostra limitada de avisos (memória constante em modo streaming)
+        'warning_samples': []
     }
+
+
+def _warn(stats: dict, message: str, sample: bool = False):
+    stats['warnings'] += 1
+    if sample and len(stats['warning_samples']) < MAX_WARNING_SAMPLES:
+        stats['warning_samples'].append(message)
+
+
+def iter_transform(raw_data, stats: dict = None):
+    """
+    Versão geradora de transform_data: valida e limpa um candidato por vez
+    
+    Aceita qualquer iterável (lista ou gerador de iter_applicants) e acumula
+    os contadores em `stats` (ver new_transform_stats).
+    """
+    if stats is None:
+        stats = new_transform_stats()
+    
+    # Uma instância compartilhada por office (poucas dezenas de hotéis)
+    offices = {}
     
     for idx, applicant in enumerate(raw_data):
+        stats['total'] += 1
+        
         # Validar estrutura básica
         if not isinstance(applicant, dict):
-            warnings.append(f"Registro {idx}: Não é um objeto JSON válido")
+            _warn(stats, f"Registro {idx}: Não é um objeto JSON válido")
             stats['missing_fields'] += 1
             continue
         
         # Validar campos obrigatórios
         if not applicant.get("applicant"):
-            warnings.append(f"Registro {idx}: Campo 'applicant' ausente")
+            _warn(stats, f"Registro {idx}: Campo 'applicant' ausente")
             stats['missing_fields'] += 1
             continue
         
         if not applicant.get("vacancy_title"):
-            warnings.append(f"Registro {idx}: Campo 'vacancy_title' ausente")
+            _warn(stats, f"Registro {idx}: Campo 'vacancy_title' ausente")
             stats['missing_fields'] += 1
             continue
         
@@ -184,6 +830,9 @@ def transform_data(raw_data: list) -> list:
         branch_data = applicant.get("branch_office") or applicant.get("branchOffice") or body.get("branchOffice")
         head_data = applicant.get("head_office") or applicant.get("headOffice") or body.get("headOffice")
         
+        branch_data = intern_office(branch_data, offices)
+        head_data = intern_office(head_data, offices)
+        
         branch_external_id = branch_data.get("externalId") if branch_data else None
         head_external_id = head_data.get("externalId") if head_data else None
         
@@ -191,10 +840,12 @@ def transform_data(raw_data: list) -> list:
             stats['with_external_id'] += 1
         else:
             stats['without_external_id'] += 1
-            warnings.append(
+            _warn(
+                stats,
                 f"⚠️ Candidato '{applicant.get('applicant')}': "
                 f"Sem externalId (branchOffice ou headOffice). "
-                f"Este candidato NÃO será visível para ninguém!"
+                f"Este candidato NÃO será visível para ninguém!",
+                sample=True
             )
         
         # LIMPEZA: Manter apenas campos essenciais (reduz ~98% do tamanho)
@@ -203,6 +854,7 @@ def transform_data(raw_data: list) -> list:
             "vacancy_title": applicant.get("vacancy_title"),
             "senior_vacancy_id": applicant.get("senior_vacancy_id"),
             "recrutei_vacancy_id": applicant.get("recrutei_vacancy_id"),
+            "created_at": applicant.get("created_at"),
             # Preservar dados de estrutura na raiz para facilitar JS
             "branch_office": branch_data, 
             "head_office": head_data,
@@ -224,144 +876,2190 @@ def transform_data(raw_data: list) -> list:
              # (Opcional: implementar se necessário, mas Evander tem talent no body)
              pass
         
-        valid_applicants.append(clean_item)
+        stats['valid'] += 1
+        yield clean_item
+
+
+def dedup_key(applicant: dict):
+    """
+    Chave de deduplicação: (body.talent.id, recrutei_vacancy_id)
+    
+    Retorna None se faltar algum dos dois (esses registros nunca são deduplicados).
+    """
+    talent = (applicant.get("body") or {}).get("talent") or {}
+    talent_id = talent.get("id")
+    vacancy_id = applicant.get("recrutei_vacancy_id")
+    if talent_id is None or vacancy_id is None:
+        return None
+    return (str(talent_id), str(vacancy_id))
+
+
+def deduplicate(data: list) -> tuple:
+    """
+    Remove eventos repetidos do mesmo talento na mesma vaga (retries/replays do ETL)
+    
+    Passada única com índice hash chave → posição; em caso de repetição fica o
+    registro com created_at mais recente. Registros sem chave só saem se forem
+    idênticos (releitura da margem do modo incremental). Retorna
+    (lista_unica, removidos).
+    """
+    index = {}
+    unique = []
+    seen = set()
+    
+    for applicant in data:
+        key = dedup_key(applicant)
+        if key is None:
+            canonical = canonical_bytes(applicant)
+            if canonical not in seen:
+                seen.add(canonical)
+                unique.append(applicant)
+            continue
+        
+        position = index.get(key)
+        if position is None:
+            index[key] = len(unique)
+            unique.append(applicant)
+        elif (applicant.get('created_at') or '') > (unique[position].get('created_at') or ''):
+            unique[position] = applicant
+    
+    return unique, len(data) - len(unique)
+
+
+def iter_dedup(items, stats: dict):
+    """
+    Versão streaming de deduplicate
     
-    # Mostrar estatísticas
+    Depende da ordem do banco (created_at DESC): a primeira ocorrência de cada
+    chave já é a mais recente, então as seguintes são descartadas. Registros
+    sem chave seguem a mesma regra de deduplicate (só idênticos).
+    """
+    seen = set()
+    for applicant in items:
+        key = dedup_key(applicant)
+        if key is None:
+            key = canonical_bytes(applicant)
+        if key in seen:
+            stats['duplicates'] += 1
+            continue
+        seen.add(key)
+        yield applicant
+
+
+def intern_office(office, cache: dict):
+    """Retorna a instância compartilhada de um office igual (ou o próprio, se novo)"""
+    if not isinstance(office, dict) or not office:
+        return office
+    return cache.setdefault(canonical_bytes(office), office)
+
+
+def intern_offices(data: list) -> list:
+    """Aplica intern_office em branch_office/head_office de todo o dataset"""
+    cache = {}
+    # Instâncias já compartilhadas (mesmo lote da decodificação paralela)
+    # serializam uma vez só
+    shared = {}
+    for applicant in data:
+        for field in ("branch_office", "head_office"):
+            office = applicant.get(field)
+            key = id(office)
+            if key not in shared:
+                shared[key] = intern_office(office, cache)
+            applicant[field] = shared[key]
+    return data
+
+
+def print_transform_stats(stats: dict):
+    """Mostra as estatísticas acumuladas por iter_transform"""
     print(f"\n📊 Estatísticas:")
     print(f"   Total processados: {stats['total']}")
     print(f"   ✅ Com externalId: {stats['with_external_id']}")
     print(f"   ⚠️ Sem externalId: {stats['without_external_id']}")
     print(f"   ❌ Campos ausentes: {stats['missing_fields']}")
+    print(f"   🔁 Duplicados (talento + vaga): {stats['duplicates']}")
     
     # Mostrar avisos (máximo 5)
-    if warnings and stats['without_external_id'] > 0:
-        print(f"\n⚠️ Avisos (mostrando até 5):")
-        for warning in warnings[:5]:
-            if "Sem externalId" in warning:
-                print(f"   • {warning}")
-        if len(warnings) > 5:
-            print(f"   ... e mais {len(warnings) - 5} avisos")
-    
-    print(f"\n✅ {len(valid_applicants)} candidatos válidos e limpos")
-    return valid_applicants
+    samples = stats['warning_samples']
+    if samples and stats['without_external_id'] > 0:
+        print(f"\n⚠️ Avisos (mostrando até {MAX_WARNING_SAMPLES}):")
+        for warning in samples:
+            print(f"   • {warning}")
+        if stats['warnings'] > len(samples):
+            print(f"   ... e mais {stats['warnings'] - len(samples)} avisos")
+    
+    print(f"\n✅ {stats['valid'] - stats['duplicates']} candidatos válidos e limpos")
 
 
-def save_json(data: list, filepath: Path):
-    """Salva dados em arquivo JSON"""
-    print(f"\n💾 Salvando em {filepath}...")
+def transform_data(raw_data: list, stats: dict = None) -> list:
+    """
+    Valida, transforma e limpa os dados do banco
     
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    Valida campos críticos, conta quantos têm externalId e remove campos desnecessários
+    para reduzir o tamanho do arquivo (~98% de redução)
     
-    file_size_kb = filepath.stat().st_size / 1024
-    print(f"✅ Arquivo salvo ({file_size_kb:.2f} KB)")
-
-
-def convert_to_js(json_file: Path, js_file: Path):
-    """Converte JSON para arquivo JS"""
-    print(f"🔄 Convertendo para {js_file}...")
+    O grosso da limpeza já acontece no banco (PROJECTED_DETAILS_SQL); aqui os
+    dados são validados e normalizados para o formato publicado.
     
-    with open(json_file, 'r', encoding='utf-8') as f:
-        data = json.load(f)
+    Com `stats` (decodificação paralela), `raw_data` já passou por
+    iter_transform nos processos e os contadores já estão em `stats`: aqui
+    só deduplica e volta a compartilhar os offices entre os lotes.
+    """
+    print("🔄 Validando e limpando dados...")
     
-    # Minificar JSON
-    json_str = json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+    if stats is None:
+        stats = new_transform_stats()
+        valid_applicants, stats['duplicates'] = deduplicate(list(iter_transform(raw_data, stats)))
+    else:
+        valid_applicants, stats['duplicates'] = deduplicate(raw_data)
+        intern_offices(valid_applicants)
     
-    # Adicionar timestamp e header
-    timestamp = datetime.now().strftime('%Y-%m-%d %H:%M')
-    js_content = f"""// Auto-generated applicants data
-// Last updated: {timestamp}
+    print_transform_stats(stats)
+    return valid_applicants
 
-const APPLICANTS_DATA = {json_str};
-"""
-    
-    with open(js_file, 'w', encoding='utf-8') as f:
-        f.write(js_content)
+
+# ========== DECODIFICAÇÃO PARALELA ==========
+
+
+def decode_rows(rows: list, message: str, mirror_rows: bool = False) -> tuple:
+    """
+    Processo de decodificação: (id, created_at, texto_json) → iter_transform
     
-    file_size_kb = js_file.stat().st_size / 1024
-    print(f"✅ Arquivo JS gerado ({file_size_kb:.2f} KB)")
+    Roda num processo do pool (recebe a configuração por argumento). Retorna
+    (candidatos_limpos, stats, linhas_do_espelho ou None), na ordem de `rows`.
+    """
+    stats = new_transform_stats()
+    mirrored = [] if mirror_rows else None
+    raw_data = []
+    for row_id, created_at, text in rows:
+        details = json.loads(text)
+        details['created_at'] = created_at
+        if mirrored is not None:
+            mirrored.append(mirror.mirror_row(row_id, message, details))
+        raw_data.append(details)
+    return list(iter_transform(raw_data, stats)), stats, mirrored
 
 
-def git_commit_and_push():
-    """Faz commit e push para GitHub"""
-    print("\n📤 Fazendo deploy no GitHub...")
+def merge_transform_stats(stats: dict, chunk: dict):
+    """Soma os contadores de um lote em `stats` (amostra de avisos limitada)"""
+    for key, value in chunk.items():
+        if key == 'warning_samples':
+            free = MAX_WARNING_SAMPLES - len(stats[key])
+            stats[key].extend(value[:max(free, 0)])
+        else:
+            stats[key] += value
+
+
+def decode_tasks(rows, chunk_size: int = DECODE_CHUNK):
+    """Agrupa linhas (id, created_at, texto_json) em lotes para decode_rows"""
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def iter_parallel_transform(chunks, workers: int, stats: dict):
+    """
+    Decodifica e transforma os lotes em `workers` processos (decode_rows)
     
-    try:
-        # Add
-        subprocess.run(['git', 'add', 'applicants.json', 'applicants-data.js'], 
-                      cwd=PROJECT_DIR, check=True, capture_output=True)
-        
-        # Commit
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M')
-        commit_msg = f"chore: Atualizar dados dos candidatos ({timestamp})"
-        result = subprocess.run(['git', 'commit', '-m', commit_msg], 
-                              cwd=PROJECT_DIR, capture_output=True, text=True)
-        
-        if result.returncode != 0:
-            if "nothing to commit" in result.stdout:
-                print("⚠️ Nenhuma mudança detectada (dados já estão atualizados)")
-                return
-            else:
-                print(f"⚠️ Erro no commit: {result.stderr}")
-                return
-        
-        # Push
-        subprocess.run(['git', 'push', 'origin', 'main'], 
-                      cwd=PROJECT_DIR, check=True, capture_output=True)
+    Gera os candidatos na ordem dos lotes (a deduplicação depende da ordem
+    do banco). No máximo 2 × workers lotes em voo: o cursor só avança quando
+    o lote mais antigo termina, então a memória continua limitada no
+    --stream. Os contadores vão para `stats`; as linhas do espelho
+    (--mirror) são gravadas aqui, no processo principal.
+    """
+    mirror_rows = mirror.enabled()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
         
-        print("✅ Deploy concluído!")
-        print("🌐 Aguarde ~2 minutos para GitHub Pages atualizar")
+        def collect():
+            applicants, chunk_stats, mirrored = pending.popleft().result()
+            merge_transform_stats(stats, chunk_stats)
+            if mirrored:
+                mirror.record_rows(mirrored)
+            return applicants
         
-    except subprocess.CalledProcessError as e:
-        print(f"⚠️ Erro no Git: {e}")
-        print("   Verifique se o Git está configurado corretamente")
+        for chunk in chunks:
+            pending.append(executor.submit(decode_rows, chunk, MESSAGE_FILTER, mirror_rows))
+            if len(pending) >= 2 * workers:
+                yield from collect()
+        while pending:
+            yield from collect()
 
 
-def main():
-    """Função principal"""
-    print("=" * 60)
-    print("🚀 EXPORTAÇÃO AUTOMÁTICA - POSTGRESQL → GITHUB PAGES")
-    print("=" * 60)
-    print()
+def load_watermark(json_file: Path):
+    """
+    Carrega a marca d'água da execução anterior
     
-    conn = None
+    Retorna None (forçando reconstrução completa) se o arquivo não existir,
+    estiver corrompido, for de outra janela ou se o JSON publicado não existir.
+    """
+    if not WATERMARK_FILE.exists() or not json_file.exists():
+        return None
     
     try:
-        # 1. Conectar no PostgreSQL
-        conn = connect_database()
-        
-        # 2. Buscar dados
-        raw_data = fetch_applicants(conn)
-        
-        if not raw_data:
-            print("\n⚠️ Nenhum dado encontrado. Abortando.")
-            return
-        
-        # 3. Transformar dados
-        applicants = transform_data(raw_data)
-        
-        if not applicants:
-            print("\n⚠️ Nenhum candidato válido. Abortando.")
-            return
-        
-        # 4. Salvar JSON
-        json_file = PROJECT_DIR / 'applicants.json'
-        save_json(applicants, json_file)
-        
-        # 5. Converter para JS
-        js_file = PROJECT_DIR / 'applicants-data.js'
-        convert_to_js(json_file, js_file)
-        
-        # 6. Deploy no GitHub
-        git_commit_and_push()
+        with open(WATERMARK_FILE, 'r', encoding='utf-8') as f:
+            watermark = json.load(f)
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"⚠️ Marca d'água inválida ({e}), fazendo reconstrução completa")
+        return None
+    
+    if not watermark.get('created_at'):
+        return None
+    
+    if watermark.get('window_days') != WINDOW_DAYS:
+        print("⚠️ Janela de busca mudou desde a última execução, fazendo reconstrução completa")
+        return None
+    
+    return watermark
+
+
+def stored_window_days():
+    """
+    Janela (dias) gravada na marca d'água da última publicação (None se não houver)
+    
+    Sem --days, a janela segue a da última publicação: um backfill sem
+    --until alarga a janela e as execuções agendadas continuam nela, em vez
+    de reconstruir com a janela padrão por cima do dataset do backfill.
+    """
+    try:
+        with open(WATERMARK_FILE, 'r', encoding='utf-8') as f:
+            window_days = json.load(f).get('window_days')
+    except (OSError, json.JSONDecodeError, AttributeError):
+        return None
+    return window_days if isinstance(window_days, int) and window_days > 0 else None
+
+
+def save_watermark(watermark: dict):
+    """
+    Salva a marca d'água ao lado do applicants.json (created_at e janela)
+    
+    O id da linha não é gravado: a próxima execução filtra só por created_at
+    menos WATERMARK_LOOKBACK. Um cursor (created_at, id) não enxergaria os
+    commits atrasados (o id sai da sequência no INSERT, não no commit), então
+    a margem mais a deduplicação do merge é o que garante não perder linhas.
+    """
+    stored = {'created_at': watermark['created_at'], 'window_days': watermark.get('window_days')}
+    write_atomic(WATERMARK_FILE, json.dumps(stored, ensure_ascii=False, indent=2))
+
+
+def merge_incremental(new_applicants: list, json_file: Path) -> tuple:
+    """
+    Mescla os candidatos novos com o dataset já publicado
+    
+    Remove do dataset existente os registros que saíram da janela de
+    WINDOW_DAYS dias e deduplica novos x existentes (fica o mais recente).
+    Retorna (dataset_mesclado, quantidade_expirada).
+    """
+    with open(json_file, 'r', encoding='utf-8') as f:
+        existing = json.load(f)
+    
+    cutoff = datetime.now(timezone.utc) - timedelta(days=WINDOW_DAYS)
+    
+    kept = []
+    for applicant in existing:
+        created_at = applicant.get('created_at')
+        # Registros sem created_at (formato antigo) são tratados como expirados
+        if created_at and datetime.fromisoformat(created_at) > cutoff:
+            kept.append(applicant)
+    
+    expired = len(existing) - len(kept)
+    merged, duplicates = deduplicate(new_applicants + kept)
+    intern_offices(merged)
+    
+    print(f"🔀 Mesclando: {len(new_applicants)} novos + {len(kept)} existentes "
+          f"({expired} expirados, {duplicates} duplicados)")
+    
+    return merged, expired
+
+
+def canonical_bytes(applicant: dict) -> bytes:
+    """Serialização canônica de um candidato (chaves ordenadas, sem espaços)"""
+    return json.dumps(
+        applicant, ensure_ascii=False, sort_keys=True, separators=(',', ':')
+    ).encode('utf-8')
+
+
+def sort_canonical(data: list) -> list:
+    """
+    Ordem estável de publicação: mais recentes primeiro (created_at DESC)
+    
+    O sort é estável, então empates mantêm a ordem (created_at, id) do banco.
+    """
+    data.sort(key=lambda applicant: applicant.get('created_at') or '', reverse=True)
+    return data
+
+
+def dataset_hash(data) -> str:
+    """SHA-256 do dataset na forma canônica (um candidato por linha)"""
+    digest = hashlib.sha256()
+    for applicant in data:
+        digest.update(canonical_bytes(applicant))
+        digest.update(b'\n')
+    return digest.hexdigest()
+
+
+def load_previous_hash(required: tuple = ()):
+    """
+    Hash da última publicação (None se não houver ou se os arquivos sumiram)
+    
+    `required` lista artefatos extras que precisam existir para pular a gravação.
+    """
+    always = (
+        HASH_FILE, JSON_FILE, JS_FILE, MIN_JSON_FILE, ARTIFACTS_MANIFEST,
+        VACANCY_INDEX_FILE, SEARCH_INDEX_FILE, VERSION_FILE
+    )
+    for path in always + tuple(required):
+        if not path.exists():
+            return None
+    
+    try:
+        with open(HASH_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f).get('sha256')
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def save_hash(content_hash: str, count: int):
+    """Grava o sidecar com o hash do conteúdo publicado"""
+    write_atomic(HASH_FILE, json.dumps({'sha256': content_hash, 'count': count}, ensure_ascii=False, indent=2))
+
+
+def _js_header() -> str:
+    """
+    Cabeçalho do applicants-data.js (até o início do array)
+    
+    Sem timestamp: o arquivo só muda quando os dados mudam (ver applicants.hash.json)
+    """
+    return """// Auto-generated applicants data
+
+const APPLICANTS_DATA = """
+
+
+def encode_minified(applicant: dict) -> bytes:
+    """Candidato em JSON minificado (JS, applicants.min.json e shards)"""
+    return json.dumps(applicant, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def encode_pretty(applicant: dict) -> bytes:
+    """Candidato como item de json.dump(lista, indent=2): nova linha + 2 espaços"""
+    pretty = json.dumps(applicant, ensure_ascii=False, indent=2)
+    return ('\n' + textwrap.indent(pretty, '  ')).encode('utf-8')
+
+
+# Serializações compartilhadas pelos writers (atributo `encoding` de cada um)
+ENCODERS = {
+    'min': encode_minified,
+    'pretty': encode_pretty,
+    'canonical': canonical_bytes
+}
+
+
+class OutputStage:
+    """
+    Serializa cada candidato uma única vez e distribui os bytes entre os writers
+    
+    Cada writer declara o `encoding` que consome ('min', 'pretty' ou None para
+    quem precisa do dict, como os índices e o compacto). Cada encoding é gerado
+    no máximo uma vez por candidato e os mesmos bytes vão para todos os writers
+    que o usam. Os writers gravam em temporários: commit() publica todos
+    (fsync + rename) e discard() descarta todos.
+    
+    Com `compression` (CompressionPool), cada writer que declara `artifact`
+    tem o arquivo comprimido assim que fecha, enquanto os demais ainda fecham.
+    """
+    
+    def __init__(self, writers: list, hash_items: bool = True, compression=None):
+        self.writers = writers
+        self.compression = compression
+        self.count = 0
+        self._encodings = [name for name in ENCODERS if any(w.encoding == name for w in writers)]
+        self._digest = hashlib.sha256() if hash_items else None
+    
+    def add(self, applicant: dict):
+        encoded = {name: ENCODERS[name](applicant) for name in self._encodings}
+        for writer in self.writers:
+            writer.add(applicant, encoded.get(writer.encoding))
+        if self._digest:
+            self._digest.update(encoded.get('canonical') or canonical_bytes(applicant))
+            self._digest.update(b'\n')
+        self.count += 1
+    
+    def write(self, items) -> int:
+        """Passa todos os itens (lista ou iterador); em erro descarta tudo"""
+        try:
+            for item in items:
+                self.add(item)
+        except BaseException:
+            self.discard()
+            raise
+        return self.count
+    
+    @property
+    def content_hash(self):
+        """Mesmo valor de dataset_hash sobre os itens gravados (None sem hash_items)"""
+        return self._digest.hexdigest() if self._digest else None
+    
+    def commit(self):
+        for position, writer in enumerate(self.writers):
+            try:
+                writer.close()
+            except BaseException:
+                for pending in self.writers[position + 1:]:
+                    pending.discard()
+                raise
+            if self.compression and getattr(writer, 'artifact', None):
+                self.compression.submit(writer.filepath, writer.artifact)
+    
+    def discard(self):
+        for writer in self.writers:
+            writer.discard()
+
+
+def dataset_writers(compact: bool) -> list:
+    """
+    Writers de todos os artefatos do dataset (mesma lista nos modos lista e streaming)
+    
+    Fecham na ordem da lista: os que ganham variantes comprimidas vêm primeiro,
+    para a compressão correr enquanto os outros fecham.
+    """
+    writers = [MinifiedJsonWriter(MIN_JSON_FILE)]
+    if compact:
+        writers.append(CompactWriter(COMPACT_FILE))
+    writers += [
+        SearchIndexWriter(SEARCH_INDEX_FILE),
+        PrettyJsonWriter(JSON_FILE),
+        JsWrapperWriter(JS_FILE),
+        ShardWriter(SHARDS_DIR),
+        VacancyIndexWriter(VACANCY_INDEX_FILE),
+        DeltaWriter(*load_published_fingerprints())
+    ]
+    return writers
+
+
+def dataset_paths(compact: bool) -> list:
+    """Arquivos gravados por dataset_writers (para o relatório de bytes)"""
+    paths = [JSON_FILE, JS_FILE, MIN_JSON_FILE, VACANCY_INDEX_FILE, SEARCH_INDEX_FILE]
+    paths += sorted(SHARDS_DIR.glob('*.json'))
+    if compact:
+        paths.append(COMPACT_FILE)
+    return paths
+
+
+def write_dataset(items, compact: bool = False, previous_hash: str = None,
+                  hash_items: bool = True, compression=None) -> tuple:
+    """
+    Grava todos os artefatos do dataset em uma única passada (OutputStage)
+    
+    `items` pode ser a lista em memória (já em ordem canônica) ou um iterador
+    do modo streaming. Só publica se houver ao menos um item e o hash do
+    conteúdo for diferente de `previous_hash` (o modo lista já comparou antes
+    e passa hash_items=False). Com `compression`, as variantes .gz/.br
+    começam assim que cada arquivo fecha. Retorna (quantidade, hash, gravou).
+    """
+    print(f"\n💾 Gravando {JSON_FILE.name}, {JS_FILE.name} e artefatos em {DATA_DIR.name}/...")
+    
+    stage = OutputStage(dataset_writers(compact), hash_items=hash_items, compression=compression)
+    total = stage.write(items)
+    content_hash = stage.content_hash
+    
+    if not total or (hash_items and content_hash == previous_hash):
+        stage.discard()
+        return total, content_hash, False
+    
+    stage.commit()
+    print(f"✅ Arquivos salvos (JSON {JSON_FILE.stat().st_size / 1024:.2f} KB, "
+          f"JS {JS_FILE.stat().st_size / 1024:.2f} KB)")
+    return total, content_hash, True
+
+
+def export_streaming(conn, itersize: int, compact: bool = False,
+                     decode_workers: int = 0) -> tuple:
+    """
+    Pipeline em memória constante: cursor server-side → iter_transform → write_dataset
+    
+    Com `decode_workers`, iter_transform roda em processos
+    (iter_parallel_transform), com a mesma ordem de saída.
+    
+    Retorna (quantidade, nova_marca_dagua, hash, gravou).
+    """
+    print(f"🌊 Modo streaming (itersize={itersize})")
+    print(f"📡 Buscando candidatos vinculados de '{SCHEMA_NAME}.{TABLE_NAME}'...")
+    print(f"   (Buscando registros dos últimos {WINDOW_DAYS} dias, filtrando '{MESSAGE_FILTER}')")
+    
+    state = {}
+    stats = new_transform_stats()
+    
+    # O banco já entrega em ordem (created_at DESC, id DESC): ordem canônica
+    rows = iter_applicants(conn, itersize=itersize, state=state, as_text=bool(decode_workers))
+    if decode_workers:
+        clean = iter_parallel_transform(decode_tasks(rows), decode_workers, stats)
+    else:
+        clean = iter_transform(rows, stats)
+    items = iter_dedup(clean, stats)
+    with CompressionPool() as compression:
+        total, content_hash, written = write_dataset(
+            items, compact, previous_hash=load_previous_hash((COMPACT_FILE,) if compact else ()),
+            compression=compression
+        )
+        if written:
+            if not compact:
+                remove_compact(COMPACT_FILE)
+            compression.finish()
+    
+    print(f"   ✅ {state['rows']} registros lidos do banco")
+    print_transform_stats(stats)
+    return total, state['watermark'], content_hash, written
+
+
+def company_external_id(applicant: dict):
+    """
+    externalId usado pelo RBAC (mesma regra de AuthService.canViewApplicant):
+    o da filial e, na falta dele, o da matriz
+    """
+    branch = applicant.get("branch_office") or {}
+    head = applicant.get("head_office") or {}
+    return branch.get("externalId") or head.get("externalId")
+
+
+class ShardWriter:
+    """
+    Grava um shard por externalId (array JSON minificado) e o manifest.json
+    
+    Os candidatos são escritos um a um, mantendo apenas um arquivo aberto por
+    filial/matriz (algumas dezenas), então funciona também no modo streaming.
+    Candidatos sem externalId não entram em shard nenhum (só superusuários os
+    veem, e estes baixam o applicants.json completo). Cada shard ganha também
+    o seu índice de busca (<shard>.search.json, posições dentro do shard), para
+    quem baixa só shards não depender do índice global.
+    """
+    
+    encoding = 'min'
+    
+    def __init__(self, shards_dir: Path):
+        self.shards_dir = shards_dir
+        self.tmp_dir = shards_dir.with_name(shards_dir.name + '.tmp')
+        self._files = {}
+        self._counts = {}
+        self._names = {}
+        self._postings = {}
+        
+        if self.tmp_dir.exists():
+            shutil.rmtree(self.tmp_dir)
+        self.tmp_dir.mkdir(parents=True)
+    
+    @staticmethod
+    def shard_name(external_id: str) -> str:
+        """
+        Nome do arquivo do shard: externalId sanitizado + hash curto do original
+        
+        A sanitização perde informação ("a.b" e "a_b", ou só maiúsculas em
+        sistemas de arquivos sem distinção); o hash mantém um arquivo por filial.
+        """
+        raw = str(external_id)
+        digest = hashlib.sha256(raw.encode('utf-8')).hexdigest()[:8]
+        return f"{re.sub(r'[^A-Za-z0-9_-]', '_', raw)}-{digest}.json"
+    
+    @staticmethod
+    def search_name(shard_name: str) -> str:
+        """Índice de busca do shard: <shard>.search.json"""
+        return shard_name[:-len('.json')] + '.search.json'
+    
+    def add(self, applicant: dict, encoded: bytes = None):
+        external_id = company_external_id(applicant)
+        if not external_id:
+            return
+        
+        f = self._files.get(external_id)
+        if f is None:
+            f = open(self.tmp_dir / self.shard_name(external_id), 'wb')
+            f.write(b'[')
+            self._files[external_id] = f
+            self._counts[external_id] = 0
+            self._postings[external_id] = {}
+            office = applicant.get("branch_office") or applicant.get("head_office") or {}
+            self._names[external_id] = office.get("tradingName") or office.get("name")
+        else:
+            f.write(b',')
+        
+        f.write(encoded if encoded is not None else encode_minified(applicant))
+        postings = self._postings[external_id]
+        for token in applicant_search_tokens(applicant):
+            postings.setdefault(token, []).append(self._counts[external_id])
+        self._counts[external_id] += 1
+    
+    def close(self) -> dict:
+        """Fecha os shards, publica o diretório e grava o manifest.json"""
+        for f in self._files.values():
+            f.write(b']')
+            f.flush()
+            os.fsync(f.fileno())
+            f.close()
+        
+        relative_dir = self.shards_dir.relative_to(PROJECT_DIR).as_posix()
+        manifest = {'shards': {}}
+        for external_id in sorted(self._counts):
+            name = self.shard_name(external_id)
+            search_name = self.search_name(name)
+            write_atomic(
+                self.tmp_dir / search_name,
+                search_index_json(self._postings[external_id], self._counts[external_id])
+            )
+            manifest['shards'][external_id] = {
+                'file': f"{relative_dir}/{name}",
+                'name': self._names[external_id],
+                'count': self._counts[external_id],
+                'bytes': (self.tmp_dir / name).stat().st_size,
+                'search': f"{relative_dir}/{search_name}"
+            }
+        
+        write_atomic(self.tmp_dir / 'manifest.json', json.dumps(manifest, ensure_ascii=False, indent=2))
+        
+        # Troca o diretório inteiro (remove shards de filiais que sumiram); o
+        # antigo só é apagado depois que o novo já está no lugar
+        old_dir = self.shards_dir.with_name(self.shards_dir.name + '.old')
+        if old_dir.exists():
+            shutil.rmtree(old_dir)
+        if self.shards_dir.exists():
+            self.shards_dir.rename(old_dir)
+        self.tmp_dir.rename(self.shards_dir)
+        fsync_dir(self.shards_dir.parent)
+        shutil.rmtree(old_dir, ignore_errors=True)
+        
+        total_kb = sum(entry['bytes'] for entry in manifest['shards'].values()) / 1024
+        print(f"🧩 {len(manifest['shards'])} shards por externalId gravados ({total_kb:.2f} KB)")
+        return manifest
+    
+    def discard(self):
+        """Descarta os shards parciais (exportação abortada)"""
+        for f in self._files.values():
+            f.close()
+        shutil.rmtree(self.tmp_dir, ignore_errors=True)
+
+
+class CompactWriter:
+    """
+    Grava o formato compacto: {"format", "applicants", "offices"}
+    
+    Cada office distinto aparece uma única vez na tabela `offices` e os
+    candidatos guardam apenas o índice em branch_office/head_office. Os
+    candidatos são escritos um a um e a tabela (pequena) vai no final, então
+    funciona também no modo streaming. Decodificado por decodeCompactPayload
+    (script.js).
+    """
+    
+    encoding = None
+    artifact = 'compact'
+    
+    def __init__(self, filepath: Path):
+        self.filepath = filepath
+        self._offices = []
+        self._index = {}
+        self._count = 0
+        
+        self._file = AtomicFile(filepath)
+        self._file.write(f'{{"format":"{COMPACT_FORMAT}","applicants":[')
+    
+    def _office_ref(self, office):
+        if not office:
+            return None
+        key = canonical_bytes(office)
+        position = self._index.get(key)
+        if position is None:
+            position = self._index[key] = len(self._offices)
+            self._offices.append(office)
+        return position
+    
+    def add(self, applicant: dict, encoded: bytes = None):
+        item = dict(applicant)
+        item["branch_office"] = self._office_ref(applicant.get("branch_office"))
+        item["head_office"] = self._office_ref(applicant.get("head_office"))
+        
+        if self._count:
+            self._file.write(',')
+        self._file.write(encode_minified(item))
+        self._count += 1
+    
+    def close(self):
+        offices = json.dumps(self._offices, ensure_ascii=False, separators=(',', ':'))
+        self._file.write(f'],"offices":{offices}}}')
+        self._file.commit()
+        
+        print(f"🗜️ Formato compacto gravado: {self._count} candidatos, "
+              f"{len(self._offices)} offices ({self.filepath.stat().st_size / 1024:.2f} KB)")
+    
+    def discard(self):
+        self._file.discard()
+
+
+def remove_compact(filepath: Path):
+    """Remove um formato compacto antigo e suas variantes comprimidas"""
+    removed = False
+    for path in [filepath] + [filepath.with_name(filepath.name + ext) for ext in ('.gz', '.br')]:
+        if path.exists():
+            path.unlink()
+            removed = True
+    if removed:
+        print(f"🧹 {filepath.name} removido (exportação sem --compact)")
+
+
+class MinifiedJsonWriter:
+    """Grava o dataset como array JSON minificado, um candidato por vez"""
+    
+    encoding = 'min'
+    artifact = 'json'
+    prefix = '['
+    suffix = ']'
+    
+    def __init__(self, filepath: Path):
+        self.filepath = filepath
+        self._count = 0
+        self._file = AtomicFile(filepath)
+        self._file.write(self.prefix)
+    
+    def add(self, applicant: dict, encoded: bytes = None):
+        if self._count:
+            self._file.write(b',')
+        self._file.write(encoded if encoded is not None else ENCODERS[self.encoding](applicant))
+        self._count += 1
+    
+    def close(self):
+        self._file.write(self.suffix)
+        self._file.commit()
+    
+    def discard(self):
+        self._file.discard()
+
+
+class JsWrapperWriter(MinifiedJsonWriter):
+    """applicants-data.js: o mesmo array minificado atrás do cabeçalho do JS"""
+    
+    artifact = None
+    prefix = _js_header() + '['
+    suffix = '];\n'
+
+
+class PrettyJsonWriter(MinifiedJsonWriter):
+    """applicants.json: mesmo layout de json.dump(lista, indent=2)"""
+    
+    encoding = 'pretty'
+    artifact = None
+    
+    def close(self):
+        self._file.write('\n]' if self._count else ']')
+        self._file.commit()
+
+
+def compressed_encodings() -> list:
+    """Encodings gerados nesta máquina (br só com o pacote brotli instalado)"""
+    return ['gzip', 'br'] if brotli else ['gzip']
+
+
+def compress_file(source: Path, encoding: str) -> Path:
+    """
+    Comprime `source` em compressão máxima, em blocos (memória constante)
+    
+    Saída determinística (gzip com mtime=0 e sem nome), para não gerar
+    diferenças quando os dados não mudaram.
+    """
+    if encoding == 'gzip':
+        target = AtomicFile(source.with_name(source.name + '.gz'))
+    elif encoding == 'br':
+        target = AtomicFile(source.with_name(source.name + '.br'))
+    else:
+        raise ValueError(f"Encoding não suportado: {encoding}")
+    
+    try:
+        with open(source, 'rb') as src:
+            if encoding == 'gzip':
+                with gzip.GzipFile(filename='', mode='wb', fileobj=target, compresslevel=9, mtime=0) as dst:
+                    shutil.copyfileobj(src, dst, COMPRESSION_CHUNK)
+            else:
+                compressor = brotli.Compressor(quality=11)
+                for chunk in iter(lambda: src.read(COMPRESSION_CHUNK), b''):
+                    target.write(compressor.process(chunk))
+                target.write(compressor.finish())
+    except BaseException:
+        target.discard()
+        raise
+    
+    target.commit()
+    return target.filepath
+
+
+def file_sha256(path: Path) -> str:
+    """SHA-256 do conteúdo de um arquivo (lido em blocos)"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(COMPRESSION_CHUNK), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def start_compression(sources: list, executor) -> list:
+    """Dispara a compressão de cada (arquivo, formato) no pool; retorna os jobs"""
+    jobs = []
+    for source, data_format in sources:
+        for encoding in compressed_encodings():
+            jobs.append((source, data_format, encoding, executor.submit(compress_file, source, encoding)))
+    return jobs
+
+
+def write_artifacts_manifest(sources: list, jobs: list) -> dict:
+    """
+    Aguarda a compressão e grava o manifest (arquivo, formato, encoding, bytes, sha256)
+    
+    Variantes do dataset vão em `artifacts` (o script.js escolhe a menor);
+    as do índice de busca (formato SEARCH_ARTIFACT) ficam em `search_index`.
+    """
+    entries = [(source, data_format, 'identity') for source, data_format in sources]
+    entries += [(job.result(), data_format, encoding) for _, data_format, encoding, job in jobs]
+    
+    manifest = {'artifacts': [], 'search_index': []}
+    for path, data_format, encoding in entries:
+        key = 'search_index' if data_format == SEARCH_ARTIFACT else 'artifacts'
+        manifest[key].append({
+            'file': path.relative_to(PROJECT_DIR).as_posix(),
+            'format': data_format,
+            'encoding': encoding,
+            'bytes': path.stat().st_size,
+            'sha256': file_sha256(path)
+        })
+    
+    write_atomic(ARTIFACTS_MANIFEST, json.dumps(manifest, ensure_ascii=False, indent=2))
+    
+    sizes = ', '.join(
+        f"{Path(entry['file']).name} {entry['bytes'] / 1024:.2f} KB"
+        for entry in manifest['artifacts'] + manifest['search_index']
+    )
+    print(f"📦 Variantes publicadas: {sizes}")
+    if not brotli:
+        print("   (pacote brotli não instalado: variantes .br não geradas)")
+    return manifest
+
+
+class CompressionPool:
+    """
+    Pool de compressão compartilhado com o OutputStage
+    
+    O stage chama submit() assim que fecha cada arquivo de artifact_sources,
+    então as variantes .gz/.br são geradas enquanto os outros writers ainda
+    fecham (shards, índices, delta). finish() só espera os jobs no passo do
+    manifest. Sem finish() (nada publicado), o pool apenas termina os jobs.
+    
+        with CompressionPool() as compression:
+            write_dataset(items, compression=compression)
+            manifest = compression.finish()
+    """
+    
+    def __init__(self, workers: int = COMPRESSION_WORKERS):
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.sources = []
+        self.jobs = []
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self.executor.shutdown(wait=True, cancel_futures=exc[0] is not None)
+    
+    def submit(self, source: Path, data_format: str):
+        self.sources.append((source, data_format))
+        self.jobs += start_compression([(source, data_format)], self.executor)
+    
+    def finish(self) -> dict:
+        """Aguarda a compressão e grava o manifest (mesma ordem de artifact_sources)"""
+        rank = {data_format: position for position, (_, data_format) in enumerate(artifact_sources(True))}
+        self.sources.sort(key=lambda source: rank[source[1]])
+        self.jobs.sort(key=lambda job: rank[job[1]])
+        return write_artifacts_manifest(self.sources, self.jobs)
+
+
+def artifact_sources(compact: bool) -> list:
+    """(arquivo, formato) que ganham variantes comprimidas"""
+    sources = [(MIN_JSON_FILE, 'json')]
+    if compact:
+        sources.append((COMPACT_FILE, 'compact'))
+    sources.append((SEARCH_INDEX_FILE, SEARCH_ARTIFACT))
+    return sources
+
+
+def versioned_name(path: Path, sha256: str) -> str:
+    """applicants.min.json.br → applicants.min.<hash>.json.br (hash do próprio arquivo)"""
+    base, sep, rest = path.name.partition('.json')
+    return f"{base}.{sha256[:VERSION_HASH_CHARS]}{sep}{rest}"
+
+
+def publish_versioned(path: Path, sha256: str = None) -> str:
+    """
+    Cópia de `path` em data/v/ com o hash do conteúdo no nome (caminho relativo)
+    
+    O nome muda sempre que o conteúdo muda, então o navegador pode guardar o
+    arquivo para sempre. Conteúdo repetido reaproveita a cópia existente (e o
+    git guarda o mesmo blob do original, sem crescer o repositório).
+    """
+    target = VERSIONED_DIR / versioned_name(path, sha256 or file_sha256(path))
+    if not target.exists():
+        f = AtomicFile(target)
+        try:
+            with open(path, 'rb') as src:
+                shutil.copyfileobj(src, f, COMPRESSION_CHUNK)
+        except BaseException:
+            f.discard()
+            raise
+        f.commit()
+    return target.relative_to(PROJECT_DIR).as_posix()
+
+
+def load_version_manifest() -> dict:
+    """data/version.json publicado (None se ausente ou inválido)"""
+    try:
+        with open(VERSION_FILE, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    return manifest if manifest.get('format') == VERSION_FORMAT else None
+
+
+def version_files(manifest: dict) -> set:
+    """Arquivos de data/v/ referenciados por um manifest de versão"""
+    if not manifest:
+        return set()
+    files = {
+        artifact['file']
+        for key in ('artifacts', 'search_index') for artifact in manifest.get(key) or []
+    }
+    if manifest.get('vacancy_index'):
+        files.add(manifest['vacancy_index'])
+    return files
+
+
+def versioned_entries(entries: list) -> list:
+    """Entradas de artifacts.json → mesmas variantes com URL com hash (data/v/)"""
+    return [
+        {
+            'file': publish_versioned(PROJECT_DIR / entry['file'], entry['sha256']),
+            'format': entry['format'],
+            'encoding': entry['encoding'],
+            'bytes': entry['bytes']
+        }
+        for entry in entries
+    ]
+
+
+def publish_version(content_hash: str, count: int) -> dict:
+    """
+    Grava data/version.json: versão (hash do dataset), total, data e as URLs
+    com hash dos artefatos (variantes de artifacts.json e índices)
+    
+    O site consulta só este arquivo a cada visita; se a versão for a da cópia
+    local, não baixa mais nada. Cópias em data/v/ que não pertencem à versão
+    nova nem à anterior (clientes que leram o manifest antigo durante o
+    deploy) são removidas.
+    """
+    previous = load_version_manifest()
+    with open(ARTIFACTS_MANIFEST, 'r', encoding='utf-8') as f:
+        artifacts = json.load(f)
+    
+    manifest = {
+        'format': VERSION_FORMAT,
+        'version': content_hash,
+        'count': count,
+        'generated_at': datetime.now(timezone.utc).isoformat(),
+        'artifacts': versioned_entries(artifacts['artifacts']),
+        'vacancy_index': publish_versioned(VACANCY_INDEX_FILE),
+        'search_index': versioned_entries(artifacts['search_index'])
+    }
+    write_atomic(VERSION_FILE, json.dumps(manifest, ensure_ascii=False, indent=2))
+    
+    keep = version_files(manifest) | version_files(previous)
+    removed = 0
+    for path in VERSIONED_DIR.glob('*'):
+        if path.relative_to(PROJECT_DIR).as_posix() not in keep:
+            path.unlink()
+            removed += 1
+    
+    print(f"🏷️ Versão {content_hash[:VERSION_HASH_CHARS]} publicada em {VERSION_FILE.name} "
+          f"({VERSION_FILE.stat().st_size} bytes, {removed} cópia(s) antiga(s) removida(s))")
+    return manifest
+
+
+def collation_key(text: str):
+    """
+    Chave de ordenação pt-BR
+    
+    Com PyICU usa o collator pt_BR; sem ele compara primeiro sem acentos e sem
+    caixa ("Ótica" junto de "otica"), depois com acentos e por fim o texto
+    original, aproximando o localeCompare do navegador.
+    """
+    if icu:
+        return _ICU_COLLATOR.getSortKey(text)
+    
+    decomposed = unicodedata.normalize('NFKD', text)
+    base = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return (base.casefold(), decomposed.casefold(), text)
+
+
+_ICU_COLLATOR = icu.Collator.createInstance(icu.Locale('pt_BR')) if icu else None
+
+
+def created_at_ms(applicant: dict):
+    """created_at do candidato como epoch em milissegundos (None se ausente)"""
+    created_at = applicant.get('created_at')
+    if not created_at:
+        return None
+    return int(datetime.fromisoformat(created_at).timestamp() * 1000)
+
+
+class VacancyIndexWriter:
+    """
+    Grava o índice de vagas usado pelo script.js para renderizar sem agrupar/ordenar
+    
+    Formato: {"format", "count", "vacancies": [{"title", "positions"}],
+    "created_at_ms"}. As posições apontam para o array publicado em
+    applicants.json (mesma ordem do JSON minificado, do compacto e do JS) e
+    dentro de cada vaga seguem a ordem canônica (mais recentes primeiro).
+    Guarda só inteiros por candidato, então também serve ao modo streaming.
+    """
+    
+    encoding = None
+    
+    def __init__(self, filepath: Path):
+        self.filepath = filepath
+        self._groups = {}
+        self._created_at = []
+    
+    def add(self, applicant: dict, encoded: bytes = None):
+        title = applicant.get("vacancy_title") or UNKNOWN_VACANCY
+        self._groups.setdefault(title, []).append(len(self._created_at))
+        self._created_at.append(created_at_ms(applicant))
+    
+    def close(self):
+        index = {
+            'format': VACANCY_INDEX_FORMAT,
+            'count': len(self._created_at),
+            'vacancies': [
+                {'title': title, 'positions': self._groups[title]}
+                for title in sorted(self._groups, key=collation_key)
+            ],
+            'created_at_ms': self._created_at
+        }
+        
+        write_atomic(self.filepath, json.dumps(index, ensure_ascii=False, separators=(',', ':')))
+        
+        print(f"🗂️ Índice de vagas gravado: {len(self._groups)} vagas "
+              f"({self.filepath.stat().st_size / 1024:.2f} KB)")
+    
+    def discard(self):
+        pass
+
+
+def fold_text(text) -> str:
+    """
+    Minúsculas e sem acentos ("Conceição" → "conceicao")
+    
+    Mesma regra de foldText no script.js: NFD, remove marcas (categoria M).
+    """
+    decomposed = unicodedata.normalize('NFD', str(text))
+    return ''.join(ch for ch in decomposed if not unicodedata.category(ch).startswith('M')).lower()
+
+
+_WORD_RE = re.compile(r'[^\W_]+')
+
+
+def search_tokens(word: str) -> set:
+    """
+    Trigramas de uma palavra
+    
+    Palavras de 1-2 letras não geram tokens: casam como substring em quase
+    todo candidato, então o script.js as resolve no filtro linear.
+    """
+    return {word[i:i + 3] for i in range(len(word) - 2)}
+
+
+def searchable_fields(applicant: dict) -> list:
+    """Campos pesquisáveis mantidos por transform_data"""
+    user = ((applicant.get("body") or {}).get("talent") or {}).get("user") or {}
+    return [
+        applicant.get("applicant"),
+        applicant.get("vacancy_title"),
+        user.get("email"),
+        user.get("city")
+    ]
+
+
+def applicant_search_tokens(applicant: dict) -> set:
+    """Tokens de busca de um candidato (todos os campos pesquisáveis)"""
+    tokens = set()
+    for value in searchable_fields(applicant):
+        if value:
+            for word in _WORD_RE.findall(fold_text(value)):
+                tokens.update(search_tokens(word))
+    return tokens
+
+
+def search_index_json(postings: dict, count: int) -> str:
+    """Serializa o índice de busca (global ou de um shard)"""
+    return json.dumps({
+        'format': SEARCH_INDEX_FORMAT,
+        'count': count,
+        'tokens': {token: postings[token] for token in sorted(postings)}
+    }, ensure_ascii=False, separators=(',', ':'))
+
+
+class SearchIndexWriter:
+    """
+    Grava o índice invertido da busca: token → posições dos candidatos
+    
+    Tokens vêm de fold_text (sem acento/caixa): todos os trigramas de cada
+    palavra. As posições apontam para o array publicado em applicants.json
+    (cada shard tem o seu índice, gravado pelo ShardWriter). O script.js só baixa o arquivo na primeira busca e confere
+    os candidatos encontrados, então o custo depende do número de resultados e
+    não do tamanho do dataset.
+    """
+    
+    encoding = None
+    artifact = SEARCH_ARTIFACT
+    
+    def __init__(self, filepath: Path):
+        self.filepath = filepath
+        self._postings = {}
+        self._count = 0
+    
+    def add(self, applicant: dict, encoded: bytes = None):
+        position = self._count
+        self._count += 1
+        for token in applicant_search_tokens(applicant):
+            self._postings.setdefault(token, []).append(position)
+    
+    def close(self):
+        write_atomic(self.filepath, search_index_json(self._postings, self._count))
+        
+        print(f"🔎 Índice de busca gravado: {len(self._postings)} tokens "
+              f"({self.filepath.stat().st_size / 1024:.2f} KB)")
+    
+    def discard(self):
+        pass
+
+
+def record_fingerprint(applicant: dict, canonical: bytes = None) -> tuple:
+    """(chave talento+vaga, digest do conteúdo) usados para comparar duas versões"""
+    if canonical is None:
+        canonical = canonical_bytes(applicant)
+    return snapshot_key(applicant), hashlib.blake2b(canonical, digest_size=8).digest()
+
+
+def load_published_fingerprints() -> tuple:
+    """
+    (versão, fingerprints em ordem) do applicants.min.json publicado, ou (None, None)
+    
+    A versão é recalculada do próprio arquivo (mesmo valor de dataset_hash),
+    então o delta parte exatamente do que os clientes baixaram. Só roda quando
+    há algo novo para publicar e não exige nenhum estado extra.
+    """
+    try:
+        with open(MIN_JSON_FILE, 'r', encoding='utf-8') as f:
+            published = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None, None
+    
+    digest = hashlib.sha256()
+    fingerprints = []
+    for applicant in published:
+        canonical = canonical_bytes(applicant)
+        digest.update(canonical)
+        digest.update(b'\n')
+        fingerprints.append(record_fingerprint(applicant, canonical))
+    return digest.hexdigest(), fingerprints
+
+
+def load_deltas_index() -> dict:
+    """Índice da cadeia de deltas publicado (None se ausente ou inválido)"""
+    try:
+        with open(DELTAS_INDEX, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    return index if index.get('format') == DELTAS_FORMAT else None
+
+
+def delta_file_name(from_version: str, to_version: str) -> str:
+    """Nome imutável do delta (o cliente pode mantê-lo em cache para sempre)"""
+    return f"{from_version[:16]}-{to_version[:16]}.json"
+
+
+class DeltaWriter:
+    """
+    Grava o delta da versão publicada para a nova e o índice da cadeia (data/deltas/)
+    
+    Os registros são comparados pela chave talento+vaga e pelo digest do
+    conteúdo. O delta é posicional, para o cliente reproduzir exatamente a
+    ordem publicada (os índices de vagas e de busca apontam para posições):
+    `delete` lista posições da versão anterior e `insert` pares [posição na
+    nova versão, candidato], em ordem crescente. Aplicar = filtrar `delete` e
+    inserir na ordem. Registros que mudaram de posição relativa viram
+    delete + insert, então o delta vale mesmo com empates de created_at.
+    
+    O índice mantém as últimas DELTA_CHAIN versões contíguas; sem versão
+    anterior (ou se a cadeia não bate) ela recomeça vazia e quem tem uma
+    versão antiga baixa o dataset completo.
+    """
+    
+    encoding = 'canonical'
+    
+    def __init__(self, previous_version: str, previous: list):
+        self.previous_version = previous_version
+        self._previous_count = len(previous) if previous is not None else 0
+        self._positions = None
+        if previous is not None:
+            self._positions = {}
+            for position, (key, digest) in enumerate(previous):
+                self._positions.setdefault(key, (position, digest))
+        self._kept = []
+        self._insert = []
+        self._added = 0
+        self._last_kept = -1
+        self._digest = hashlib.sha256()
+        self._count = 0
+    
+    def add(self, applicant: dict, encoded: bytes = None):
+        canonical = encoded if encoded is not None else canonical_bytes(applicant)
+        self._digest.update(canonical)
+        self._digest.update(b'\n')
+        position = self._count
+        self._count += 1
         
-        print()
-        print("=" * 60)
-        print("✨ EXPORTAÇÃO CONCLUÍDA COM SUCESSO!")
-        print("=" * 60)
-        print()
-        print(f"📊 Total: {len(applicants)} candidatos")
-        print(f"🌐 URL: https://forbizgetwork.github.io/atrio/")
+        if self._positions is None:
+            return
+        
+        key, digest = record_fingerprint(applicant, canonical)
+        old = self._positions.get(key)
+        if old is not None and old[1] == digest and old[0] > self._last_kept:
+            self._kept.append(old[0])
+            self._last_kept = old[0]
+            return
+        
+        if old is None:
+            self._added += 1
+        self._insert.append((position, encode_minified(applicant)))
+        if len(self._insert) > max(1, self._previous_count * DELTA_MAX_RATIO):
+            # Mudou quase tudo: o delta não compensa, descarta e recomeça a cadeia
+            self._positions = None
+            self._insert = []
+    
+    def close(self):
+        version = self._digest.hexdigest()
+        index = load_deltas_index()
+        chain = []
+        if index and index.get('version') == self.previous_version:
+            chain = index['chain']
+        
+        if self._positions is not None:
+            chain.append(self._write_delta(version))
+        else:
+            chain = []
+        chain = chain[-DELTA_CHAIN:]
+        
+        # Remove deltas que saíram da cadeia
+        keep = {Path(entry['file']).name for entry in chain}
+        for path in DELTAS_DIR.glob('*.json'):
+            if path != DELTAS_INDEX and path.name not in keep:
+                path.unlink()
+        
+        write_atomic(DELTAS_INDEX, json.dumps({
+            'format': DELTAS_FORMAT,
+            'version': version,
+            'count': self._count,
+            'chain': chain
+        }, ensure_ascii=False, indent=2))
+        
+        if chain:
+            entry = chain[-1]
+            print(f"🧬 Delta publicado: +{entry['added']} ~{entry['changed']} -{entry['removed']} "
+                  f"({entry['bytes'] / 1024:.2f} KB, cadeia com {len(chain)})")
+        else:
+            print("🧬 Cadeia de deltas reiniciada (clientes baixam o dataset completo)")
+    
+    def _write_delta(self, version: str) -> dict:
+        kept = set(self._kept)
+        delete = [position for position in range(self._previous_count) if position not in kept]
+        changed = len(self._insert) - self._added
+        
+        header = {
+            'format': DELTA_FORMAT,
+            'from': self.previous_version,
+            'to': version,
+            'count': self._count,
+            'delete': delete
+        }
+        path = DELTAS_DIR / delta_file_name(self.previous_version, version)
+        f = AtomicFile(path)
+        f.write(json.dumps(header, ensure_ascii=False, separators=(',', ':'))[:-1] + ',"insert":[')
+        for number, (position, encoded) in enumerate(self._insert):
+            f.write(f"{',' if number else ''}[{position},")
+            f.write(encoded)
+            f.write(']')
+        f.write(']}')
+        f.commit()
+        
+        return {
+            'from': self.previous_version,
+            'to': version,
+            'file': path.relative_to(PROJECT_DIR).as_posix(),
+            'bytes': path.stat().st_size,
+            'added': self._added,
+            'changed': changed,
+            'removed': max(0, len(delete) - changed)
+        }
+    
+    def discard(self):
+        pass
+
+
+def published_paths(base: Path = None) -> list:
+    """
+    Arquivos e diretórios publicados no GitHub (commit na main ou branch de dados)
+    
+    `base`: namespace de um tenant (mesma estrutura, dentro de outro diretório).
+    """
+    paths = [JSON_FILE, JS_FILE, WATERMARK_FILE, HASH_FILE, DATA_DIR]
+    if base is not None:
+        paths = [base / path.relative_to(PROJECT_DIR) for path in paths]
+    return paths
+
+
+def published_files(paths: list = None) -> list:
+    """Arquivos existentes em `paths` (diretórios expandidos, sem temporários)"""
+    files = []
+    for path in paths if paths is not None else published_paths():
+        if path.is_dir():
+            files += sorted(
+                child for child in path.rglob('*')
+                if child.is_file() and not any(
+                    part.endswith(('.tmp', '.old')) for part in child.relative_to(path).parts
+                )
+            )
+        elif path.exists():
+            files.append(path)
+    return files
+
+
+def deploy(args, paths: list = None, keep: list = None):
+    """
+    Passo 7: commit + push na main (padrão) ou branch de dados (--data-branch)
+    
+    `paths` (padrão: published_paths()) e `keep` (prefixos mantidos como estão
+    no branch de dados) são usados pelo multi-tenant.
+    """
+    with metrics.stage('git_push'):
+        if args.data_branch:
+            publish_data_branch(args.data_branch, args.remote, args.data_depth, paths, keep)
+        else:
+            git_commit_and_push(paths)
+
+
+def publish_data_branch(branch: str, remote: str, depth: int, paths: list = None, keep: list = None):
+    """
+    Publica os artefatos no branch de dados via git plumbing (git_publish)
+    
+    Não toca o working tree nem a main; o branch guarda no máximo `depth`
+    commits, então o repositório não cresce a cada exportação.
+    """
+    print(f"\n📤 Publicando no branch '{branch}' (histórico de {depth} commit(s))...")
+    paths = paths if paths is not None else published_paths()
+    files = published_files(paths)
+    directories = [path.relative_to(PROJECT_DIR).as_posix() for path in paths if path.is_dir()]
+    
+    try:
+        commit = git_publish.publish(
+            PROJECT_DIR, files, branch, remote=remote, depth=depth,
+            directories=directories, keep=keep
+        )
+    except git_publish.GitError as e:
+        # Sem o hash a próxima execução grava e publica de novo, mesmo sem dados novos
+        HASH_FILE.unlink(missing_ok=True)
+        print(f"⚠️ Erro no Git: {e}")
+        print("   Verifique se o Git está configurado corretamente")
+        return
+    
+    if commit is None:
+        print("⚠️ Nenhuma mudança detectada (dados já estão atualizados)")
+        return
+    print(f"✅ {len(files)} arquivos publicados em {branch} ({commit[:12]})")
+    print("🌐 Aguarde ~2 minutos para GitHub Pages atualizar")
+
+
+def git_commit_and_push(paths: list = None):
+    """Faz commit e push para GitHub"""
+    print("\n📤 Fazendo deploy no GitHub...")
+    
+    try:
+        # Add
+        paths = [
+            path.relative_to(PROJECT_DIR).as_posix()
+            for path in (paths if paths is not None else published_paths())
+        ]
+        subprocess.run(['git', 'add', *paths], 
+                      cwd=PROJECT_DIR, check=True, capture_output=True)
+        
+        # Commit
+        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M')
+        commit_msg = f"chore: Atualizar dados dos candidatos ({timestamp})"
+        result = subprocess.run(['git', 'commit', '-m', commit_msg], 
+                              cwd=PROJECT_DIR, capture_output=True, text=True)
+        
+        if result.returncode != 0:
+            if "nothing to commit" in result.stdout:
+                print("⚠️ Nenhuma mudança detectada (dados já estão atualizados)")
+                return
+            else:
+                print(f"⚠️ Erro no commit: {result.stderr}")
+                return
+        
+        # Push
+        subprocess.run(['git', 'push', 'origin', 'main'], 
+                      cwd=PROJECT_DIR, check=True, capture_output=True)
+        
+        print("✅ Deploy concluído!")
+        print("🌐 Aguarde ~2 minutos para GitHub Pages atualizar")
+        
+    except subprocess.CalledProcessError as e:
+        print(f"⚠️ Erro no Git: {e}")
+        print("   Verifique se o Git está configurado corretamente")
+
+
+def print_unchanged(content_hash: str):
+    """Aviso de execução sem mudanças (nenhum arquivo gravado, sem deploy)"""
+    print(f"\n✅ Conteúdo idêntico ao publicado (sha256 {content_hash[:12]}). "
+          f"Nada a gravar nem publicar.")
+
+
+def print_summary(total: int):
+    """Resumo final da exportação"""
+    print()
+    print("=" * 60)
+    print("✨ EXPORTAÇÃO CONCLUÍDA COM SUCESSO!")
+    print("=" * 60)
+    print()
+    print(f"📊 Total: {total} candidatos")
+    print(f"🌐 URL: https://forbizgetwork.github.io/atrio/")
+
+
+def parse_args(argv=None):
+    """Lê os argumentos de linha de comando"""
+    parser = argparse.ArgumentParser(
+        description="Exporta candidatos vinculados do Supabase para o GitHub Pages"
+    )
+    parser.add_argument(
+        '--full', action='store_true',
+        help="Ignora a marca d'água e reconstrói a janela inteira"
+    )
+    parser.add_argument(
+        '--stream', action='store_true',
+        help="Reconstrução completa em memória constante (cursor server-side → arquivos)"
+    )
+    parser.add_argument(
+        '--compact', action='store_true',
+        help=f"Também grava {COMPACT_FILE.name} (offices em tabela, referenciados por índice)"
+    )
+    parser.add_argument(
+        '--itersize', type=int, default=ITERSIZE,
+        help=f"Registros por lote do cursor server-side (padrão: {ITERSIZE})"
+    )
+    parser.add_argument(
+        '--days', type=int, default=None,
+        help=f"Tamanho da janela em dias (padrão: a da última publicação, ou {WINDOW_DAYS})"
+    )
+    parser.add_argument(
+        '--watch', action='store_true',
+        help="Daemon: exporta (incremental) a cada rajada de NOTIFY do audit_log"
+    )
+    parser.add_argument(
+        '--no-push', dest='push', action='store_false',
+        help="Grava os arquivos sem commit/push (testes locais)"
+    )
+    parser.add_argument(
+        '--data-branch', default=None, metavar='BRANCH',
+        help="Publica no branch de dados via git plumbing (sem commit na main, histórico limitado)"
+    )
+    parser.add_argument(
+        '--data-depth', type=int, default=git_publish.DEFAULT_DEPTH,
+        help=f"Commits mantidos no branch de dados (padrão: {git_publish.DEFAULT_DEPTH})"
+    )
+    parser.add_argument(
+        '--remote', default='origin',
+        help="Remoto do --data-branch (nome ou caminho de um repositório bare)"
+    )
+    parser.add_argument(
+        '--tenants', type=Path, default=None, metavar='CONFIG',
+        help="Exporta vários tenants (JSON, ver tenants.example.json) em subprocessos paralelos"
+    )
+    parser.add_argument(
+        '--tenant-workers', type=int, default=None,
+        help=f"Tenants ao mesmo tempo (padrão: 'workers' da configuração ou {TENANT_WORKERS})"
+    )
+    parser.add_argument(
+        '--tenant-timeout', type=float, default=TENANT_TIMEOUT,
+        help=f"Limite por tenant em segundos (padrão: {TENANT_TIMEOUT}; 0 = sem limite)"
+    )
+    # Interno: subprocesso de um tenant (ver run_tenants)
+    parser.add_argument('--tenant', default=None, help=argparse.SUPPRESS)
+    parser.add_argument(
+        '--snapshot', action='store_true',
+        help="Mantém a tabela applicant_snapshot (upsert incremental) e publica a partir dela"
+    )
+    parser.add_argument(
+        '--since', default=None,
+        help="Backfill a partir desta data/hora ISO (ex.: 2024-01-01), em fatias paralelas"
+    )
+    parser.add_argument(
+        '--until', default=None,
+        help="Fim do backfill (exclusivo; padrão: agora, ou o do checkpoint em andamento)"
+    )
+    parser.add_argument(
+        '--slice-hours', type=float, default=BACKFILL_SLICE_HOURS,
+        help=f"Tamanho inicial das fatias do backfill em horas (padrão: {BACKFILL_SLICE_HOURS})"
+    )
+    parser.add_argument(
+        '--decode-workers', type=int, nargs='?', const=os.cpu_count() or 1, default=0, metavar='N',
+        help="Busca details como texto e decodifica/transforma em N processos "
+             "(sem N: um por núcleo; não se aplica ao --snapshot)"
+    )
+    parser.add_argument(
+        '--workers', type=int, default=database.POOL_SIZE,
+        help=f"Conexões em paralelo no backfill (até DB_POOL_SIZE={database.POOL_SIZE})"
+    )
+    parser.add_argument(
+        '--report', type=Path, default=RUN_REPORT_FILE,
+        help="Relatório JSON da execução (tempo, linhas, bytes e RSS por etapa)"
+    )
+    parser.add_argument(
+        '--metrics-file', type=Path, default=PROM_FILE,
+        help="Arquivo textfile do Prometheus (node_exporter --collector.textfile)"
+    )
+    parser.add_argument(
+        '--mirror', type=Path, nargs='?', const=MIRROR_FILE, default=None, metavar='FILE',
+        help=f"Grava as linhas lidas num SQLite local para o scripts/lookup.py "
+             f"(padrão: {MIRROR_FILE.relative_to(PROJECT_DIR)})"
+    )
+    parser.add_argument(
+        '--profile', action='store_true',
+        help=f"Roda sob cProfile e grava {PROFILE_FILE.name} (só a thread principal)"
+    )
+    args = parser.parse_args(argv)
+    if args.watch and args.stream:
+        parser.error("--watch usa o caminho incremental; não combina com --stream")
+    if args.until and not args.since:
+        parser.error("--until exige --since")
+    if args.since and (args.watch or args.stream):
+        parser.error("--since (backfill) não combina com --watch/--stream")
+    if args.snapshot and (args.stream or args.since):
+        parser.error("--snapshot não combina com --stream/--since")
+    if args.data_branch and not args.push:
+        parser.error("--data-branch publica; não combina com --no-push")
+    if args.data_depth < 1:
+        parser.error("--data-depth deve ser pelo menos 1")
+    if args.decode_workers < 0:
+        parser.error("--decode-workers não pode ser negativo")
+    if args.decode_workers and args.snapshot:
+        parser.error("--decode-workers não se aplica ao --snapshot")
+    if args.tenants and args.watch:
+        parser.error("--tenants não combina com --watch")
+    if args.tenant and not args.tenants:
+        parser.error("--tenant exige --tenants")
+    return args
+
+
+def run_export(args):
+    """Uma exportação completa: busca → transforma → grava → publica"""
+    if args.snapshot:
+        run_snapshot(args)
+        return
+    
+    # 0. Decidir modo (incremental ou reconstrução completa)
+    watermark = None if args.full or args.stream else load_watermark(JSON_FILE)
+    if watermark:
+        print("♻️ Modo incremental")
+    else:
+        print("🧱 Modo reconstrução completa")
+    print()
+    if not args.stream:
+        metrics.set_result(mode='incremental' if watermark else 'full')
+    
+    # 1. Conectar no PostgreSQL (pool compartilhado, com retry)
+    print("🔌 Conectando no PostgreSQL (Supabase)...")
+    
+    if args.stream:
+        # 2-5. Buscar, transformar e gravar sem materializar o dataset
+        # (sem retry da operação: o streaming já gravou parte dos arquivos)
+        with metrics.stage('stream') as st, database.connection() as conn:
+            total, new_watermark, content_hash, written = export_streaming(
+                conn, args.itersize, compact=args.compact, decode_workers=args.decode_workers
+            )
+            st['rows_out'] = total
+            st['bytes'] = metrics.file_bytes(*dataset_paths(args.compact)) if written else 0
+        
+        if not total:
+            print("\n⚠️ Nenhum candidato válido. Abortando.")
+            metrics.set_result(outcome='empty', rows=0)
+            return
+        
+        if not written:
+            # Linhas novas sem efeito (ex.: duplicadas) não são relidas na próxima
+            save_watermark(new_watermark)
+            print_unchanged(content_hash)
+            metrics.set_result(outcome='unchanged', rows=total)
+            return
+        
+        save_watermark(new_watermark)
+        save_hash(content_hash, total)
+        publish_version(content_hash, total)
+        if args.push:
+            deploy(args)
+        metrics.set_result(outcome='published', rows=total)
+        print_summary(total)
+        return
+    
+    # 2. Buscar dados (consulta inteira repetida em falha transitória)
+    # Com --decode-workers a transformação já acontece aqui, nos processos
+    stats = new_transform_stats() if args.decode_workers else None
+    with metrics.stage('fetch') as st:
+        raw_data, new_watermark = database.with_retry(
+            fetch_applicants, watermark, args.decode_workers, stats
+        )
+        st['rows_out'] = len(raw_data)
+    
+    if watermark is None:
+        if not raw_data:
+            print("\n⚠️ Nenhum dado encontrado. Abortando.")
+            metrics.set_result(outcome='empty', rows=0)
+            return
+        
+        # 3. Transformar dados
+        with metrics.stage('transform', rows_in=len(raw_data)) as st:
+            applicants = transform_data(raw_data, stats)
+            st['rows_out'] = len(applicants)
+        
+        if not applicants:
+            print("\n⚠️ Nenhum candidato válido. Abortando.")
+            metrics.set_result(outcome='empty', rows=0)
+            return
+    else:
+        # 3. Transformar apenas os novos e mesclar com o dataset publicado
+        with metrics.stage('transform', rows_in=len(raw_data)) as st:
+            new_applicants = transform_data(raw_data, stats) if raw_data else []
+            st['rows_out'] = len(new_applicants)
+        with metrics.stage('merge', rows_in=len(new_applicants)) as st:
+            applicants, expired = merge_incremental(new_applicants, JSON_FILE)
+            st['rows_out'] = len(applicants)
+        
+        if not new_applicants and not expired:
+            if new_watermark:
+                save_watermark(new_watermark)
+            print("\n✅ Nenhuma mudança desde a última execução. Nada a publicar.")
+            metrics.set_result(outcome='unchanged', rows=len(applicants))
+            return
+    
+    publish_dataset(applicants, new_watermark or watermark, args)
+
+
+def run_backfill(args):
+    """Backfill --since/--until: fatias paralelas → transforma → publica"""
+    global WINDOW_DAYS
+    
+    since = parse_timestamp(args.since)
+    until = parse_timestamp(args.until) if args.until else (
+        checkpoint_until(since) or datetime.now(timezone.utc)
+    )
+    if since >= until:
+        raise ValueError(f"--since ({since.isoformat()}) deve ser anterior a --until ({until.isoformat()})")
+    
+    # Sem --until o backfill chega até agora: vira a janela das próximas execuções
+    # (gravada na marca d'água, ver stored_window_days; --days a substitui).
+    # Com --until, a próxima execução reconstrói com a janela padrão.
+    if not args.until:
+        WINDOW_DAYS = -(-(until - since) // timedelta(days=1))
+    
+    print(f"🧩 Modo backfill ({WINDOW_DAYS} dias)" if not args.until else "🧩 Modo backfill (intervalo fechado)")
+    print()
+    print("🔌 Conectando no PostgreSQL (Supabase)...")
+    
+    workers = max(1, min(args.workers, database.POOL_SIZE))
+    with metrics.stage('backfill_fetch') as st:
+        raw_data, new_watermark, stats = backfill(
+            since, until, timedelta(hours=args.slice_hours), workers, args.decode_workers
+        )
+        st['rows_out'] = len(raw_data)
+    
+    if not raw_data:
+        print("\n⚠️ Nenhum dado encontrado. Abortando.")
+        metrics.set_result(outcome='empty', rows=0)
+        clear_backfill()
+        return
+    
+    with metrics.stage('transform', rows_in=len(raw_data)) as st:
+        applicants = transform_data(raw_data, stats)
+        st['rows_out'] = len(applicants)
+    if not applicants:
+        print("\n⚠️ Nenhum candidato válido. Abortando.")
+        metrics.set_result(outcome='empty', rows=0)
+        clear_backfill()
+        return
+    
+    publish_dataset(applicants, None if args.until else new_watermark, args)
+    clear_backfill()
+
+
+def run_snapshot(args):
+    """--snapshot: audit_log novo → applicant_snapshot (upsert) → publica do snapshot"""
+    print("🗃️ Modo snapshot" + (" (ressincronizando a janela inteira)" if args.full else ""))
+    print()
+    print("🔌 Conectando no PostgreSQL (Supabase)...")
+    
+    try:
+        with metrics.stage('snapshot_sync') as st:
+            changed, watermark = database.with_retry(sync_snapshot, args.full)
+            st['rows_out'] = changed
+    except psycopg2.errors.UndefinedTable:
+        print(f"❌ Tabela {SCHEMA_NAME}.{SNAPSHOT_TABLE} não existe. "
+              f"Aplique migrations/003_applicant_snapshot.sql")
+        raise
+    
+    with metrics.stage('snapshot_read') as st:
+        applicants = database.with_retry(fetch_snapshot)
+        st['rows_out'] = len(applicants)
+    if not applicants:
+        print("\n⚠️ Nenhum candidato na janela do snapshot. Abortando.")
+        metrics.set_result(outcome='empty', rows=0)
+        return
+    
+    publish_dataset(applicants, watermark, args)
+
+
+def publish_dataset(applicants: list, watermark: dict, args) -> bool:
+    """
+    Grava todos os artefatos do dataset e publica (passos 3.1 a 7)
+    
+    Retorna False se o conteúdo não mudou desde a última publicação.
+    """
+    total = len(applicants)
+    
+    # 3.1 Ordem canônica + hash: se nada mudou, não grava nem publica
+    with metrics.stage('sort_hash', rows_in=total):
+        sort_canonical(applicants)
+        content_hash = dataset_hash(applicants)
+    if content_hash == load_previous_hash((COMPACT_FILE,) if args.compact else ()):
+        # Linhas novas sem efeito (ex.: duplicadas) não são relidas na próxima
+        if watermark:
+            save_watermark(watermark)
+        print_unchanged(content_hash)
+        metrics.set_result(outcome='unchanged', rows=total)
+        return False
+    
+    # 4-5. Uma passada grava JSON, JS, minificado, shards por externalId (RBAC:
+    # cada usuário baixa só as suas filiais), índices e formato compacto. As
+    # variantes .gz/.br começam assim que cada arquivo comprimido fecha
+    with CompressionPool() as compression:
+        with metrics.stage('write_artifacts', rows_in=total) as st:
+            write_dataset(applicants, args.compact, hash_items=False, compression=compression)
+            st['bytes'] = metrics.file_bytes(*dataset_paths(args.compact))
+        if not args.compact:
+            remove_compact(COMPACT_FILE)
+        
+        # 5.1 Espera o que ainda falta da compressão e grava o manifest
+        with metrics.stage('compress', rows_in=total) as st:
+            manifest = compression.finish()
+            st['bytes'] = sum(
+                entry['bytes'] for entry in manifest['artifacts'] + manifest['search_index']
+                if entry['encoding'] != 'identity'
+            )
+    
+    # 6. Guardar marca d'água e hash para a próxima execução
+    if watermark:
+        save_watermark(watermark)
+    else:
+        WATERMARK_FILE.unlink(missing_ok=True)
+    save_hash(content_hash, len(applicants))
+    publish_version(content_hash, len(applicants))
+    
+    # 7. Deploy no GitHub
+    if args.push:
+        deploy(args)
+    
+    metrics.set_result(outcome='published', rows=total)
+    print_summary(total)
+    return True
+
+
+def listen_connection():
+    """Conexão dedicada (fora do pool, autocommit) escutando WATCH_CHANNEL"""
+    database.validate_credentials()
+    conn = psycopg2.connect(**database.connection_params())
+    conn.set_isolation_level(ISOLATION_LEVEL_AUTOCOMMIT)
+    with conn.cursor() as cursor:
+        cursor.execute(f"LISTEN {WATCH_CHANNEL}")
+    return conn
+
+
+def wait_for_batch(conn, idle_timeout: float) -> int:
+    """
+    Bloqueia até chegar uma rajada de notificações e ela "assentar"
+    
+    A rajada termina após WATCH_DEBOUNCE segundos sem novas notificações (ou
+    WATCH_MAX_DELAY desde a primeira). Retorna quantas chegaram; 0 significa
+    que `idle_timeout` passou sem nenhuma.
+    """
+    idle_deadline = time.monotonic() + idle_timeout
+    count = 0
+    first = last = None
+    
+    while True:
+        now = time.monotonic()
+        if count:
+            timeout = min(last + WATCH_DEBOUNCE, first + WATCH_MAX_DELAY) - now
+        else:
+            timeout = idle_deadline - now
+        if timeout <= 0:
+            return count
+        
+        ready, _, _ = select.select([conn], [], [], timeout)
+        if not ready:
+            continue
+        
+        conn.poll()
+        if conn.notifies:
+            now = time.monotonic()
+            count += len(conn.notifies)
+            del conn.notifies[:]
+            first = first or now
+            last = now
+
+
+def watch(args):
+    """
+    Modo daemon: exporta a cada rajada de inserts de 'Candidato vinculado'
+    
+    Depende do trigger de migrations/001_audit_log_notify.sql. Cada rajada
+    roda o caminho incremental (só as linhas novas desde a marca d'água); sem
+    notificações, exporta a cada WATCH_IDLE_REFRESH para expirar a janela e
+    cobrir notificações perdidas. Reconecta com backoff se o LISTEN cair.
+    """
+    print(f"👀 Modo watch: LISTEN {WATCH_CHANNEL} "
+          f"(debounce {WATCH_DEBOUNCE:.0f}s, máx. {WATCH_MAX_DELAY:.0f}s)")
+    
+    attempt = 0
+    while True:
+        conn = None
+        try:
+            conn = listen_connection()
+            attempt = 0
+            print("✅ Escutando notificações do audit_log")
+            
+            # Exportação de alcance: cobre o que entrou antes do LISTEN
+            reason = "início / reconexão"
+            while True:
+                print(f"\n⚡ Exportando ({reason})...")
+                try:
+                    run_instrumented(run_export, args)
+                except (psycopg2.OperationalError, psycopg2.InterfaceError):
+                    raise
+                except Exception as e:
+                    print(f"❌ Erro na exportação (o watch continua): {e}")
+                
+                # Depois da primeira, sempre incremental
+                args.full = False
+                
+                count = wait_for_batch(conn, WATCH_IDLE_REFRESH)
+                reason = f"{count} notificações" if count else "atualização periódica"
+        
+        except (psycopg2.OperationalError, psycopg2.InterfaceError) as e:
+            attempt += 1
+            delay = database.backoff_delay(min(attempt, 6))
+            print(f"⚠️ Conexão do watch perdida ({e}). Reconectando em {delay:.1f}s...")
+            time.sleep(delay)
+        finally:
+            if conn is not None:
+                conn.close()
+
+
+def load_tenants(config_file: Path) -> dict:
+    """
+    Lê e valida a configuração multi-tenant (JSON, ver tenants.example.json)
+    
+    {"workers": 4, "tenants": [{"name", "output", "schema", "table",
+    "message_filter", "days", "compact", "stream", "db": {...}}]}. Em "db",
+    cada campo de TENANT_DB_FIELDS vem direto ou de uma variável de ambiente
+    ("password_env": "GRUPO_A_DB_PASSWORD"); o que faltar usa o DB_* padrão.
+    """
+    with open(config_file, 'r', encoding='utf-8') as f:
+        config = json.load(f)
+    
+    tenants = config.get('tenants') or []
+    if not tenants:
+        raise ValueError(f"{config_file}: nenhum tenant configurado")
+    
+    names, outputs = set(), set()
+    for tenant in tenants:
+        name = tenant.get('name')
+        if not name or not re.fullmatch(r'[A-Za-z0-9_.-]+', name):
+            raise ValueError(f"{config_file}: tenant sem 'name' válido (letras, números, _ . -)")
+        output = Path(tenant.get('output') or '')
+        if not tenant.get('output') or output.is_absolute() or '..' in output.parts:
+            raise ValueError(f"tenant '{name}': 'output' deve ser um caminho relativo ao projeto")
+        for key in ('schema', 'table'):
+            if key in tenant and not re.fullmatch(r'[A-Za-z_][A-Za-z0-9_]*', tenant[key]):
+                raise ValueError(f"tenant '{name}': '{key}' inválido")
+        if name in names or output in outputs:
+            raise ValueError(f"tenant '{name}': nome ou 'output' repetido")
+        names.add(name)
+        outputs.add(output)
+    return config
+
+
+def tenant_output_dir(tenant: dict) -> Path:
+    """Namespace de saída do tenant (mesma estrutura do PROJECT_DIR)"""
+    return PROJECT_DIR / tenant['output']
+
+
+def tenant_db_params(tenant: dict) -> dict:
+    """Campos de conexão do tenant (variável do database.py → valor)"""
+    db = tenant.get('db') or {}
+    params = {}
+    for field, variable in TENANT_DB_FIELDS.items():
+        if f'{field}_env' in db:
+            value = os.getenv(db[f'{field}_env'])
+            if value is None:
+                raise ValueError(f"tenant '{tenant['name']}': variável {db[f'{field}_env']} não definida")
+        else:
+            value = db.get(field)
+        if value is not None:
+            params[variable] = str(value)
+    return params
+
+
+def configure_output(base: Path):
+    """Aponta PROJECT_DIR e todos os caminhos derivados dele para `base`"""
+    module = globals()
+    old = PROJECT_DIR
+    for name, value in list(module.items()):
+        if name.isupper() and isinstance(value, Path):
+            try:
+                module[name] = base / value.relative_to(old)
+            except ValueError:
+                pass
+
+
+def setup_tenant(args, argv) -> argparse.Namespace:
+    """
+    Subprocesso de um tenant: banco, tabela, filtro e namespace de saída
+    
+    Os argumentos são relidos depois de mudar os caminhos (os padrões de
+    --report/--metrics-file seguem o namespace). Nunca publica: o processo
+    principal faz um único deploy com todos os tenants.
+    """
+    global SCHEMA_NAME, TABLE_NAME, MESSAGE_FILTER
+    
+    config = load_tenants(args.tenants)
+    tenant = next((t for t in config['tenants'] if t['name'] == args.tenant), None)
+    if tenant is None:
+        raise ValueError(f"Tenant '{args.tenant}' não está em {args.tenants}")
+    
+    for variable, value in tenant_db_params(tenant).items():
+        setattr(database, variable, value)
+    database.CONNECT_OPTIONS['application_name'] = f"atrio-export:{tenant['name']}"
+    SCHEMA_NAME = tenant.get('schema', SCHEMA_NAME)
+    TABLE_NAME = tenant.get('table', TABLE_NAME)
+    MESSAGE_FILTER = tenant.get('message_filter', MESSAGE_FILTER)
+    configure_output(tenant_output_dir(tenant))
+    
+    args = parse_args(argv)
+    args.push = False
+    args.days = tenant.get('days', args.days)
+    args.compact = args.compact or tenant.get('compact', False)
+    args.stream = args.stream or tenant.get('stream', False)
+    
+    print(f"🏢 Tenant {tenant['name']}: {SCHEMA_NAME}.{TABLE_NAME} → {tenant['output']}/")
+    return args
+
+
+def run_tenant_process(tenant: dict, argv: list, timeout: float) -> dict:
+    """Exporta um tenant num subprocesso (log em <output>/reports/) e resume o resultado"""
+    output = tenant_output_dir(tenant)
+    reports_dir = output / REPORTS_DIR.relative_to(PROJECT_DIR)
+    report_file = output / RUN_REPORT_FILE.relative_to(PROJECT_DIR)
+    log_file = reports_dir / TENANT_LOG_NAME
+    reports_dir.mkdir(parents=True, exist_ok=True)
+    
+    command = [sys.executable, str(Path(__file__).resolve()), *argv, '--tenant', tenant['name']]
+    started = time.time()
+    error = None
+    returncode = None
+    with open(log_file, 'w', encoding='utf-8') as log:
+        try:
+            returncode = subprocess.run(
+                command, stdout=log, stderr=subprocess.STDOUT, timeout=timeout or None,
+                env={**os.environ, 'PYTHONIOENCODING': 'utf-8'}
+            ).returncode
+            if returncode:
+                error = f"saiu com código {returncode}"
+        except subprocess.TimeoutExpired:
+            error = f"timeout após {timeout:.0f}s"
+    
+    # Relatório do próprio tenant (só se foi gravado nesta execução)
+    report = {}
+    if report_file.exists() and report_file.stat().st_mtime >= started:
+        with open(report_file, 'r', encoding='utf-8') as f:
+            report = json.load(f)
+    
+    return {
+        'name': tenant['name'],
+        'output': tenant['output'],
+        'status': 'ok' if returncode == 0 else 'error',
+        'error': error,
+        'seconds': round(time.time() - started, 2),
+        'outcome': report.get('outcome'),
+        'rows': report.get('rows'),
+        'peak_rss_bytes': report.get('peak_rss_bytes'),
+        'children_peak_rss_bytes': report.get('children_peak_rss_bytes'),
+        'database': report.get('database'),
+        'report': report_file.relative_to(PROJECT_DIR).as_posix(),
+        'log': log_file.relative_to(PROJECT_DIR).as_posix()
+    }
+
+
+def run_tenants(args, argv: list) -> list:
+    """
+    --tenants: exporta cada tenant num subprocesso, no máximo `workers` ao mesmo tempo
+    
+    Cada tenant tem namespace, relatório e métricas próprios; falha ou timeout
+    de um não interrompe os outros. No fim grava o relatório consolidado e
+    publica num único deploy os tenants que terminaram bem (no branch de
+    dados, os que falharam continuam com a versão já publicada).
+    """
+    config = load_tenants(args.tenants)
+    tenants = config['tenants']
+    workers = args.tenant_workers or config.get('workers') or TENANT_WORKERS
+    print(f"🏢 Modo multi-tenant: {len(tenants)} tenant(s), até {workers} em paralelo")
+    
+    start = time.perf_counter()
+    results = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {
+            executor.submit(run_tenant_process, tenant, argv, args.tenant_timeout): tenant
+            for tenant in tenants
+        }
+        for future in as_completed(futures):
+            result = future.result()
+            results[result['name']] = result
+            flag = '✅' if result['status'] == 'ok' else '❌'
+            detail = result['outcome'] or result['error'] or '-'
+            print(f"   {flag} {result['name']:<20} {result['seconds']:>7.1f}s | {detail} "
+                  f"| linhas {result['rows'] if result['rows'] is not None else '-'} | {result['log']}")
+    
+    ordered = [results[tenant['name']] for tenant in tenants]
+    failed = [result for result in ordered if result['status'] != 'ok']
+    write_atomic(TENANTS_REPORT_FILE, json.dumps({
+        'finished_at': datetime.now(timezone.utc).isoformat(),
+        'seconds': round(time.perf_counter() - start, 2),
+        'workers': workers,
+        'failed': len(failed),
+        'tenants': ordered
+    }, ensure_ascii=False, indent=2) + '\n')
+    print(f"\n📝 Relatório consolidado: {TENANTS_REPORT_FILE}")
+    
+    succeeded = [tenant for tenant in tenants if results[tenant['name']]['status'] == 'ok']
+    if args.push and any(results[t['name']]['outcome'] == 'published' for t in succeeded):
+        deploy(
+            args,
+            paths=[path for tenant in succeeded for path in published_paths(tenant_output_dir(tenant))],
+            keep=[tenant['output'] for tenant in tenants if tenant not in succeeded]
+        )
+    
+    if failed:
+        print(f"\n❌ {len(failed)} tenant(s) falharam: {', '.join(r['name'] for r in failed)}")
+    return ordered
+
+
+def run_mode(args) -> str:
+    """Modo da execução para o relatório (run_export refina em incremental/full)"""
+    if args.since:
+        return 'backfill'
+    if args.snapshot:
+        return 'snapshot'
+    if args.stream:
+        return 'stream'
+    return 'full' if args.full else 'incremental'
+
+
+def run_instrumented(run, args):
+    """Roda uma exportação registrando as etapas; grava relatório JSON e métricas"""
+    metrics.start_run(run_mode(args), database.STATS)
+    status = 'error'
+    try:
+        run(args)
+        status = 'ok'
+    finally:
+        mirror.flush()
+        report = metrics.finish_run(
+            status, args.report, args.metrics_file, RUN_HISTORY_FILE, database.STATS
+        )
+        metrics.print_report(report)
+        print(f"📝 Relatório: {args.report} | Métricas: {args.metrics_file}")
+
+
+def dump_profile(profiler):
+    """Grava o perfil do cProfile e mostra as funções mais caras (tempo acumulado)"""
+    PROFILE_FILE.parent.mkdir(parents=True, exist_ok=True)
+    profiler.dump_stats(PROFILE_FILE)
+    print(f"\n🔬 Perfil gravado em {PROFILE_FILE} (abra com: python -m pstats {PROFILE_FILE})")
+    pstats.Stats(profiler).sort_stats('cumulative').print_stats(PROFILE_TOP)
+
+
+def main(argv=None):
+    """Função principal"""
+    global WINDOW_DAYS
+    
+    argv = sys.argv[1:] if argv is None else list(argv)
+    args = parse_args(argv)
+    if args.tenants and not args.tenant:
+        results = run_tenants(args, argv)
+        if any(result['status'] != 'ok' for result in results):
+            sys.exit(1)
+        return
+    if args.tenant:
+        args = setup_tenant(args, argv)
+    if args.days:
+        WINDOW_DAYS = args.days
+    elif not args.since:
+        stored = stored_window_days()
+        if stored and stored != WINDOW_DAYS:
+            WINDOW_DAYS = stored
+            print(f"🪟 Janela de {WINDOW_DAYS} dias da última publicação (use --days para mudar)")
+    
+    print("=" * 60)
+    print("🚀 EXPORTAÇÃO AUTOMÁTICA - POSTGRESQL → GITHUB PAGES")
+    print("=" * 60)
+    print()
+    
+    profiler = cProfile.Profile() if args.profile else None
+    if profiler:
+        profiler.enable()
+    if args.mirror:
+        mirror.open_mirror(args.mirror)
+    
+    try:
+        if args.watch:
+            watch(args)
+        elif args.since:
+            run_instrumented(run_backfill, args)
+        else:
+            run_instrumented(run_export, args)
+        
+    except KeyboardInterrupt:
+        print("\n⏹️ Interrompido pelo usuário")
         
     except Exception as e:
         print()
@@ -373,10 +3071,15 @@ def main():
         raise
         
     finally:
-        # Fechar conexão
-        if conn:
-            conn.close()
-            print("\n🔌 Conexão fechada")
+        if profiler:
+            profiler.disable()
+            dump_profile(profiler)
+        
+        # Fechar conexões do pool
+        print()
+        mirror.close_mirror()
+        database.print_stats()
+        database.close_pool()
 
 
 if __name__ == '__main__':
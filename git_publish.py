@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Publicação no branch de dados via git plumbing - exportador Atrio
+
+Grava os artefatos do exportador direto no banco de objetos do git, sem
+working tree e sem commit na main:
+- hash-object -w --stdin-paths: um processo para todos os arquivos
+- mktree --batch: um processo para todas as árvores
+- commit-tree + push --force-with-lease para o branch de dados
+
+O branch de dados é a árvore do site (`site_ref`, ex.: HEAD da main) com os
+artefatos por cima, então o GitHub Pages pode servir direto dele. O histórico
+fica limitado a `depth` commits (1 = um único commit, sempre substituído):
+o tempo de publicação e o tamanho do repositório não crescem com o tempo.
+
+Uso:
+    import git_publish
+
+    git_publish.publish(repo_dir, files, 'data', remote='origin', depth=1)
+    git_publish.restore(repo_dir, 'data', ['applicants.json', 'data'], dest_dir)
+
+    # Linha de comando (ex.: contra um repositório bare local)
+    python git_publish.py publish --remote /tmp/site.git --branch data
+    python git_publish.py restore --remote /tmp/site.git --branch data
+"""
+
+import argparse
+import io
+import os
+import subprocess
+import sys
+import tarfile
+import time
+from pathlib import Path
+
+# Commits mantidos no branch de dados
+DEFAULT_DEPTH = 1
+
+# Ref local (fora de refs/heads) com a última versão conhecida do branch remoto
+FETCH_NAMESPACE = 'refs/atrio'
+
+# Arquivo vazio incluído na árvore: o Pages serve os arquivos sem Jekyll
+NOJEKYLL = '.nojekyll'
+
+FILE_MODE = '100644'
+TREE_MODE = '040000'
+
+
+class GitError(RuntimeError):
+    """Comando git falhou (mensagem com o stderr)"""
+
+
+def git(repo: Path, *args, input: bytes = None, env: dict = None) -> bytes:
+    """Roda `git -C repo ...` e devolve o stdout (GitError se falhar)"""
+    result = subprocess.run(
+        ['git', '-C', str(repo), *args], input=input, capture_output=True,
+        env={**os.environ, **env} if env else None
+    )
+    if result.returncode != 0:
+        message = result.stderr.decode('utf-8', 'replace').strip()
+        raise GitError(f"git {args[0]}: {message}")
+    return result.stdout
+
+
+def rev_parse(repo: Path, ref: str):
+    """SHA do commit em `ref` ou None se não existir"""
+    try:
+        return git(repo, 'rev-parse', '--verify', '-q', f'{ref}^{{commit}}').decode().strip()
+    except GitError:
+        return None
+
+
+def fetch_branch(repo: Path, remote: str, branch: str, depth: int):
+    """
+    Traz o branch de dados do remoto para FETCH_NAMESPACE/<branch>
+
+    Só os últimos `depth` commits (os únicos que serão mantidos). Retorna o
+    SHA ou None se o branch ainda não existe no remoto.
+    """
+    local_ref = f'{FETCH_NAMESPACE}/{branch}'
+    try:
+        git(repo, 'fetch', '--quiet', '--no-tags', f'--depth={depth}', remote,
+            f'+refs/heads/{branch}:{local_ref}')
+    except GitError as e:
+        if "couldn't find remote ref" not in str(e):
+            raise
+        return None
+    return rev_parse(repo, local_ref)
+
+
+def read_tree(repo: Path, ref: str) -> dict:
+    """Entradas (recursivas) da árvore de `ref`: caminho → (modo, tipo, sha)"""
+    entries = {}
+    for record in git(repo, 'ls-tree', '-r', '-z', ref).split(b'\0'):
+        if not record:
+            continue
+        meta, path = record.split(b'\t', 1)
+        mode, kind, sha = meta.decode().split(' ')
+        entries[path.decode('utf-8', 'surrogateescape')] = (mode, kind, sha)
+    return entries
+
+
+def hash_files(repo: Path, files: list) -> list:
+    """Grava os arquivos como blobs (um único processo) e devolve os SHAs"""
+    if not files:
+        return []
+    paths = '\n'.join(str(Path(path).resolve()) for path in files) + '\n'
+    output = git(repo, 'hash-object', '-w', '--no-filters', '--stdin-paths', input=paths.encode('utf-8'))
+    return output.decode().split()
+
+
+def write_trees(repo: Path, entries: dict) -> str:
+    """
+    Monta as árvores aninhadas para `entries` e devolve o SHA da raiz
+
+    Um único `git mktree --batch`: as árvores vão das mais profundas para a
+    raiz e o SHA de cada uma é lido antes de escrever a do diretório pai.
+    """
+    directories = {'': {}}
+    for path, entry in entries.items():
+        parent, _, name = path.rpartition('/')
+        directories.setdefault(parent, {})[name] = entry
+        while parent:
+            parent = parent.rpartition('/')[0]
+            directories.setdefault(parent, {})
+
+    # Mais profundas primeiro; a raiz ('') por último
+    order = sorted(directories, key=lambda d: d.count('/') + bool(d), reverse=True)
+
+    process = subprocess.Popen(
+        ['git', '-C', str(repo), 'mktree', '--batch'],
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+    try:
+        for directory in order:
+            lines = [
+                f"{mode} {kind} {sha}\t{name}\n"
+                for name, (mode, kind, sha) in directories[directory].items()
+            ]
+            process.stdin.write((''.join(lines) + '\n').encode('utf-8', 'surrogateescape'))
+            process.stdin.flush()
+            sha = process.stdout.readline().decode().strip()
+            if not sha:
+                raise GitError(f"git mktree: {process.stderr.read().decode('utf-8', 'replace').strip()}")
+            if directory:
+                parent, _, name = directory.rpartition('/')
+                directories[parent][name] = (TREE_MODE, 'tree', sha)
+        return sha
+    finally:
+        process.stdin.close()
+        process.wait()
+
+
+def bounded_parent(repo: Path, base: str, depth: int):
+    """
+    Pai do novo commit mantendo no máximo `depth` commits no branch
+
+    Se o histórico atual já passa do limite, recria os `depth - 1` commits
+    mais recentes (mesmas árvores, mensagens e datas) a partir de uma nova
+    raiz; as árvores e blobs são reaproveitados, só os commits mudam.
+    """
+    if not base or depth <= 1:
+        return None
+
+    keep = depth - 1
+    log = git(repo, 'log', '-z', f'--max-count={depth}', '--date=raw',
+              '--format=%T%x01%an%x01%ae%x01%ad%x01%cn%x01%ce%x01%cd%x01%B', base)
+    commits = [record.split('\x01') for record in log.decode('utf-8').split('\0') if record]
+    if len(commits) <= keep:
+        return base
+
+    parent = None
+    for tree, an, ae, ad, cn, ce, cd, message in reversed(commits[:keep]):
+        env = {
+            'GIT_AUTHOR_NAME': an, 'GIT_AUTHOR_EMAIL': ae, 'GIT_AUTHOR_DATE': ad,
+            'GIT_COMMITTER_NAME': cn, 'GIT_COMMITTER_EMAIL': ce, 'GIT_COMMITTER_DATE': cd,
+        }
+        args = ['commit-tree', tree, '-F', '-'] + (['-p', parent] if parent else [])
+        parent = git(repo, *args, input=message.encode('utf-8'), env=env).decode().strip()
+    return parent
+
+
+def publish(repo: Path, files: list, branch: str, remote: str = 'origin',
+            depth: int = DEFAULT_DEPTH, site_ref: str = 'HEAD', message: str = None,
+            push: bool = True, directories: list = None, keep: list = None):
+    """
+    Publica `files` (caminhos dentro de `repo`) no branch de dados
+
+    A árvore publicada é `site_ref` sem os caminhos publicados e sem nada
+    dentro de `directories` (padrão: o primeiro diretório de cada arquivo),
+    para remover arquivos que sumiram, mais os arquivos atuais. Caminhos sob
+    os prefixos de `keep` ficam como estão no branch. Retorna o SHA do novo
+    commit ou None se a árvore não mudou. Com push=False só atualiza a ref
+    local (FETCH_NAMESPACE/<branch>).
+    """
+    repo = Path(repo).resolve()
+    files = [Path(path).resolve() for path in files]
+    names = [path.relative_to(repo).as_posix() for path in files]
+
+    base = fetch_branch(repo, remote, branch, depth) if push else rev_parse(repo, f'{FETCH_NAMESPACE}/{branch}')
+
+    entries = read_tree(repo, site_ref) if site_ref else {}
+    if directories is None:
+        directories = {name.split('/', 1)[0] for name in names if '/' in name}
+    replaced = tuple(directory.rstrip('/') + '/' for directory in directories)
+    entries = {
+        path: entry for path, entry in entries.items()
+        if path not in names and not path.startswith(replaced)
+    }
+    if keep and base:
+        kept = tuple(prefix.rstrip('/') + '/' for prefix in keep)
+        entries.update({
+            path: entry for path, entry in read_tree(repo, base).items() if path.startswith(kept)
+        })
+    for name, sha in zip(names, hash_files(repo, files)):
+        entries[name] = (FILE_MODE, 'blob', sha)
+    if NOJEKYLL not in entries:
+        empty_blob = git(repo, 'hash-object', '-w', '--stdin', input=b'').decode().strip()
+        entries[NOJEKYLL] = (FILE_MODE, 'blob', empty_blob)
+
+    tree = write_trees(repo, entries)
+    if base and git(repo, 'rev-parse', f'{base}^{{tree}}').decode().strip() == tree:
+        return None
+
+    parent = bounded_parent(repo, base, depth)
+    message = message or f"chore: Atualizar dados dos candidatos ({time.strftime('%Y-%m-%d %H:%M')})"
+    args = ['commit-tree', tree, '-F', '-'] + (['-p', parent] if parent else [])
+    commit = git(repo, *args, input=message.encode('utf-8')).decode().strip()
+
+    if push:
+        # Só substitui se o remoto ainda estiver onde lemos (outro publicador ganha)
+        git(repo, 'push', '--quiet', f'--force-with-lease=refs/heads/{branch}:{base or ""}',
+            remote, f'{commit}:refs/heads/{branch}')
+    git(repo, 'update-ref', f'{FETCH_NAMESPACE}/{branch}', commit)
+    return commit
+
+
+def restore(repo: Path, branch: str, paths: list, dest: Path, remote: str = 'origin') -> list:
+    """
+    Extrai `paths` (arquivos ou diretórios) do branch de dados para `dest`
+
+    Usado antes da exportação incremental (marca d'água, hash e dataset
+    anterior vivem no branch de dados). Retorna os arquivos extraídos.
+    """
+    repo = Path(repo).resolve()
+    commit = fetch_branch(repo, remote, branch, 1)
+    if not commit:
+        return []
+
+    entries = read_tree(repo, commit)
+    wanted = [
+        path for path in entries
+        if any(path == prefix or path.startswith(prefix.rstrip('/') + '/') for prefix in paths)
+    ]
+    if not wanted:
+        return []
+
+    archive = git(repo, 'archive', '--format=tar', commit, '--', *wanted)
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        tar.extractall(dest)
+    return wanted
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Publica/restaura os artefatos no branch de dados')
+    parser.add_argument('command', choices=['publish', 'restore'])
+    parser.add_argument('--repo', type=Path, default=Path(__file__).resolve().parent,
+                        help='Repositório local (padrão: o do projeto)')
+    parser.add_argument('--remote', default='origin', help='Remoto ou caminho de um repositório bare')
+    parser.add_argument('--branch', default='data', help='Branch de dados (padrão: data)')
+    parser.add_argument('--depth', type=int, default=DEFAULT_DEPTH,
+                        help=f'Commits mantidos no branch (padrão: {DEFAULT_DEPTH})')
+    parser.add_argument('paths', nargs='*', help='Arquivos/diretórios (padrão: os do exportador)')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+    import export_from_supabase as exporter
+
+    if args.command == 'publish':
+        files = [args.repo / path for path in args.paths] if args.paths else exporter.published_files()
+        start = time.perf_counter()
+        commit = publish(args.repo, files, args.branch, remote=args.remote, depth=args.depth)
+        elapsed = time.perf_counter() - start
+        if commit:
+            print(f"✅ {len(files)} arquivos publicados em {args.branch} ({commit[:12]}, {elapsed:.2f}s)")
+        else:
+            print(f"⚠️ Nada mudou em {args.branch} ({elapsed:.2f}s)")
+    else:
+        paths = args.paths or [
+            path.relative_to(exporter.PROJECT_DIR).as_posix() for path in exporter.published_paths()
+        ]
+        restored = restore(args.repo, args.branch, paths, args.repo, remote=args.remote)
+        print(f"📥 {len(restored)} arquivos restaurados de {args.branch}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+Instrumentação por etapa - exportador Atrio
+
+Mede cada etapa da exportação (tempo de parede, linhas de entrada/saída,
+bytes gravados, variação do RSS na etapa e picos de RSS acumulados do
+processo e dos subprocessos) e grava ao final da execução:
+- Relatório JSON (run-report.json) + histórico de execuções (run-history.jsonl)
+- Arquivo textfile do Prometheus (node_exporter --collector.textfile)
+
+Uso:
+    import metrics
+
+    metrics.start_run('incremental')
+    with metrics.stage('transform', rows_in=len(raw)) as st:
+        applicants = transform_data(raw)
+        st['rows_out'] = len(applicants)
+    metrics.finish_run('ok', report_file, prom_file)
+"""
+
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+from atomic import write_atomic
+
+# resource só existe em Unix (no Windows o pico de RSS fica None)
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Execuções mantidas no histórico (as mais antigas são descartadas)
+HISTORY_MAX = 500
+
+# Prefixo das métricas Prometheus
+PROM_PREFIX = 'atrio_export'
+
+_run = None
+
+
+def _maxrss_bytes(who) -> int:
+    peak = resource.getrusage(who).ru_maxrss
+    # Linux informa em KB; macOS em bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def peak_rss_bytes():
+    """
+    Pico de RSS do processo desde o início (bytes) ou None
+
+    É o máximo acumulado da vida do processo, não o de uma etapa: uma etapa
+    leve depois de uma pesada repete o pico da pesada.
+    """
+    return _maxrss_bytes(resource.RUSAGE_SELF) if resource else None
+
+
+def children_peak_rss_bytes():
+    """
+    Maior pico de RSS entre os subprocessos já encerrados (bytes) ou None
+
+    Cobre os workers do --decode-workers depois que o pool é fechado.
+    Também é acumulado desde o início do processo.
+    """
+    return _maxrss_bytes(resource.RUSAGE_CHILDREN) if resource else None
+
+
+def current_rss_bytes():
+    """RSS atual do processo (bytes); None fora do Linux"""
+    try:
+        with open('/proc/self/statm', 'rb') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        return None
+
+
+def start_run(mode: str, counters: dict = None):
+    """
+    Começa o registro de uma execução (no --watch, uma por rajada)
+
+    `counters` (ex.: database.STATS) é copiado para que o relatório mostre só
+    o que mudou nesta execução.
+    """
+    global _run
+    _run = {
+        'mode': mode,
+        'started_at': datetime.now(timezone.utc).isoformat(),
+        'outcome': None,
+        'rows': None,
+        'stages': [],
+        '_start': time.perf_counter(),
+        '_counters': dict(counters or {}),
+    }
+
+
+def set_result(**fields):
+    """Registra o resultado da execução (ex.: outcome='published', rows=123)"""
+    if _run is not None:
+        _run.update(fields)
+
+
+@contextmanager
+def stage(name: str, rows_in: int = None):
+    """
+    Mede uma etapa; o bloco pode preencher st['rows_out'] e st['bytes']
+
+    Etapas que falham também entram no relatório (status 'error').
+    `rss_delta_bytes` é o quanto o RSS do processo mudou durante a etapa (só
+    Linux); `peak_rss_bytes` e `children_peak_rss_bytes` são os picos
+    acumulados até o fim da etapa.
+    """
+    record = {'name': name, 'rows_in': rows_in, 'rows_out': None, 'bytes': None}
+    rss_before = current_rss_bytes()
+    start = time.perf_counter()
+    try:
+        yield record
+        record['status'] = 'ok'
+    except BaseException:
+        record['status'] = 'error'
+        raise
+    finally:
+        record['seconds'] = round(time.perf_counter() - start, 4)
+        rss_after = current_rss_bytes()
+        record['rss_bytes'] = rss_after
+        record['rss_delta_bytes'] = (rss_after - rss_before
+                                     if rss_before is not None and rss_after is not None else None)
+        record['peak_rss_bytes'] = peak_rss_bytes()
+        record['children_peak_rss_bytes'] = children_peak_rss_bytes()
+        if _run is not None:
+            _run['stages'].append(record)
+
+
+def file_bytes(*paths) -> int:
+    """Soma do tamanho dos arquivos que existem"""
+    return sum(Path(path).stat().st_size for path in paths if Path(path).exists())
+
+
+def build_report(status: str, counters: dict = None) -> dict:
+    """Relatório da execução atual"""
+    report = {key: value for key, value in _run.items() if not key.startswith('_')}
+    report['status'] = status
+    report['finished_at'] = datetime.now(timezone.utc).isoformat()
+    report['seconds'] = round(time.perf_counter() - _run['_start'], 4)
+    report['peak_rss_bytes'] = peak_rss_bytes()
+    report['children_peak_rss_bytes'] = children_peak_rss_bytes()
+    if counters is not None:
+        before = _run['_counters']
+        report['database'] = {
+            key: round(value - before.get(key, 0), 4) for key, value in counters.items()
+        }
+    return report
+
+
+def _prom_line(name: str, value, labels: dict = None) -> str:
+    label_text = ''
+    if labels:
+        label_text = '{' + ','.join(f'{key}="{val}"' for key, val in labels.items()) + '}'
+    return f"{PROM_PREFIX}_{name}{label_text} {value}"
+
+
+def prometheus_text(report: dict) -> str:
+    """Relatório → formato textfile do Prometheus"""
+    series = [
+        ('run_seconds', 'Duração total da última execução', [(None, report['seconds'])]),
+        ('last_run_timestamp_seconds', 'Fim da última execução (epoch)',
+         [(None, int(datetime.fromisoformat(report['finished_at']).timestamp()))]),
+        ('last_run_success', '1 se a última execução terminou sem erro',
+         [(None, int(report['status'] == 'ok'))]),
+        ('published_rows', 'Candidatos no dataset publicado', [(None, report['rows'])]),
+        ('peak_rss_bytes', 'Pico de memória RSS do processo (acumulado desde o início)',
+         [(None, report['peak_rss_bytes'])]),
+        ('children_peak_rss_bytes', 'Maior pico de RSS dos subprocessos (decode workers)',
+         [(None, report.get('children_peak_rss_bytes'))]),
+        ('stage_seconds', 'Tempo de parede por etapa',
+         [({'stage': st['name']}, st['seconds']) for st in report['stages']]),
+        ('stage_rows_in', 'Linhas de entrada por etapa',
+         [({'stage': st['name']}, st['rows_in']) for st in report['stages']]),
+        ('stage_rows_out', 'Linhas de saída por etapa',
+         [({'stage': st['name']}, st['rows_out']) for st in report['stages']]),
+        ('stage_bytes', 'Bytes gravados por etapa',
+         [({'stage': st['name']}, st['bytes']) for st in report['stages']]),
+        ('stage_rss_delta_bytes', 'Variação do RSS do processo durante a etapa',
+         [({'stage': st['name']}, st.get('rss_delta_bytes')) for st in report['stages']]),
+    ]
+    for key, value in (report.get('database') or {}).items():
+        series.append((f'db_{key}', f'Banco: {key} nesta execução', [(None, value)]))
+
+    lines = []
+    for name, help_text, samples in series:
+        samples = [(labels, value) for labels, value in samples if value is not None]
+        if not samples:
+            continue
+        lines.append(f"# HELP {PROM_PREFIX}_{name} {help_text}")
+        lines.append(f"# TYPE {PROM_PREFIX}_{name} gauge")
+        lines.extend(_prom_line(name, value, labels) for labels, value in samples)
+    return '\n'.join(lines) + '\n'
+
+
+def append_history(history_file: Path, report: dict):
+    """Acrescenta o relatório (uma linha) ao histórico, mantendo HISTORY_MAX execuções"""
+    lines = []
+    if history_file.exists():
+        lines = history_file.read_text(encoding='utf-8').splitlines()
+    lines.append(json.dumps(report, ensure_ascii=False, separators=(',', ':')))
+    write_atomic(history_file, '\n'.join(lines[-HISTORY_MAX:]) + '\n')
+
+
+def finish_run(status: str, report_file: Path, prom_file: Path = None,
+               history_file: Path = None, counters: dict = None) -> dict:
+    """Fecha a execução e grava relatório JSON, histórico e textfile do Prometheus"""
+    global _run
+    if _run is None:
+        return None
+
+    report = build_report(status, counters)
+    _run = None
+
+    write_atomic(report_file, json.dumps(report, ensure_ascii=False, indent=2) + '\n')
+    if history_file:
+        append_history(history_file, report)
+    if prom_file:
+        write_atomic(prom_file, prometheus_text(report))
+    return report
+
+
+def print_report(report: dict):
+    """Tabela resumida das etapas"""
+    print("\n⏱️ Etapas:")
+    for st in report['stages']:
+        parts = [f"{st['seconds']:.2f}s"]
+        if st['rows_in'] is not None or st['rows_out'] is not None:
+            parts.append(f"linhas {st['rows_in'] if st['rows_in'] is not None else '-'}"
+                         f"→{st['rows_out'] if st['rows_out'] is not None else '-'}")
+        if st['bytes'] is not None:
+            parts.append(f"{st['bytes'] / 1024:.1f} KB")
+        if st.get('rss_delta_bytes') is not None:
+            parts.append(f"RSS {st['rss_delta_bytes'] / 1024 / 1024:+.0f} MB")
+        flag = '' if st['status'] == 'ok' else ' ❌'
+        print(f"   {st['name']:<18} {' | '.join(parts)}{flag}")
+    print(f"   {'total':<18} {report['seconds']:.2f}s")
+    peaks = [f"processo {report['peak_rss_bytes'] / 1024 / 1024:.0f} MB"] if report['peak_rss_bytes'] else []
+    if report.get('children_peak_rss_bytes'):
+        peaks.append(f"subprocessos {report['children_peak_rss_bytes'] / 1024 / 1024:.0f} MB")
+    if peaks:
+        print(f"   {'pico de RSS':<18} {' | '.join(peaks)}")
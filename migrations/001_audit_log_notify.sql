@@ -0,0 +1,41 @@
+-- ============================================================
+-- Atrio - NOTIFY em novos "Candidato vinculado" (opcional)
+-- ============================================================
+-- Alimenta o modo daemon do exportador:
+--
+--     python export_from_supabase.py --watch
+--
+-- O trigger só avisa que há linhas novas; o exportador busca o que mudou
+-- pelo caminho incremental (marca d'água em created_at). Sem payload, vários
+-- inserts na mesma transação viram UMA notificação (o Postgres descarta
+-- notificações idênticas), e o --watch ainda agrupa rajadas (debounce).
+--
+-- Aplicar (Supabase: SQL Editor, ou psql):
+--     psql "$DATABASE_URL" -f migrations/001_audit_log_notify.sql
+--
+-- Obs.: LISTEN precisa de conexão de sessão. No Supabase use a porta 5432
+-- (session mode / conexão direta), não o pooler em transaction mode (6543).
+--
+-- Reverter:
+--     DROP TRIGGER IF EXISTS atrio_audit_log_notify ON public.audit_log;
+--     DROP FUNCTION IF EXISTS public.atrio_notify_audit_log();
+-- ============================================================
+
+CREATE OR REPLACE FUNCTION public.atrio_notify_audit_log()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    -- Canal: WATCH_CHANNEL em export_from_supabase.py
+    PERFORM pg_notify('atrio_audit_log', '');
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS atrio_audit_log_notify ON public.audit_log;
+
+CREATE TRIGGER atrio_audit_log_notify
+    AFTER INSERT ON public.audit_log
+    FOR EACH ROW
+    WHEN (NEW.message = 'Candidato vinculado' AND NEW.details IS NOT NULL)
+    EXECUTE FUNCTION public.atrio_notify_audit_log();
@@ -0,0 +1,20 @@
+-- ============================================================
+-- Atrio - Índices do audit_log (gerado por scripts/index_advisor.py)
+-- ============================================================
+-- CONCURRENTLY não bloqueia inserts, mas não roda dentro de transação:
+--     psql "$DATABASE_URL" -f migrations/002_audit_log_indexes.sql
+--
+-- Reverter:
+--     DROP INDEX CONCURRENTLY IF EXISTS public.audit_log_candidato_vinculado_created_at_idx;
+--     DROP INDEX CONCURRENTLY IF EXISTS public.audit_log_details_trgm_idx;
+-- ============================================================
+
+-- Janela / incremental / backfill do exportador
+CREATE INDEX CONCURRENTLY IF NOT EXISTS audit_log_candidato_vinculado_created_at_idx
+    ON public.audit_log (created_at, id)
+    WHERE message = 'Candidato vinculado' AND details IS NOT NULL;
+
+-- Busca por texto em details (ILIKE '%...%')
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE INDEX CONCURRENTLY IF NOT EXISTS audit_log_details_trgm_idx
+    ON public.audit_log USING gin ((details::text) gin_trgm_ops);
@@ -0,0 +1,64 @@
+-- ============================================================
+-- Atrio - Snapshot compacto dos candidatos (opcional)
+-- ============================================================
+-- Usado por:
+--
+--     python export_from_supabase.py --snapshot
+--
+-- Uma linha por (talento, vaga) só com os campos publicados (os mesmos que
+-- transform_data mantém). O exportador aplica no snapshot apenas os registros
+-- novos do audit_log (marca d'água em applicant_snapshot_state) via upsert
+-- idempotente, e publica lendo daqui em vez de reler o JSONB do audit_log.
+-- A cada sincronização as linhas fora da janela (WINDOW_DAYS) são removidas,
+-- então a tabela acompanha o tamanho da janela, não o do audit_log.
+--
+-- Aplicar:
+--     psql "$DATABASE_URL" -f migrations/003_applicant_snapshot.sql
+--
+-- Reverter:
+--     DROP TABLE IF EXISTS public.applicant_snapshot_state;
+--     DROP TABLE IF EXISTS public.applicant_snapshot;
+-- ============================================================
+
+CREATE TABLE IF NOT EXISTS public.applicant_snapshot (
+    -- Chave de deduplicação (body.talent.id, recrutei_vacancy_id). Registros
+    -- sem essa chave: talent_id = '' e vacancy_id = 'sha256:<conteúdo>'
+    talent_id           text        NOT NULL,
+    vacancy_id          text        NOT NULL,
+    created_at          timestamptz NOT NULL,
+    -- Linha do audit_log de origem: desempate de created_at (mesma ordem
+    -- created_at DESC, id DESC da consulta direta ao audit_log)
+    audit_log_id        bigint      NOT NULL,
+    -- Valores em jsonb: voltam exatamente como foram publicados (hash estável)
+    applicant           jsonb,
+    vacancy_title       jsonb,
+    senior_vacancy_id   jsonb,
+    recrutei_vacancy_id jsonb,
+    branch_office       jsonb,
+    head_office         jsonb,
+    talent              jsonb,
+    -- RBAC: filial e matriz (mesma regra do front-end e dos shards)
+    branch_external_id  text,
+    head_external_id    text,
+    updated_at          timestamptz NOT NULL DEFAULT now(),
+    PRIMARY KEY (talent_id, vacancy_id)
+);
+
+-- Publicação: janela de WINDOW_DAYS, mais recentes primeiro (e a limpeza
+-- da janela, por created_at)
+CREATE INDEX IF NOT EXISTS applicant_snapshot_created_at_id_idx
+    ON public.applicant_snapshot (created_at DESC, audit_log_id DESC);
+
+CREATE INDEX IF NOT EXISTS applicant_snapshot_branch_external_id_idx
+    ON public.applicant_snapshot (branch_external_id);
+
+CREATE INDEX IF NOT EXISTS applicant_snapshot_head_external_id_idx
+    ON public.applicant_snapshot (head_external_id);
+
+-- Último registro do audit_log já aplicado no snapshot
+CREATE TABLE IF NOT EXISTS public.applicant_snapshot_state (
+    name                text        PRIMARY KEY,
+    created_at          timestamptz NOT NULL,
+    audit_log_id        bigint      NOT NULL,
+    updated_at          timestamptz NOT NULL DEFAULT now()
+);
@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Espelho local (SQLite) das linhas lidas do audit_log - exportador Atrio
+
+Com `--mirror`, cada linha buscada pelo exportador (já na projeção de
+PROJECTED_DETAILS_SQL) é gravada num SQLite local, com colunas indexadas para
+id do talento, externalId e message e um índice FTS5 sobre nome, e-mail e vaga.
+A coluna message não depende do MESSAGE_FILTER do exportador: o lookup também
+grava linhas de outras messages vindas do banco.
+O scripts/lookup.py consulta o espelho primeiro e só vai ao banco quando não
+encontra nada, então a pergunta "por que o candidato X não aparece?" é
+respondida em milissegundos, sem varrer o audit_log em produção.
+
+Uso:
+    import mirror
+
+    mirror.open_mirror(Path('.mirror/audit_log.sqlite'))
+    mirror.record(row_id, message, details)   # no-op sem espelho aberto
+    mirror.close_mirror()
+
+    db = mirror.connect(path)
+    rows = mirror.search(db, 'weslley')
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+# Linhas acumuladas antes de cada INSERT em lote
+MIRROR_BATCH = 1000
+
+# Linhas com created_at mais antigo que isso são removidas ao fechar
+RETENTION_DAYS = 30
+
+SCHEMA_SQL = """
+CREATE TABLE IF NOT EXISTS audit_rows (
+    id INTEGER PRIMARY KEY,
+    message TEXT,
+    created_at TEXT,
+    talent_id TEXT,
+    external_id TEXT,
+    branch_external_id TEXT,
+    head_external_id TEXT,
+    applicant TEXT,
+    email TEXT,
+    vacancy_title TEXT,
+    recrutei_vacancy_id TEXT,
+    details TEXT NOT NULL,
+    mirrored_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS audit_rows_talent_id_idx ON audit_rows (talent_id);
+CREATE INDEX IF NOT EXISTS audit_rows_external_id_idx ON audit_rows (external_id);
+CREATE INDEX IF NOT EXISTS audit_rows_message_idx ON audit_rows (message, created_at);
+CREATE INDEX IF NOT EXISTS audit_rows_created_at_idx ON audit_rows (created_at);
+
+-- Tabela de conteúdo externo: o FTS guarda só o índice, o texto fica em audit_rows
+CREATE VIRTUAL TABLE IF NOT EXISTS audit_fts USING fts5(
+    applicant, email, vacancy_title,
+    content='audit_rows', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS audit_rows_ai AFTER INSERT ON audit_rows BEGIN
+    INSERT INTO audit_fts (rowid, applicant, email, vacancy_title)
+    VALUES (new.id, new.applicant, new.email, new.vacancy_title);
+END;
+CREATE TRIGGER IF NOT EXISTS audit_rows_ad AFTER DELETE ON audit_rows BEGIN
+    INSERT INTO audit_fts (audit_fts, rowid, applicant, email, vacancy_title)
+    VALUES ('delete', old.id, old.applicant, old.email, old.vacancy_title);
+END;
+CREATE TRIGGER IF NOT EXISTS audit_rows_au AFTER UPDATE ON audit_rows BEGIN
+    INSERT INTO audit_fts (audit_fts, rowid, applicant, email, vacancy_title)
+    VALUES ('delete', old.id, old.applicant, old.email, old.vacancy_title);
+    INSERT INTO audit_fts (rowid, applicant, email, vacancy_title)
+    VALUES (new.id, new.applicant, new.email, new.vacancy_title);
+END;
+"""
+
+COLUMNS = (
+    'id', 'message', 'created_at', 'talent_id', 'external_id', 'branch_external_id',
+    'head_external_id', 'applicant', 'email', 'vacancy_title', 'recrutei_vacancy_id',
+    'details', 'mirrored_at'
+)
+
+UPSERT_SQL = f"""
+    INSERT INTO audit_rows ({', '.join(COLUMNS)})
+    VALUES ({', '.join('?' for _ in COLUMNS)})
+    ON CONFLICT (id) DO UPDATE SET
+        {', '.join(f"{column} = excluded.{column}" for column in COLUMNS[1:])}
+"""
+
+_mirror = None
+
+
+def _text(value):
+    """Valor do JSON → texto indexável (ids podem vir como número)"""
+    if value is None or isinstance(value, str):
+        return value
+    return str(value)
+
+
+def _external_id(office):
+    return _text(office.get('externalId')) if isinstance(office, dict) else None
+
+
+def mirror_row(row_id: int, message: str, details: dict) -> tuple:
+    """Linha do audit_log (details na projeção do exportador) → valores de COLUMNS"""
+    body = details.get('body') if isinstance(details.get('body'), dict) else {}
+    talent = body.get('talent') if isinstance(body.get('talent'), dict) else {}
+    user = talent.get('user') if isinstance(talent.get('user'), dict) else {}
+    # A projeção já resolve os offices; o resto cobre details completos
+    branch = _external_id(
+        details.get('branch_office') or details.get('branchOffice') or body.get('branchOffice')
+    )
+    head = _external_id(
+        details.get('head_office') or details.get('headOffice') or body.get('headOffice')
+    )
+    return (
+        row_id,
+        message,
+        details.get('created_at'),
+        _text(talent.get('id')),
+        # Mesma regra do RBAC: filial e, na falta dela, matriz
+        branch or head,
+        branch,
+        head,
+        _text(details.get('applicant') or user.get('name')),
+        _text(user.get('email')),
+        _text(details.get('vacancy_title')),
+        _text(details.get('recrutei_vacancy_id')),
+        json.dumps(details, ensure_ascii=False, separators=(',', ':')),
+        datetime.now(timezone.utc).isoformat()
+    )
+
+
+def connect(path: Path, create: bool = False) -> sqlite3.Connection:
+    """Abre o espelho (com create=True cria o arquivo e o schema)"""
+    path = Path(path)
+    if not create and not path.exists():
+        raise FileNotFoundError(f"Espelho {path} não existe (rode o exportador com --mirror)")
+    path.parent.mkdir(parents=True, exist_ok=True)
+    db = sqlite3.connect(path, check_same_thread=False)
+    db.row_factory = sqlite3.Row
+    # WAL: o lookup lê enquanto o exportador grava
+    db.execute("PRAGMA journal_mode = WAL")
+    db.execute("PRAGMA synchronous = NORMAL")
+    if create:
+        db.executescript(SCHEMA_SQL)
+    return db
+
+
+class Mirror:
+    """
+    Grava as linhas no espelho em lotes de MIRROR_BATCH
+
+    record() pode ser chamado de várias threads (fatias do backfill); cada
+    lote é uma transação.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.db = connect(self.path, create=True)
+        self.pending = []
+        self.rows = 0
+        self.seconds = 0.0
+        self.lock = threading.Lock()
+
+    def record(self, row_id: int, message: str, details: dict):
+        with self.lock:
+            self.pending.append(mirror_row(row_id, message, details))
+            if len(self.pending) >= MIRROR_BATCH:
+                self._flush()
+
+    def record_rows(self, rows: list):
+        """Grava linhas já montadas por mirror_row (decodificação paralela)"""
+        with self.lock:
+            self.pending.extend(rows)
+            if len(self.pending) >= MIRROR_BATCH:
+                self._flush()
+
+    def flush(self):
+        with self.lock:
+            self._flush()
+
+    def _flush(self):
+        if not self.pending:
+            return
+        start = time.perf_counter()
+        with self.db:
+            self.db.executemany(UPSERT_SQL, self.pending)
+        self.rows += len(self.pending)
+        self.pending = []
+        self.seconds += time.perf_counter() - start
+
+    def prune(self, days: int = RETENTION_DAYS) -> int:
+        """Remove linhas com created_at mais antigo que `days` dias"""
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
+        with self.lock, self.db:
+            return self.db.execute(
+                "DELETE FROM audit_rows WHERE created_at < ?", (cutoff,)
+            ).rowcount
+
+    def close(self):
+        self.flush()
+        pruned = self.prune()
+        self.db.close()
+        return pruned
+
+
+def open_mirror(path: Path) -> Mirror:
+    """Ativa o espelho: a partir daqui record() grava em `path`"""
+    global _mirror
+    _mirror = Mirror(path)
+    return _mirror
+
+
+def enabled() -> bool:
+    """Há um espelho ativo (--mirror)?"""
+    return _mirror is not None
+
+
+def record(row_id: int, message: str, details: dict):
+    """Grava uma linha no espelho ativo (no-op sem --mirror)"""
+    if _mirror is not None:
+        _mirror.record(row_id, message, details)
+
+
+def record_rows(rows: list):
+    """Grava no espelho ativo linhas já montadas por mirror_row"""
+    if _mirror is not None:
+        _mirror.record_rows(rows)
+
+
+def flush():
+    """Confirma o lote pendente (fim de cada exportação no --watch)"""
+    if _mirror is not None:
+        _mirror.flush()
+
+
+def close_mirror():
+    """Grava o que falta, aplica a retenção e fecha o espelho ativo"""
+    global _mirror
+    if _mirror is None:
+        return
+    mirror, _mirror = _mirror, None
+    pruned = mirror.close()
+    print(f"🪞 Espelho: {mirror.rows} linhas gravadas em {mirror.path} "
+          f"({mirror.seconds:.2f}s), {pruned} removidas (> {RETENTION_DAYS} dias)")
+
+
+# ========== CONSULTAS ==========
+
+
+def fts_query(text: str) -> str:
+    """Texto livre → consulta FTS5 (cada palavra como prefixo, todas obrigatórias)"""
+    words = [word.replace('"', '""') for word in text.split()]
+    return ' '.join(f'"{word}"*' for word in words if word)
+
+
+def search(db: sqlite3.Connection, text: str = None, row_id: int = None,
+           talent_id: str = None, external_id: str = None, message: str = None,
+           limit: int = 20) -> list:
+    """
+    Linhas do espelho que atendem a todos os filtros (mais recentes primeiro)
+
+    `text` usa o índice FTS5 (nome, e-mail, vaga); os demais, as colunas
+    indexadas.
+    """
+    conditions, params = [], []
+    source = "audit_rows r"
+    if text:
+        source += " JOIN audit_fts ON audit_fts.rowid = r.id"
+        conditions.append("audit_fts MATCH ?")
+        params.append(fts_query(text))
+    for column, value in (('r.id', row_id), ('r.talent_id', talent_id),
+                          ('r.external_id', external_id), ('r.message', message)):
+        if value is not None:
+            conditions.append(f"{column} = ?")
+            params.append(value)
+
+    query = f"SELECT r.* FROM {source}"
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+    query += " ORDER BY r.created_at DESC, r.id DESC LIMIT ?"
+    params.append(limit)
+    return [dict(row) for row in db.execute(query, params)]
+
+
+def save_rows(path: Path, rows) -> int:
+    """Grava no espelho linhas (id, message, details) vindas do banco"""
+    mirror = Mirror(path)
+    for row_id, message, details in rows:
+        mirror.record(row_id, message, details)
+    mirror.flush()
+    mirror.db.close()
+    return mirror.rows
@@ -1,6 +1,21 @@
 // Global state
 let allApplicants = [];
 let groupedVacancies = new Map();
+// Índice de vagas pré-computado pelo exportador (data/vacancy-index.json)
+let vacancyIndex = null;
+// Dataset completo carregado (null quando vieram só shards), shards carregados
+// ({ entry, rows } do manifest) e índices de busca ({ index, rows } por fonte)
+let fullDataset = null;
+let loadedShards = null;
+let searchSources = null;
+let searchIndexPromise = null;
+// Manifest de versão publicado (data/version.json): URLs com hash no nome
+let publishedVersion = null;
+// created_at de cada candidato em epoch (ms), já calculado pelo exportador
+// no índice de vagas (created_at_ms): ordenar e formatar sem parsear ISO
+let createdAtMs = new WeakMap();
+// Candidatos encontrados pelo índice para a busca atual (null = filtro linear)
+let currentMatches = null;
 let currentSearchQuery = '';
 let isExtensionMode = false;
 
@@ -78,20 +93,70 @@ if (isExtensionSupported) {
 // Load applicants data dynamically with cache busting
 async function loadApplicants() {
     try {
-        // Cache busting: adicionar timestamp
-        console.log('🔄 Buscando applicants.json atualizado...');
-        const response = await fetch(`applicants.json?v=${new Date().getTime()}`);
+        // Versão publicada (poucos bytes): vira o cache buster dos demais
+        // arquivos, que só são baixados de novo quando a versão muda
+        publishedVersion = await loadVersionManifest();
+        const cacheBuster = publishedVersion
+            ? publishedVersion.version.slice(0, 16)
+            : new Date().getTime();
+
+        // Usuários restritos baixam apenas os shards das suas filiais
+        let data = await loadAllowedShards(cacheBuster);
+        const fromShards = Boolean(data);
+
+        // O índice aponta para posições do dataset completo (não vale para shards)
+        const indexPromise = fromShards ? Promise.resolve(null) : loadVacancyIndex(cacheBuster);
+
+        // Cópia local na versão publicada: nada mais a baixar. Mais antiga:
+        // aplica os deltas; sem cópia, baixa o dataset completo
+        const cached = fromShards ? null : await readCachedDataset();
+        let deltaIndex = null;
+        if (cached && publishedVersion && cached.version === publishedVersion.version) {
+            console.log(`💾 Dataset local já está na versão publicada (${cached.data.length} candidatos)`);
+            data = cached.data;
+        } else if (!fromShards) {
+            deltaIndex = await loadDeltaIndex(cacheBuster);
+            if (cached && deltaIndex) {
+                data = await loadFromDeltas(deltaIndex, cached);
+            }
+        }
+        const fromCache = Boolean(data) && !fromShards;
 
-        if (!response.ok) {
-            throw new Error(`Falha ao carregar dados: ${response.status} ${response.statusText}`);
+        if (!data) {
+            data = await loadPublishedDataset(cacheBuster);
         }
 
-        const data = await response.json();
+        if (!data) {
+            console.log('🔄 Buscando applicants.json atualizado...');
+            const response = await fetch(`applicants.json?v=${cacheBuster}`);
+
+            if (!response.ok) {
+                throw new Error(`Falha ao carregar dados: ${response.status} ${response.statusText}`);
+            }
+
+            data = await response.json();
+        }
 
         if (!Array.isArray(data)) {
             throw new Error('APPLICANTS_DATA (json) não é um array');
         }
 
+        // Guarda o dataset completo para a próxima visita aplicar só os deltas
+        const published = publishedVersion || deltaIndex;
+        if (published && !fromCache && data.length === published.count) {
+            storeCachedDataset(published.version, data);
+        }
+
+        const index = await indexPromise;
+        vacancyIndex = index && index.count === data.length ? index : null;
+        createdAtMs = new WeakMap();
+        if (vacancyIndex?.created_at_ms) {
+            data.forEach((applicant, position) => {
+                createdAtMs.set(applicant, vacancyIndex.created_at_ms[position]);
+            });
+        }
+        fullDataset = fromShards ? null : data;
+
         // Filtrar candidatos baseados nas permissões do usuário
         allApplicants = data.filter(applicant => AuthService.canViewApplicant(applicant));
 
@@ -105,7 +170,7 @@ async function loadApplicants() {
             }
         }
 
-        groupApplicantsByVacancy();
+        groupApplicantsByVacancy(data);
         renderVacancies();
     } catch (error) {
         console.error('Erro ao carregar candidatos:', error);
@@ -121,10 +186,334 @@ async function loadApplicants() {
     }
 }
 
+/**
+ * Lê data/version.json: versão (hash do conteúdo), total, data de geração e
+ * as URLs com hash dos artefatos. Sempre revalida com o servidor (resposta
+ * 304 quando nada mudou). Retorna null se não houver.
+ */
+async function loadVersionManifest() {
+    try {
+        const response = await fetch('data/version.json', { cache: 'no-cache' });
+        if (!response.ok) return null;
+
+        const manifest = await response.json();
+        return manifest.format === 'atrio-version-v2' ? manifest : null;
+    } catch (error) {
+        console.warn('⚠️ Falha ao ler data/version.json, usando cache buster por timestamp', error);
+        return null;
+    }
+}
+
+/**
+ * Busca um arquivo publicado: pela URL com hash do manifest de versão (nunca
+ * muda, então pode vir do cache HTTP sem revalidar) ou, sem ela, pelo nome
+ * fixo com cache buster.
+ */
+function fetchPublished(hashedFile, file, cacheBuster) {
+    if (hashedFile) {
+        return fetch(hashedFile, { cache: 'force-cache' });
+    }
+    return fetch(`${file}?v=${cacheBuster}`);
+}
+
+/**
+ * Baixa a menor variante publicada que o navegador sabe decodificar,
+ * conforme o manifest de versão (URLs com hash) ou data/artifacts.json (JSON
+ * minificado ou compacto, sem compressão, .gz ou .br). Retorna null para
+ * usar o applicants.json.
+ */
+async function loadPublishedDataset(cacheBuster) {
+    try {
+        let artifacts = publishedVersion?.artifacts;
+        if (!artifacts) {
+            const response = await fetch(`data/artifacts.json?v=${cacheBuster}`);
+            if (!response.ok) return null;
+            artifacts = (await response.json()).artifacts;
+        }
+
+        return await fetchSmallestVariant(artifacts, publishedVersion ? null : cacheBuster);
+    } catch (error) {
+        console.warn('⚠️ Falha ao ler data/artifacts.json, usando applicants.json', error);
+        return null;
+    }
+}
+
+/**
+ * Baixa a menor variante (sem compressão, .gz ou .br) que o navegador sabe
+ * decodificar, tentando a próxima em caso de falha. null se nenhuma servir.
+ */
+async function fetchSmallestVariant(artifacts, cacheBuster) {
+    const candidates = (artifacts || [])
+        .filter(artifact => isEncodingSupported(artifact.encoding))
+        .sort((a, b) => a.bytes - b.bytes);
+
+    for (const artifact of candidates) {
+        try {
+            const data = await fetchArtifact(artifact, cacheBuster);
+            console.log(`📦 ${artifact.file} carregado (${(artifact.bytes / 1024).toFixed(1)} KB)`);
+            return data;
+        } catch (error) {
+            console.warn(`⚠️ Falha ao carregar ${artifact.file}, tentando próxima variante`, error);
+        }
+    }
+    return null;
+}
+
+/**
+ * Lê data/deltas/index.json: versão publicada (hash do conteúdo), total de
+ * candidatos e a cadeia de deltas recentes. Retorna null se não houver.
+ */
+async function loadDeltaIndex(cacheBuster) {
+    try {
+        const response = await fetch(`data/deltas/index.json?v=${cacheBuster}`);
+        if (!response.ok) return null;
+
+        const index = await response.json();
+        return index.format === 'atrio-deltas-v1' ? index : null;
+    } catch (error) {
+        console.warn('⚠️ Falha ao ler data/deltas/index.json, baixando o dataset completo', error);
+        return null;
+    }
+}
+
+/**
+ * Atualiza a cópia local `cached` (IndexedDB) até a versão publicada
+ * aplicando os deltas da cadeia. Retorna null (baixar tudo) se ela for mais
+ * antiga que a cadeia ou em qualquer falha.
+ */
+async function loadFromDeltas(deltaIndex, cached) {
+    try {
+        if (cached.version === deltaIndex.version) {
+            console.log(`💾 Dataset local já está na versão publicada (${cached.data.length} candidatos)`);
+            return cached.data;
+        }
+
+        const chain = deltaIndex.chain || [];
+        const start = chain.findIndex(entry => entry.from === cached.version);
+        if (start < 0) {
+            console.log('🔄 Cópia local antiga demais para os deltas, baixando o dataset completo...');
+            return null;
+        }
+
+        let data = cached.data;
+        for (const entry of chain.slice(start)) {
+            // Nome imutável (versão de origem e destino): pode vir do cache HTTP
+            const response = await fetch(entry.file);
+            if (!response.ok) {
+                throw new Error(`Falha ao carregar ${entry.file}: ${response.status}`);
+            }
+            data = applyDelta(data, await response.json());
+        }
+
+        if (data.length !== deltaIndex.count) {
+            throw new Error(`Delta gerou ${data.length} candidatos, esperado ${deltaIndex.count}`);
+        }
+
+        const bytes = chain.slice(start).reduce((total, entry) => total + entry.bytes, 0);
+        console.log(`🧬 ${chain.length - start} delta(s) aplicado(s) (${(bytes / 1024).toFixed(1)} KB)`);
+        storeCachedDataset(deltaIndex.version, data);
+        return data;
+    } catch (error) {
+        console.warn('⚠️ Falha ao aplicar deltas, baixando o dataset completo', error);
+        return null;
+    }
+}
+
+/**
+ * Aplica um delta do exportador (DeltaWriter): remove as posições `delete`
+ * da versão anterior e insere cada [posição, candidato] de `insert`, em
+ * ordem crescente. O resultado tem exatamente a ordem publicada.
+ */
+function applyDelta(data, delta) {
+    if (delta?.format !== 'atrio-delta-v1') {
+        throw new Error('Formato de delta desconhecido');
+    }
+
+    const removed = new Set(delta.delete);
+    const result = data.filter((_, position) => !removed.has(position));
+    delta.insert.forEach(([position, applicant]) => {
+        result.splice(position, 0, applicant);
+    });
+    return result;
+}
+
+// Cópia local do dataset completo (uma única entrada: versão + candidatos)
+const DATASET_DB = 'atrio-dataset';
+const DATASET_STORE = 'dataset';
+
+function openDatasetDb() {
+    return new Promise((resolve, reject) => {
+        if (typeof indexedDB === 'undefined') {
+            reject(new Error('IndexedDB indisponível'));
+            return;
+        }
+        const request = indexedDB.open(DATASET_DB, 1);
+        request.onupgradeneeded = () => request.result.createObjectStore(DATASET_STORE);
+        request.onsuccess = () => resolve(request.result);
+        request.onerror = () => reject(request.error);
+    });
+}
+
+async function readCachedDataset() {
+    try {
+        const db = await openDatasetDb();
+        return await new Promise((resolve, reject) => {
+            const request = db.transaction(DATASET_STORE).objectStore(DATASET_STORE).get('current');
+            request.onsuccess = () => resolve(request.result || null);
+            request.onerror = () => reject(request.error);
+        });
+    } catch (error) {
+        console.warn('⚠️ Cópia local do dataset indisponível', error);
+        return null;
+    }
+}
+
+async function storeCachedDataset(version, data) {
+    try {
+        const db = await openDatasetDb();
+        db.transaction(DATASET_STORE, 'readwrite')
+            .objectStore(DATASET_STORE)
+            .put({ version, data }, 'current');
+    } catch (error) {
+        console.warn('⚠️ Não foi possível guardar a cópia local do dataset', error);
+    }
+}
+
+// Nome do formato no DecompressionStream para cada encoding do manifest
+const DECOMPRESSION_FORMATS = { gzip: 'gzip', br: 'brotli' };
+
+function isEncodingSupported(encoding) {
+    if (encoding === 'identity') return true;
+
+    const format = DECOMPRESSION_FORMATS[encoding];
+    if (!format || typeof DecompressionStream === 'undefined') return false;
+
+    try {
+        new DecompressionStream(format);
+        return true;
+    } catch (error) {
+        return false;
+    }
+}
+
+async function fetchArtifact(artifact, cacheBuster) {
+    // Sem cache buster: arquivo com hash no nome (manifest de versão)
+    const response = cacheBuster
+        ? await fetch(`${artifact.file}?v=${cacheBuster}`)
+        : await fetch(artifact.file, { cache: 'force-cache' });
+    if (!response.ok) {
+        throw new Error(`${response.status} ${response.statusText}`);
+    }
+
+    let payload;
+    if (artifact.encoding === 'identity') {
+        payload = await response.json();
+    } else {
+        const stream = response.body.pipeThrough(
+            new DecompressionStream(DECOMPRESSION_FORMATS[artifact.encoding])
+        );
+        payload = await new Response(stream).json();
+    }
+
+    return artifact.format === 'compact' ? decodeCompactPayload(payload) : payload;
+}
+
+/**
+ * Decodifica o formato compacto gerado pelo exportador (CompactWriter):
+ * branch_office/head_office são índices na tabela `offices`.
+ * Candidatos da mesma filial compartilham o mesmo objeto office.
+ */
+function decodeCompactPayload(payload) {
+    if (payload?.format !== 'atrio-compact-v1' || !Array.isArray(payload.applicants)) {
+        throw new Error('Formato compacto desconhecido');
+    }
+
+    const offices = payload.offices || [];
+    return payload.applicants.map(applicant => ({
+        ...applicant,
+        branch_office: applicant.branch_office == null ? null : offices[applicant.branch_office],
+        head_office: applicant.head_office == null ? null : offices[applicant.head_office]
+    }));
+}
+
+/**
+ * Baixa o índice de vagas (títulos ordenados em pt-BR e posições dos
+ * candidatos já em ordem). Retorna null para agrupar/ordenar no navegador.
+ */
+async function loadVacancyIndex(cacheBuster) {
+    try {
+        const response = await fetchPublished(
+            publishedVersion?.vacancy_index, 'data/vacancy-index.json', cacheBuster
+        );
+        if (!response.ok) return null;
+
+        const index = await response.json();
+        return index.format === 'atrio-vacancy-index-v1' ? index : null;
+    } catch (error) {
+        console.warn('⚠️ Falha ao carregar índice de vagas, agrupando no navegador', error);
+        return null;
+    }
+}
+
+/**
+ * Baixa apenas os shards (por externalId) que o usuário pode ver.
+ * Retorna null para usar o applicants.json completo (superusuário,
+ * manifest ausente ou qualquer falha).
+ */
+async function loadAllowedShards(cacheBuster) {
+    const allowed = AuthService.state.allowedCompanies;
+    if (AuthService.state.isSuperUser || !allowed || allowed.size === 0) {
+        return null;
+    }
+
+    try {
+        const response = await fetch(`data/shards/manifest.json?v=${cacheBuster}`);
+        if (!response.ok) return null;
+
+        const manifest = await response.json();
+        const entries = Array.from(allowed)
+            .map(externalId => manifest.shards?.[externalId])
+            .filter(entry => entry?.file);
+
+        console.log(`🧩 Baixando ${entries.length} shard(s) de ${allowed.size} filial(is) permitida(s)...`);
+
+        const shards = await Promise.all(entries.map(async entry => {
+            const shardResponse = await fetch(`${entry.file}?v=${cacheBuster}`);
+            if (!shardResponse.ok) {
+                throw new Error(`Falha ao carregar ${entry.file}: ${shardResponse.status}`);
+            }
+            return shardResponse.json();
+        }));
+
+        // Cada shard tem o seu índice de busca (posições dentro do shard)
+        loadedShards = entries.map((entry, i) => ({ entry, rows: shards[i], cacheBuster }));
+
+        // Shards vêm separados por filial: restaurar ordem (mais recentes primeiro)
+        return shards.flat().sort((a, b) =>
+            (b.created_at || '').localeCompare(a.created_at || '')
+        );
+    } catch (error) {
+        console.warn('⚠️ Falha ao carregar shards, usando applicants.json completo', error);
+        return null;
+    }
+}
+
 // Group applicants by vacancy_title
-function groupApplicantsByVacancy() {
+function groupApplicantsByVacancy(data) {
     groupedVacancies.clear();
 
+    // Índice do exportador: vagas já ordenadas e candidatos já em ordem
+    if (vacancyIndex) {
+        const visible = new Set(allApplicants);
+        vacancyIndex.vacancies.forEach(({ title, positions }) => {
+            const applicants = positions.map(position => data[position]).filter(a => visible.has(a));
+            if (applicants.length > 0) {
+                groupedVacancies.set(title, applicants);
+            }
+        });
+        return;
+    }
+
     allApplicants.forEach(applicant => {
         const vacancyTitle = applicant.vacancy_title || 'Vaga Desconhecida';
 
@@ -150,10 +539,10 @@ function renderVacancies() {
     noResults.style.display = 'none';
     container.innerHTML = '';
 
-    // Sort vacancies alphabetically
-    const sortedVacancies = Array.from(groupedVacancies.entries()).sort((a, b) =>
-        a[0].localeCompare(b[0])
-    );
+    // Sort vacancies alphabetically (já vêm ordenadas quando há índice)
+    const sortedVacancies = vacancyIndex
+        ? Array.from(groupedVacancies.entries())
+        : Array.from(groupedVacancies.entries()).sort((a, b) => a[0].localeCompare(b[0]));
 
     sortedVacancies.forEach(([vacancyTitle, applicants]) => {
         const vacancyGroup = createVacancyGroup(vacancyTitle, applicants);
@@ -211,12 +600,10 @@ function createVacancyGroup(vacancyTitle, applicants) {
     // Table body
     const tbody = document.createElement('tbody');
 
-    // Sort applicants by created_at (newest first)
-    const sortedApplicants = [...filteredApplicants].sort((a, b) => {
-        const dateA = new Date(a.body?.created_at || 0);
-        const dateB = new Date(b.body?.created_at || 0);
-        return dateB - dateA;
-    });
+    // Sort applicants by created_at (newest first; já vêm ordenados quando há índice)
+    const sortedApplicants = vacancyIndex
+        ? filteredApplicants
+        : [...filteredApplicants].sort((a, b) => (applicantTime(b) || 0) - (applicantTime(a) || 0));
 
     sortedApplicants.forEach(applicant => {
         const row = createCandidateRow(applicant);
@@ -245,7 +632,7 @@ function createCandidateRow(applicant) {
     const location = applicant.body?.talent?.address?.location || 'N/D';
     const email = applicant.body?.talent?.user?.email || 'N/D';
     const telephone = applicant.body?.talent?.telephone || 'N/D';
-    const createdAt = formatDate(applicant.body?.created_at) || 'N/D';
+    const createdAt = formatDate(applicantTime(applicant)) || 'N/D';
 
     row.innerHTML = `
         <td data-label="Candidato">
@@ -330,35 +717,148 @@ function setupSearch() {
     const searchInput = document.getElementById('searchInput');
     let searchTimeout;
 
+    // Índice de busca só é baixado quando o usuário vai pesquisar
+    searchInput.addEventListener('focus', ensureSearchIndex, { once: true });
+
     searchInput.addEventListener('input', (e) => {
         clearTimeout(searchTimeout);
 
-        searchTimeout = setTimeout(() => {
-            currentSearchQuery = e.target.value.trim().toLowerCase();
+        searchTimeout = setTimeout(async () => {
+            const query = e.target.value.trim().toLowerCase();
+            await ensureSearchIndex();
+
+            // Ignorar resultado se o usuário digitou de novo enquanto o índice carregava
+            if (query !== e.target.value.trim().toLowerCase()) return;
+
+            currentSearchQuery = query;
+            currentMatches = findIndexedMatches(query);
             filterAndRender();
         }, 300); // Debounce for 300ms
     });
 }
 
+// Minúsculas e sem acentos ("Conceição" → "conceicao"), igual ao fold_text do exportador
+function foldText(text) {
+    return String(text).normalize('NFD').replace(/\p{M}/gu, '').toLowerCase();
+}
+
+// Mesmos campos de searchable_fields no exportador (os indexados)
+function searchableText(applicant) {
+    return [
+        applicant.applicant,
+        applicant.vacancy_title,
+        applicant.body?.talent?.user?.email,
+        applicant.body?.talent?.user?.city
+    ].filter(Boolean).join(' ');
+}
+
+// Regra única da busca (com ou sem índice): a consulta inteira, sem acentos,
+// como substring dos campos pesquisáveis
+function matchesQuery(applicant, foldedQuery) {
+    return foldText(searchableText(applicant)).includes(foldedQuery);
+}
+
+/**
+ * Baixa os índices de busca uma única vez (carregamento preguiçoso): o
+ * global (menor variante .br/.gz do manifest de versão) para o dataset
+ * completo, ou um por shard para quem baixou só shards.
+ */
+function ensureSearchIndex() {
+    if (!searchIndexPromise) {
+        searchIndexPromise = loadSearchSources()
+            .then(sources => {
+                searchSources = sources;
+            })
+            .catch(error => {
+                console.warn('⚠️ Falha ao carregar índice de busca, usando filtro linear', error);
+            });
+    }
+    return searchIndexPromise;
+}
+
+async function loadSearchSources() {
+    const isSearchIndex = (index, rows) => index?.format === 'atrio-search-v1' && index.count === rows.length;
+
+    if (fullDataset) {
+        let index;
+        if (publishedVersion?.search_index) {
+            index = await fetchSmallestVariant(publishedVersion.search_index, null);
+        } else {
+            const response = await fetch(`data/search-index.json?v=${new Date().getTime()}`);
+            index = response.ok ? await response.json() : null;
+        }
+        return isSearchIndex(index, fullDataset) ? [{ index, rows: fullDataset }] : null;
+    }
+
+    if (loadedShards) {
+        const sources = await Promise.all(loadedShards.map(async ({ entry, rows, cacheBuster }) => {
+            if (!entry.search) return null;
+            const response = await fetch(`${entry.search}?v=${cacheBuster}`);
+            const index = response.ok ? await response.json() : null;
+            return isSearchIndex(index, rows) ? { index, rows } : null;
+        }));
+        // Um shard sem índice invalida a busca indexada (resultados incompletos)
+        return sources.every(Boolean) ? sources : null;
+    }
+    return null;
+}
+
+/**
+ * Busca pelo índice invertido: os trigramas das palavras com 3+ letras são
+ * intersectados em cada fonte (dataset completo ou shard) e os candidatos
+ * conferidos com matchesQuery, a mesma regra do filtro linear. Retorna null
+ * quando o índice não se aplica (sem índice ou só palavras curtas).
+ */
+function findIndexedMatches(query) {
+    if (!query || !searchSources) return null;
+
+    const foldedQuery = foldText(query);
+    const words = (foldedQuery.match(/[\p{L}\p{N}]+/gu) || []).filter(word => word.length >= 3);
+    if (words.length === 0) return null;
+
+    const tokens = new Set();
+    words.forEach(word => {
+        for (let i = 0; i + 3 <= word.length; i++) {
+            tokens.add(word.slice(i, i + 3));
+        }
+    });
+
+    const matches = new Set();
+    for (const { index, rows } of searchSources) {
+        let candidates = null;
+        for (const token of tokens) {
+            const postings = Object.prototype.hasOwnProperty.call(index.tokens, token)
+                ? index.tokens[token]
+                : [];
+            candidates = candidates === null
+                ? new Set(postings)
+                : new Set(postings.filter(position => candidates.has(position)));
+            if (candidates.size === 0) break;
+        }
+
+        candidates.forEach(position => {
+            const applicant = rows[position];
+            if (matchesQuery(applicant, foldedQuery)) {
+                matches.add(applicant);
+            }
+        });
+    }
+    return matches;
+}
+
 // Filter applicants based on search query
 function filterApplicants(applicants) {
     if (!currentSearchQuery) {
         return applicants;
     }
 
-    return applicants.filter(applicant => {
-        const applicantName = (applicant.applicant || '').toLowerCase();
-        const email = (applicant.body?.talent?.user?.email || '').toLowerCase();
-        const location = (applicant.body?.talent?.address?.location || '').toLowerCase();
-        const telephone = (applicant.body?.talent?.telephone || '').toLowerCase();
-        const vacancyTitle = (applicant.vacancy_title || '').toLowerCase();
+    if (currentMatches) {
+        return applicants.filter(applicant => currentMatches.has(applicant));
+    }
 
-        return applicantName.includes(currentSearchQuery) ||
-            email.includes(currentSearchQuery) ||
-            location.includes(currentSearchQuery) ||
-            telephone.includes(currentSearchQuery) ||
-            vacancyTitle.includes(currentSearchQuery);
-    });
+    // Sem índice: filtro linear (mesma regra)
+    const foldedQuery = foldText(currentSearchQuery);
+    return applicants.filter(applicant => matchesQuery(applicant, foldedQuery));
 }
 
 // Filter and re-render vacancies
@@ -372,26 +872,79 @@ function highlightText(text) {
         return escapeHtml(text);
     }
 
-    const escapedText = escapeHtml(text);
-    const regex = new RegExp(`(${escapeRegex(currentSearchQuery)})`, 'gi');
-    return escapedText.replace(regex, '<span class="highlight">$1</span>');
+    text = String(text);
+    let html = '';
+    let position = 0;
+    for (const [start, end] of highlightRanges(text, foldText(currentSearchQuery))) {
+        if (start < position) continue;
+        html += escapeHtml(text.slice(position, start))
+            + `<span class="highlight">${escapeHtml(text.slice(start, end))}</span>`;
+        position = end;
+    }
+    return html + escapeHtml(text.slice(position));
 }
 
-// Format date
-function formatDate(dateString) {
-    if (!dateString) return null;
+/**
+ * Trechos [início, fim) de `text` que casam com a busca pela mesma regra de
+ * matchesQuery (foldText: "joao" casa com "João"). Cada caractere é dobrado
+ * sozinho e guarda a sua posição no original, então os trechos achados no
+ * texto dobrado voltam para o texto original.
+ */
+function highlightRanges(text, foldedQuery) {
+    let folded = '';
+    const starts = [];
+    const ends = [];
+    let offset = 0;
+    for (const char of text) {
+        const piece = foldText(char);
+        folded += piece;
+        for (let i = 0; i < piece.length; i++) {
+            starts.push(offset);
+            ends.push(offset + char.length);
+        }
+        offset += char.length;
+    }
+
+    const ranges = [];
+    let from = 0;
+    while (foldedQuery) {
+        const index = folded.indexOf(foldedQuery, from);
+        if (index === -1) break;
+        ranges.push([starts[index], ends[index + foldedQuery.length - 1]]);
+        from = index + foldedQuery.length;
+    }
+    return ranges;
+}
+
+/**
+ * created_at do candidato em epoch (ms): do índice de vagas quando houver,
+ * senão parseado do ISO (shards ou índice ausente). null se ausente/inválido.
+ */
+function applicantTime(applicant) {
+    const cached = createdAtMs.get(applicant);
+    if (cached !== undefined) return cached;
+
+    const parsed = applicant.created_at ? Date.parse(applicant.created_at) : NaN;
+    return Number.isNaN(parsed) ? null : parsed;
+}
+
+// Formatador reutilizado por todas as linhas (toLocaleDateString recria a cada chamada)
+const DATE_FORMAT = new Intl.DateTimeFormat('pt-BR', {
+    year: 'numeric',
+    month: 'short',
+    day: 'numeric',
+    hour: '2-digit',
+    minute: '2-digit'
+});
+
+// Format date (epoch em ms)
+function formatDate(timestamp) {
+    if (timestamp === null || timestamp === undefined) return null;
 
     try {
-        const date = new Date(dateString);
-        return date.toLocaleDateString('pt-BR', {
-            year: 'numeric',
-            month: 'short',
-            day: 'numeric',
-            hour: '2-digit',
-            minute: '2-digit'
-        });
+        return DATE_FORMAT.format(timestamp);
     } catch (error) {
-        return dateString;
+        return null;
     }
 }
 
@@ -403,11 +956,6 @@ function escapeHtml(text) {
     return div.innerHTML;
 }
 
-// Escape regex special characters
-function escapeRegex(string) {
-    return string.replace(/[.*+?^${}()|[\]\\]/g, '\\$&');
-}
-
 function copyWithExecCommand(text) {
     const textarea = document.createElement('textarea');
     textarea.value = text;
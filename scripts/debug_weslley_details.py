@@ -1,30 +1,16 @@
-import os
 import json
-import psycopg2
-from dotenv import load_dotenv
+import sys
+from pathlib import Path
 
-load_dotenv()
-
-DB_HOST = os.getenv("DB_HOST")
-DB_PORT = os.getenv("DB_PORT")
-DB_USER = os.getenv("DB_USER")
-DB_NAME = os.getenv("DB_NAME")
-DB_PASSWORD = os.getenv("DB_PASSWORD")
+# Camada de conexão compartilhada (database.py na raiz do projeto)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import database
 
 def debug_specific_record():
     # ID tentado ler da imagem (pode estar errado, mas vou tentar buscar pelo nome Weslley com filtro exato)
     print("SEARCHING SPECIFIC WESLLEY RECORD...")
     
     try:
-        conn = psycopg2.connect(
-            host=DB_HOST,
-            port=DB_PORT,
-            user=DB_USER,
-            dbname=DB_NAME,
-            password=DB_PASSWORD
-        )
-        cursor = conn.cursor()
-        
         # Buscar APENAS registros com "Weslley" E "Candidato vinculado"
         query = """
             SELECT id, message, details, created_at
@@ -35,8 +21,7 @@ def debug_specific_record():
             LIMIT 1
         """
         
-        cursor.execute(query)
-        row = cursor.fetchone()
+        row = database.run_query(query, fetch='one')
         
         if row:
             print(f"✅ FOUND RECORD:")
@@ -63,12 +48,12 @@ def debug_specific_record():
             print(json.dumps(details, indent=2))
         else:
             print("❌ No record found for Weslley with message 'Candidato vinculado'")
-            
-        cursor.close()
-        conn.close()
         
     except Exception as e:
         print(f"Error: {e}")
+    finally:
+        database.print_stats()
+        database.close_pool()
 
 if __name__ == "__main__":
     debug_specific_record()
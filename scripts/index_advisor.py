@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Consultor de índices - audit_log
+
+Roda EXPLAIN (ANALYZE, BUFFERS) nas consultas reais do exportador (janela,
+incremental e fatia de backfill) e na busca por texto dos scripts de debug,
+mostrando seq scans, custo estimado, tempo e buffers lidos.
+
+Gera os índices sugeridos (parcial em created_at para 'Candidato vinculado'
+e trigram/GIN em details::text); com --apply cria os índices
+(CREATE INDEX CONCURRENTLY, sem bloquear inserts) e reexecuta os planos para
+confirmar que passaram a ser usados.
+
+Uso:
+    python scripts/index_advisor.py                 # relatório + DDL sugerido
+    python scripts/index_advisor.py --no-analyze    # só EXPLAIN (não executa as consultas)
+    python scripts/index_advisor.py --write migrations/002_audit_log_indexes.sql
+    python scripts/index_advisor.py --apply         # cria os índices e reverifica
+"""
+
+import argparse
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import psycopg2
+import psycopg2.errors
+
+# Camada de conexão e consultas do exportador (raiz do projeto)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import database
+import export_from_supabase as exporter
+
+TABLE = f"{exporter.SCHEMA_NAME}.{exporter.TABLE_NAME}"
+
+# Índice parcial: só as linhas do exportador, já na ordem do ORDER BY / marca d'água
+WINDOW_INDEX = f"{exporter.TABLE_NAME}_candidato_vinculado_created_at_idx"
+# Trigram sobre o texto do JSON: atende details::text ILIKE '%...%'
+DETAILS_INDEX = f"{exporter.TABLE_NAME}_details_trgm_idx"
+
+# Busca por texto usada nos scripts de debug
+DETAILS_LOOKUP_SQL = f"""
+    SELECT id, message, created_at
+    FROM {TABLE}
+    WHERE {exporter.DETAILS_COLUMN}::text ILIKE %(pattern)s
+    ORDER BY id DESC
+    LIMIT 5
+"""
+
+
+def index_statements() -> list:
+    """(nome_do_índice, DDL) dos índices sugeridos, na ordem de criação"""
+    message = exporter.MESSAGE_FILTER.replace("'", "''")
+    return [
+        (WINDOW_INDEX, f"""CREATE INDEX CONCURRENTLY IF NOT EXISTS {WINDOW_INDEX}
+    ON {TABLE} (created_at, id)
+    WHERE message = '{message}' AND {exporter.DETAILS_COLUMN} IS NOT NULL;"""),
+        (None, "CREATE EXTENSION IF NOT EXISTS pg_trgm;"),
+        (DETAILS_INDEX, f"""CREATE INDEX CONCURRENTLY IF NOT EXISTS {DETAILS_INDEX}
+    ON {TABLE} USING gin (({exporter.DETAILS_COLUMN}::text) gin_trgm_ops);"""),
+    ]
+
+
+def migration_sql() -> str:
+    """Migração com os índices sugeridos (fora de transação: CONCURRENTLY)"""
+    lines = [
+        "-- ============================================================",
+        "-- Atrio - Índices do audit_log (gerado por scripts/index_advisor.py)",
+        "-- ============================================================",
+        "-- CONCURRENTLY não bloqueia inserts, mas não roda dentro de transação:",
+        "--     psql \"$DATABASE_URL\" -f migrations/002_audit_log_indexes.sql",
+        "--",
+        "-- Reverter:",
+        f"--     DROP INDEX CONCURRENTLY IF EXISTS {exporter.SCHEMA_NAME}.{WINDOW_INDEX};",
+        f"--     DROP INDEX CONCURRENTLY IF EXISTS {exporter.SCHEMA_NAME}.{DETAILS_INDEX};",
+        "-- ============================================================",
+        "",
+        "-- Janela / incremental / backfill do exportador",
+    ]
+    for name, statement in index_statements():
+        if name is None:
+            # pg_trgm abre a seção do índice de busca por texto
+            lines += ["", "-- Busca por texto em details (ILIKE '%...%')"]
+        lines.append(statement)
+    return "\n".join(lines) + "\n"
+
+
+def advisor_queries() -> list:
+    """(rótulo, query, params, índice_esperado) analisados pelo consultor"""
+    now = datetime.now(timezone.utc)
+    watermark = exporter.load_watermark(exporter.JSON_FILE) or {
+        'created_at': (now - timedelta(hours=1)).isoformat()
+    }
+
+    window_sql, window_params = exporter.build_fetch_query()
+    incremental_sql, incremental_params = exporter.build_fetch_query(watermark)
+    slice_sql, slice_params = exporter.build_fetch_query(
+        time_range=(now - timedelta(hours=exporter.BACKFILL_SLICE_HOURS), now)
+    )
+    return [
+        ("Janela (--full)", window_sql, window_params, WINDOW_INDEX),
+        ("Incremental (marca d'água)", incremental_sql, incremental_params, WINDOW_INDEX),
+        ("Fatia de backfill", slice_sql, slice_params, WINDOW_INDEX),
+        ("Busca em details (ILIKE)", DETAILS_LOOKUP_SQL, {'pattern': '%Weslley%'}, DETAILS_INDEX),
+    ]
+
+
+def walk_plan(node: dict):
+    """Percorre a árvore do plano (nó e filhos)"""
+    yield node
+    for child in node.get('Plans', []):
+        yield from walk_plan(child)
+
+
+def explain(query: str, params: dict, analyze: bool, timeout_ms: int) -> dict:
+    """EXPLAIN (FORMAT JSON) da query; retorna o primeiro item do plano"""
+    options = "ANALYZE, BUFFERS, FORMAT JSON" if analyze else "FORMAT JSON"
+    row = database.run_query(f"EXPLAIN ({options}) {query}", params, fetch='one',
+                             statement_timeout_ms=timeout_ms)
+    return row[0][0]
+
+
+def summarize(result: dict) -> dict:
+    """Seq scans no audit_log, índices usados, custo, tempo e buffers"""
+    plan = result['Plan']
+    nodes = list(walk_plan(plan))
+    return {
+        'cost': plan['Total Cost'],
+        'time_ms': result.get('Execution Time'),
+        'seq_scans': [node for node in nodes
+                      if node['Node Type'] == 'Seq Scan'
+                      and node.get('Relation Name') == exporter.TABLE_NAME],
+        'indexes': sorted({node['Index Name'] for node in nodes if 'Index Name' in node}),
+        'hit': plan.get('Shared Hit Blocks'),
+        'read': plan.get('Shared Read Blocks'),
+    }
+
+
+def report(analyze: bool, timeout_ms: int) -> dict:
+    """Analisa todas as consultas; retorna rótulo → (resumo ou None, índice_esperado)"""
+    results = {}
+    for label, query, params, expected in advisor_queries():
+        print(f"\n🔍 {label}")
+        try:
+            summary = summarize(explain(query, params, analyze, timeout_ms))
+        except psycopg2.errors.QueryCanceled:
+            print(f"   ⏱️ Estourou o statement_timeout ({timeout_ms} ms): provável seq scan")
+            results[label] = (None, expected)
+            continue
+
+        line = f"   Custo estimado: {summary['cost']:,.0f}"
+        if summary['time_ms'] is not None:
+            line += f" | Tempo: {summary['time_ms']:,.1f} ms"
+        if summary['hit'] is not None:
+            line += f" | Buffers: {summary['hit']:,} em cache, {summary['read']:,} lidos"
+        print(line)
+
+        for node in summary['seq_scans']:
+            print(f"   ⚠️ Seq Scan em {exporter.TABLE_NAME} "
+                  f"(custo {node['Total Cost']:,.0f}, ~{node['Plan Rows']:,} linhas estimadas)")
+        if summary['indexes']:
+            print(f"   ✅ Índices usados: {', '.join(summary['indexes'])}")
+
+        results[label] = (summary, expected)
+    return results
+
+
+def existing_indexes() -> dict:
+    """Índices do audit_log: nome → válido (CONCURRENTLY interrompido deixa inválido)"""
+    rows = database.run_query("""
+        SELECT c.relname, i.indisvalid
+        FROM pg_index i
+        JOIN pg_class c ON c.oid = i.indexrelid
+        JOIN pg_class t ON t.oid = i.indrelid
+        JOIN pg_namespace n ON n.oid = t.relnamespace
+        WHERE n.nspname = %s AND t.relname = %s
+    """, (exporter.SCHEMA_NAME, exporter.TABLE_NAME))
+    return dict(rows)
+
+
+def apply_indexes():
+    """Cria os índices sugeridos (autocommit, sem statement_timeout) e atualiza as estatísticas"""
+    indexes = existing_indexes()
+    conn = database.get_connection(statement_timeout_ms=0)
+    try:
+        conn.autocommit = True
+        with conn.cursor() as cursor:
+            for name, statement in index_statements():
+                if name and indexes.get(name) is False:
+                    # Sobra de um CONCURRENTLY que falhou: IF NOT EXISTS não recriaria
+                    print(f"   ♻️ Removendo índice inválido {name}...")
+                    cursor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {exporter.SCHEMA_NAME}.{name}")
+                print(f"   🛠️ {statement.splitlines()[0]}")
+                cursor.execute(statement)
+            print(f"   📈 ANALYZE {TABLE}")
+            cursor.execute(f"ANALYZE {TABLE}")
+        conn.autocommit = False
+        database.release(conn)
+    except Exception:
+        database.release(conn, close=True)
+        raise
+
+    invalid = [name for name, valid in existing_indexes().items() if not valid]
+    if invalid:
+        raise RuntimeError(f"Índices inválidos após a criação: {', '.join(invalid)}")
+
+
+def verify(results: dict) -> bool:
+    """Confere se cada consulta usa o índice esperado"""
+    ok = True
+    print("\n📋 Verificação")
+    for label, (summary, expected) in results.items():
+        if summary is not None and expected in summary['indexes'] and not summary['seq_scans']:
+            print(f"   ✅ {label}: usa {expected}")
+        else:
+            ok = False
+            print(f"   ❌ {label}: não usa {expected}")
+    return ok
+
+
+def parse_args(argv=None):
+    """Lê os argumentos de linha de comando"""
+    parser = argparse.ArgumentParser(description="Consultor de índices do audit_log")
+    parser.add_argument('--apply', action='store_true',
+                        help="Cria os índices sugeridos e reverifica os planos")
+    parser.add_argument('--no-analyze', dest='analyze', action='store_false',
+                        help="Só EXPLAIN, sem executar as consultas")
+    parser.add_argument('--write', metavar='ARQUIVO', default=None,
+                        help="Só grava o DDL sugerido como migração SQL (sem conectar)")
+    parser.add_argument('--timeout-ms', type=int, default=database.STATEMENT_TIMEOUT_MS,
+                        help=f"statement_timeout de cada EXPLAIN (padrão: {database.STATEMENT_TIMEOUT_MS})")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    print("=" * 60)
+    print(f"🩺 CONSULTOR DE ÍNDICES - {TABLE}")
+    print("=" * 60)
+
+    if args.write:
+        Path(args.write).write_text(migration_sql(), encoding='utf-8')
+        print(f"💾 Migração gravada em {args.write}")
+        return
+
+    try:
+        indexes = existing_indexes()
+        print(f"\n📚 Índices atuais: {', '.join(sorted(indexes)) or '(nenhum)'}")
+
+        results = report(args.analyze, args.timeout_ms)
+        if verify(results):
+            print("\n✅ Todas as consultas já usam os índices sugeridos")
+            return
+
+        if not args.apply:
+            print("\n💡 DDL sugerido (rode com --apply para criar):\n")
+            print(migration_sql())
+            return
+
+        print("\n🛠️ Criando índices...")
+        apply_indexes()
+
+        print("\n🔁 Reverificando os planos...")
+        if not verify(report(args.analyze, args.timeout_ms)):
+            print("\n⚠️ Alguma consulta ainda não usa o índice (tabela pequena ou "
+                  "janela grande podem tornar o seq scan mais barato para o planner)")
+            sys.exit(1)
+        print("\n✅ Índices criados e em uso")
+
+    finally:
+        database.print_stats()
+        database.close_pool()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+Busca de candidatos para suporte - "por que o candidato X não aparece?"
+
+Consulta primeiro o espelho local (SQLite gravado pelo exportador com
+--mirror; FTS5 sobre nome, e-mail e vaga, índices em id do talento e
+externalId) e só vai ao banco quando o espelho não tem nada. Linhas achadas
+no banco são gravadas no espelho, então a mesma busca não volta à produção.
+
+O exportador só grava linhas com message = MESSAGE_FILTER; as de outra
+message (o motivo mais comum de um candidato não aparecer) entram no espelho
+pela primeira busca que cai no banco e, a partir daí, o diagnóstico as mostra
+direto do espelho.
+
+Para cada registro mostra o diagnóstico usado pelo exportador: message,
+externalId (filial/matriz) e se o created_at ainda está na janela.
+
+Uso:
+    python scripts/lookup.py Weslley
+    python scripts/lookup.py "weslley silva" --details
+    python scripts/lookup.py --talent-id 12345
+    python scripts/lookup.py --external-id 0042 --limit 50
+    python scripts/lookup.py --id 987654 --no-fallback
+"""
+
+import argparse
+import json
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+from psycopg2.extras import RealDictCursor
+
+# Camada de conexão, espelho e configuração do exportador (raiz do projeto)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import database
+import export_from_supabase as exporter
+import mirror
+
+TABLE = f"{exporter.SCHEMA_NAME}.{exporter.TABLE_NAME}"
+DETAILS = exporter.DETAILS_COLUMN
+
+# Filtros sobre a projeção do exportador (mesmos campos do espelho)
+PROJECTED_FILTERS = {
+    'row_id': "s.id = %(row_id)s",
+    'talent_id': f"s.{DETAILS}->'body'->'talent'->>'id' = %(talent_id)s",
+    'external_id': f"""COALESCE(
+        NULLIF(s.{DETAILS}->'branch_office'->>'externalId', ''),
+        s.{DETAILS}->'head_office'->>'externalId'
+    ) = %(external_id)s""",
+    'message': "s.message = %(message)s",
+}
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Busca candidatos no espelho local (e no banco se não achar)")
+    parser.add_argument('text', nargs='*', help="Nome, e-mail ou vaga (palavras como prefixo)")
+    parser.add_argument('--id', dest='row_id', type=int, help="id da linha no audit_log")
+    parser.add_argument('--talent-id', help="body.talent.id")
+    parser.add_argument('--external-id', help="externalId da filial (ou da matriz)")
+    parser.add_argument('--message', help="Só registros com esta message")
+    parser.add_argument('--limit', type=int, default=20, help="Máximo de registros (padrão: 20)")
+    parser.add_argument(
+        '--mirror', type=Path, default=exporter.MIRROR_FILE,
+        help=f"Arquivo do espelho (padrão: {exporter.MIRROR_FILE.relative_to(exporter.PROJECT_DIR)})"
+    )
+    parser.add_argument('--no-fallback', action='store_true', help="Não consulta o banco")
+    parser.add_argument(
+        '--days', type=int, default=None,
+        help="No banco, limita aos últimos N dias (evita varrer a tabela inteira)"
+    )
+    parser.add_argument('--details', action='store_true', help="Mostra o JSON completo de cada registro")
+    args = parser.parse_args(argv)
+    args.text = ' '.join(args.text) or None
+    if not any([args.text, args.row_id, args.talent_id, args.external_id]):
+        parser.error("informe um texto, --id, --talent-id ou --external-id")
+    return args
+
+
+def filters(args) -> dict:
+    return {
+        'row_id': args.row_id,
+        'talent_id': args.talent_id,
+        'external_id': args.external_id,
+        'message': args.message,
+    }
+
+
+def search_mirror(args) -> list:
+    """Busca no espelho; [] se ele ainda não existe"""
+    try:
+        db = mirror.connect(args.mirror)
+    except FileNotFoundError as e:
+        print(f"⚠️ {e}")
+        return []
+    try:
+        return mirror.search(db, text=args.text, limit=args.limit, **filters(args))
+    finally:
+        db.close()
+
+
+def search_database(args) -> list:
+    """
+    Mesma busca no audit_log, com os detalhes na projeção do exportador
+
+    O texto usa details::text ILIKE (atendido pelo índice trigram de
+    migrations/002_audit_log_indexes.sql); o resto filtra a projeção.
+    """
+    inner = [f"{DETAILS} IS NOT NULL"]
+    params = {key: value for key, value in filters(args).items() if value is not None}
+    for word in (args.text or '').split():
+        key = f'text_{len(inner)}'
+        inner.append(f"{DETAILS}::text ILIKE %({key})s")
+        params[key] = f"%{word}%"
+    if args.days:
+        inner.append("created_at > NOW() - %(days)s * INTERVAL '1 day'")
+        params['days'] = args.days
+    outer = [PROJECTED_FILTERS[key] for key in PROJECTED_FILTERS if key in params]
+    params['limit'] = args.limit
+
+    query = f"""
+        SELECT s.id, s.message, s.created_at, s.{DETAILS}
+        FROM (
+            SELECT id, message, created_at, {exporter.PROJECTED_DETAILS_SQL} AS {DETAILS}
+            FROM {TABLE}
+            WHERE {' AND '.join(inner)}
+        ) s
+        {'WHERE ' + ' AND '.join(outer) if outer else ''}
+        ORDER BY s.created_at DESC, s.id DESC
+        LIMIT %(limit)s
+    """
+
+    def run(conn):
+        with conn.cursor(cursor_factory=RealDictCursor) as cursor:
+            cursor.execute(query, params)
+            return cursor.fetchall()
+
+    rows = database.with_retry(run)
+    records = []
+    for row in rows:
+        details = row[DETAILS]
+        details['created_at'] = row['created_at'].isoformat()
+        records.append((row['id'], row['message'], details))
+    if records:
+        mirror.save_rows(args.mirror, records)
+    return [dict(zip(mirror.COLUMNS, mirror.mirror_row(*record))) for record in records]
+
+
+def diagnose(row: dict) -> list:
+    """Motivos pelos quais o registro fica fora do site (vazio = deveria aparecer)"""
+    problems = []
+    if row['message'] != exporter.MESSAGE_FILTER:
+        problems.append(f"message '{row['message']}' (o exportador só lê '{exporter.MESSAGE_FILTER}')")
+    if not row['external_id']:
+        problems.append("sem externalId (branchOffice/headOffice): invisível para todos")
+    if row['created_at']:
+        age = datetime.now(timezone.utc) - datetime.fromisoformat(row['created_at'])
+        if age > timedelta(days=exporter.WINDOW_DAYS):
+            problems.append(f"fora da janela de {exporter.WINDOW_DAYS} dias ({age.days} dias atrás)")
+    return problems
+
+
+def print_rows(rows: list, show_details: bool):
+    for row in rows:
+        print(f"\n#{row['id']} | {row['created_at']} | {row['message']}")
+        print(f"   👤 {row['applicant']} <{row['email']}> | talento {row['talent_id']}")
+        print(f"   💼 {row['vacancy_title']} (recrutei {row['recrutei_vacancy_id']})")
+        print(f"   🏢 externalId filial {row['branch_external_id']} | matriz {row['head_external_id']}")
+        problems = diagnose(row)
+        if problems:
+            for problem in problems:
+                print(f"   ❌ {problem}")
+        else:
+            print("   ✅ Deveria aparecer no site (se não aparece, confira a deduplicação e o RBAC)")
+        if show_details:
+            print(json.dumps(json.loads(row['details']), indent=2, ensure_ascii=False))
+
+
+def main(argv=None):
+    args = parse_args(argv)
+
+    start = time.perf_counter()
+    rows = search_mirror(args)
+    source = f"espelho {args.mirror.name}"
+
+    if not rows and not args.no_fallback:
+        print("🔎 Nada no espelho; consultando o banco...")
+        try:
+            start = time.perf_counter()
+            rows = search_database(args)
+            source = TABLE
+        finally:
+            database.close_pool()
+
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"📋 {len(rows)} registro(s) em {source} ({elapsed:.1f} ms)")
+    print_rows(rows, args.details)
+    return 0 if rows else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
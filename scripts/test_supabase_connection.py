@@ -5,17 +5,24 @@ Script de Teste - Conexão com PostgreSQL (Supabase)
 Testa a conexão e busca 1 registro de exemplo da tabela audit_log
 para validar que tudo está configurado corretamente.
 
+Com --diagnose, mede se a exportação vai ser rápida: latência de conexão e
+de ida e volta (percentis de N sondas), estimativas de linhas, tamanho e
+bloat do catálogo (sem COUNT(*)), EXPLAIN ANALYZE da consulta real da janela,
+linhas por dia de 'Candidato vinculado' e uma projeção de tempo e tamanho
+da exportação para uma janela.
+
 Uso:
     python test_supabase_connection.py
+    python test_supabase_connection.py --diagnose --probes 20 --window 7
+    python test_supabase_connection.py --diagnose --json reports/diagnostics.json
 """
 
-import os
+import argparse
 import json
+import sys
+import time
+from datetime import datetime, timezone
 from pathlib import Path
-from dotenv import load_dotenv
-
-# Carregar variáveis de ambiente
-load_dotenv()
 
 # Tentar importar psycopg2
 try:
@@ -27,17 +34,296 @@ except ImportError:
     print("   Execute: pip install -r requirements.txt")
     exit(1)
 
+# Camada de conexão compartilhada (database.py na raiz do projeto)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+import database
+import export_from_supabase as exporter
+from index_advisor import explain, summarize
+
 # Configurações
-DB_HOST = os.getenv('DB_HOST')
-DB_PORT = os.getenv('DB_PORT', '5432')
-DB_USER = os.getenv('DB_USER', 'postgres')
-DB_NAME = os.getenv('DB_NAME', 'postgres')
-DB_PASSWORD = os.getenv('DB_PASSWORD')
+DB_HOST = database.DB_HOST
+DB_PORT = database.DB_PORT
+DB_USER = database.DB_USER
+DB_NAME = database.DB_NAME
+DB_PASSWORD = database.DB_PASSWORD
 
 SCHEMA_NAME = 'public'
 TABLE_NAME = 'audit_log'
 DETAILS_COLUMN = 'details'
 
+# Diagnóstico (--diagnose)
+PROBES = 10             # sondas de conexão e de ida e volta
+HISTORY_DAYS = 7        # dias de histórico para linhas por dia
+SAMPLE_ROWS = 500       # linhas recentes usadas para medir payload e transformação
+
+
+def table_estimates() -> dict:
+    """
+    Linhas, tamanho e bloat do audit_log pelo catálogo (pg_class e
+    pg_stat_user_tables): custo zero, ao contrário de COUNT(*)
+    """
+    row = database.run_query("""
+        SELECT c.reltuples::bigint AS estimated_rows,
+               pg_relation_size(c.oid) AS table_bytes,
+               pg_total_relation_size(c.oid) AS total_bytes,
+               pg_indexes_size(c.oid) AS index_bytes,
+               COALESCE(pg_total_relation_size(NULLIF(c.reltoastrelid, 0)), 0) AS toast_bytes,
+               s.n_live_tup AS live_rows,
+               s.n_dead_tup AS dead_rows,
+               s.seq_scan, s.idx_scan,
+               GREATEST(s.last_vacuum, s.last_autovacuum) AS last_vacuum,
+               GREATEST(s.last_analyze, s.last_autoanalyze) AS last_analyze
+        FROM pg_class c
+        JOIN pg_namespace n ON n.oid = c.relnamespace
+        LEFT JOIN pg_stat_user_tables s ON s.relid = c.oid
+        WHERE n.nspname = %s AND c.relname = %s
+    """, (SCHEMA_NAME, TABLE_NAME), fetch='one', cursor_factory=RealDictCursor)
+    if row is None:
+        raise LookupError(f"Tabela {SCHEMA_NAME}.{TABLE_NAME} não encontrada no catálogo")
+
+    estimates = dict(row)
+    live, dead = estimates['live_rows'] or 0, estimates['dead_rows'] or 0
+    # Fração de tuplas mortas: aproximação de bloat sem a extensão pgstattuple
+    estimates['dead_ratio'] = round(dead / (live + dead), 4) if live + dead else 0.0
+    for key in ('last_vacuum', 'last_analyze'):
+        if estimates[key] is not None:
+            estimates[key] = estimates[key].isoformat()
+    return estimates
+
+
+def print_estimates(estimates: dict):
+    print(f"   ✅ ~{estimates['estimated_rows']:,} linhas (pg_class), "
+          f"{estimates['live_rows'] or 0:,} vivas / {estimates['dead_rows'] or 0:,} mortas "
+          f"(bloat ~{estimates['dead_ratio']:.1%})")
+    print(f"   📦 Tabela {estimates['table_bytes'] / 1024 / 1024:,.1f} MB | "
+          f"TOAST {estimates['toast_bytes'] / 1024 / 1024:,.1f} MB | "
+          f"índices {estimates['index_bytes'] / 1024 / 1024:,.1f} MB | "
+          f"total {estimates['total_bytes'] / 1024 / 1024:,.1f} MB")
+    print(f"   🧹 Último vacuum: {estimates['last_vacuum'] or 'nunca'} | "
+          f"último analyze: {estimates['last_analyze'] or 'nunca'}")
+    if estimates['seq_scan'] is not None:
+        print(f"   🔍 Seq scans: {estimates['seq_scan']:,} | index scans: {estimates['idx_scan'] or 0:,}")
+
+
+def percentiles(samples: list) -> dict:
+    """p50/p90/p99/máx em ms (rank mais próximo)"""
+    ordered = sorted(samples)
+
+    def rank(p):
+        return ordered[min(len(ordered) - 1, max(0, round(p / 100 * len(ordered)) - 1))]
+
+    return {
+        'p50_ms': round(rank(50) * 1000, 2),
+        'p90_ms': round(rank(90) * 1000, 2),
+        'p99_ms': round(rank(99) * 1000, 2),
+        'max_ms': round(ordered[-1] * 1000, 2),
+    }
+
+
+def latency_probes(probes: int) -> dict:
+    """
+    Percentis de conexão nova (handshake TLS + autenticação) e de ida e
+    volta (SELECT 1 numa conexão aberta)
+    """
+    connect = []
+    for _ in range(probes):
+        start = time.perf_counter()
+        conn = psycopg2.connect(**database.connection_params())
+        connect.append(time.perf_counter() - start)
+        conn.close()
+
+    round_trip = []
+    with database.connection() as conn, conn.cursor() as cursor:
+        for _ in range(probes):
+            start = time.perf_counter()
+            cursor.execute("SELECT 1")
+            cursor.fetchone()
+            round_trip.append(time.perf_counter() - start)
+
+    return {'probes': probes, 'connect': percentiles(connect), 'round_trip': percentiles(round_trip)}
+
+
+def rows_per_day(days: int) -> list:
+    """Linhas de MESSAGE_FILTER por dia nos últimos `days` dias (usa o índice da janela)"""
+    rows = database.run_query(f"""
+        SELECT date_trunc('day', created_at) AS day, COUNT(*) AS rows
+        FROM {exporter.SCHEMA_NAME}.{exporter.TABLE_NAME}
+        WHERE {exporter.DETAILS_COLUMN} IS NOT NULL
+        AND message = %(message)s
+        AND created_at > NOW() - %(days)s * INTERVAL '1 day'
+        GROUP BY 1
+        ORDER BY 1
+    """, {'message': exporter.MESSAGE_FILTER, 'days': days})
+    return [{'day': day.date().isoformat(), 'rows': count} for day, count in rows]
+
+
+def sample_export(sample_rows: int) -> dict:
+    """
+    Mede a exportação real num recorte: busca as `sample_rows` linhas mais
+    recentes com a consulta do exportador e roda a transformação local
+    """
+    query, params = exporter.build_fetch_query()
+    query += "        LIMIT %(sample_limit)s\n"
+    params['sample_limit'] = sample_rows
+
+    start = time.perf_counter()
+    rows = database.run_query(query, params, cursor_factory=RealDictCursor)
+    fetch_seconds = time.perf_counter() - start
+
+    raw = []
+    for row in rows:
+        details = row[exporter.DETAILS_COLUMN]
+        details['created_at'] = row['created_at'].isoformat()
+        raw.append(details)
+
+    wire_bytes = sum(len(json.dumps(details, ensure_ascii=False).encode('utf-8')) for details in raw)
+    start = time.perf_counter()
+    applicants = list(exporter.iter_transform(raw, exporter.new_transform_stats()))
+    transform_seconds = time.perf_counter() - start
+    published_bytes = sum(len(exporter.encode_minified(applicant)) for applicant in applicants)
+
+    count = len(raw) or 1
+    return {
+        'rows': len(raw),
+        'fetch_seconds': round(fetch_seconds, 4),
+        'fetch_ms_per_row': round(fetch_seconds * 1000 / count, 4),
+        'transform_ms_per_row': round(transform_seconds * 1000 / count, 4),
+        'wire_bytes_per_row': round(wire_bytes / count, 1),
+        'published_bytes_per_row': round(published_bytes / max(len(applicants), 1), 1),
+    }
+
+
+def project_export(per_day: list, sample: dict, plan: dict, window: int) -> dict:
+    """
+    Projeção para uma janela de `window` dias: linhas pela média diária e
+    tempos/bytes por linha medidos na amostra (limite superior: antes da
+    deduplicação)
+    """
+    average = sum(day['rows'] for day in per_day) / max(len(per_day), 1)
+    rows = round(average * window)
+    fetch = rows * sample['fetch_ms_per_row'] / 1000
+    # Sem ANALYZE o plano é só estimativa: time_ms vem None e rows pode ser 0
+    # (janela vazia); nesses casos fica só o tempo medido na amostra
+    plan = plan or {}
+    if plan.get('time_ms') is not None and (plan.get('rows') or 0) > 0:
+        # Tempo do servidor medido pelo EXPLAIN ANALYZE na janela real, por linha
+        server = rows * plan['time_ms'] / plan['rows'] / 1000
+        fetch = max(fetch, server)
+    transform = rows * sample['transform_ms_per_row'] / 1000
+    return {
+        'window_days': window,
+        'rows_per_day': round(average, 1),
+        'rows': rows,
+        'fetch_seconds': round(fetch, 2),
+        'transform_seconds': round(transform, 2),
+        'total_seconds': round(fetch + transform, 2),
+        'wire_bytes': round(rows * sample['wire_bytes_per_row']),
+        'published_bytes': round(rows * sample['published_bytes_per_row']),
+    }
+
+
+def window_plan(analyze: bool, timeout_ms: int) -> dict:
+    """EXPLAIN (ANALYZE) da consulta da janela do exportador"""
+    query, params = exporter.build_fetch_query()
+    result = explain(query, params, analyze, timeout_ms)
+    summary = summarize(result)
+    return {
+        'time_ms': summary['time_ms'],
+        'cost': summary['cost'],
+        'rows': result['Plan'].get('Actual Rows', result['Plan']['Plan Rows']),
+        'seq_scan': bool(summary['seq_scans']),
+        'indexes': summary['indexes'],
+        'buffers_hit': summary['hit'],
+        'buffers_read': summary['read'],
+    }
+
+
+def diagnose(args) -> dict:
+    """Roda todas as medições e imprime o relatório"""
+    report = {'generated_at': datetime.now(timezone.utc).isoformat()}
+
+    print("1️⃣ Latência (conexão nova e SELECT 1)...")
+    report['latency'] = latency_probes(args.probes)
+    for label, key in (("Conexão", 'connect'), ("Ida e volta", 'round_trip')):
+        stats = report['latency'][key]
+        print(f"   ⏱️ {label:<12} p50 {stats['p50_ms']:>8.1f} ms | p90 {stats['p90_ms']:>8.1f} ms | "
+              f"p99 {stats['p99_ms']:>8.1f} ms | máx {stats['max_ms']:>8.1f} ms")
+    print()
+
+    print(f"2️⃣ Estimativas de '{SCHEMA_NAME}.{TABLE_NAME}' (catálogo)...")
+    report['table'] = table_estimates()
+    print_estimates(report['table'])
+    print()
+
+    label = "EXPLAIN ANALYZE" if args.analyze else "EXPLAIN"
+    print(f"3️⃣ {label} da consulta da janela ({exporter.WINDOW_DAYS} dias)...")
+    try:
+        report['window_plan'] = window_plan(args.analyze, args.timeout_ms)
+        plan = report['window_plan']
+        line = f"   📈 Custo {plan['cost']:,.0f} | {plan['rows']:,} linhas"
+        if plan['time_ms'] is not None:
+            line += f" | {plan['time_ms']:,.1f} ms no servidor"
+        print(line)
+        if plan['seq_scan']:
+            print("   ⚠️ Seq scan no audit_log: rode scripts/index_advisor.py")
+        if plan['indexes']:
+            print(f"   ✅ Índices usados: {', '.join(plan['indexes'])}")
+    except psycopg2.errors.QueryCanceled:
+        print(f"   ⏱️ Estourou o statement_timeout ({args.timeout_ms} ms): a exportação vai falhar")
+        report['window_plan'] = None
+    print()
+
+    print(f"4️⃣ Linhas '{exporter.MESSAGE_FILTER}' por dia (últimos {args.days} dias)...")
+    report['rows_per_day'] = rows_per_day(args.days)
+    for day in report['rows_per_day']:
+        print(f"   {day['day']}  {day['rows']:>8,}")
+    print()
+
+    print(f"5️⃣ Amostra de {args.sample} linhas (busca + transformação local)...")
+    report['sample'] = sample_export(args.sample)
+    sample = report['sample']
+    print(f"   📡 {sample['rows']} linhas em {sample['fetch_seconds']:.2f}s | "
+          f"{sample['wire_bytes_per_row']:,.0f} B/linha no fio | "
+          f"{sample['published_bytes_per_row']:,.0f} B/linha publicada | "
+          f"transformação {sample['transform_ms_per_row']:.3f} ms/linha")
+    print()
+
+    report['projection'] = project_export(
+        report['rows_per_day'], sample, report['window_plan'], args.window
+    )
+    projection = report['projection']
+    print(f"🔮 Projeção para {args.window} dias ({projection['rows_per_day']:,.0f} linhas/dia):")
+    print(f"   {projection['rows']:,} linhas | busca ~{projection['fetch_seconds']:.1f}s | "
+          f"transformação ~{projection['transform_seconds']:.1f}s | "
+          f"total ~{projection['total_seconds']:.1f}s")
+    print(f"   {projection['wire_bytes'] / 1024 / 1024:,.1f} MB do banco | "
+          f"até {projection['published_bytes'] / 1024 / 1024:,.1f} MB publicados (antes da deduplicação)")
+    return report
+
+
+def run_diagnostics(args) -> bool:
+    """Modo --diagnose"""
+    print("=" * 60)
+    print("🩺 DIAGNÓSTICO DE DESEMPENHO - POSTGRESQL (SUPABASE)")
+    print("=" * 60)
+    print()
+
+    try:
+        database.validate_credentials()
+        report = diagnose(args)
+        if args.json:
+            exporter.write_atomic(args.json, json.dumps(report, ensure_ascii=False, indent=2, default=str) + '\n')
+            print(f"\n📝 Relatório: {args.json}")
+        return True
+    except (ValueError, LookupError, psycopg2.Error) as e:
+        print(f"\n❌ {e}")
+        return False
+    finally:
+        print()
+        database.print_stats()
+        database.close_pool()
+
+
 def test_connection():
     """Testa conexão com PostgreSQL (Supabase)"""
     print("=" * 60)
@@ -70,21 +356,11 @@ def test_connection():
         print("2️⃣ Conectando no PostgreSQL...")
         
         try:
-            conn = psycopg2.connect(
-                host=DB_HOST,
-                port=DB_PORT,
-                user=DB_USER,
-                database=DB_NAME,
-                password=DB_PASSWORD,
-                connect_timeout=10
-            )
+            # Pool compartilhado: keepalives, statement_timeout e retry com backoff
+            conn = database.get_connection()
             print("   ✅ Conexão estabelecida")
-        except psycopg2.OperationalError as e:
-            print(f"   ❌ Erro ao conectar: {e}")
-            print("\n   💡 Dicas:")
-            print("      • Verifique se DB_HOST está correto")
-            print("      • Verifique se DB_PASSWORD está correto")
-            print("      • Verifique se o IP está liberado no Supabase")
+        except psycopg2.OperationalError:
+            # Dicas já exibidas por database.get_connection
             return False
         
         print()
@@ -109,10 +385,10 @@ def test_connection():
             
             if not row:
                 print(f"   ⚠️ Tabela existe mas está vazia ou sem dados na coluna '{DETAILS_COLUMN}'")
-                print(f"   💡 Aguarde o ETL do Tiago popular a tabela")
+                print("   💡 Aguarde o ETL do Tiago popular a tabela")
                 return True  # Conexão OK, tabela só está vazia
             
-            print(f"   ✅ Tabela acessível (1 registro encontrado)")
+            print("   ✅ Tabela acessível (1 registro encontrado)")
             
         except psycopg2.Error as e:
             print(f"   ❌ Erro ao acessar tabela: {e}")
@@ -122,7 +398,7 @@ def test_connection():
         print()
         
         # 4. Validar estrutura do registro
-        print(f"4️⃣ Validando estrutura do registro...")
+        print("4️⃣ Validando estrutura do registro...")
         
         try:
             details = row.get(DETAILS_COLUMN)
@@ -153,13 +429,13 @@ def test_connection():
             head_external_id = body.get("headOffice", {}).get("externalId")
             
             if branch_external_id or head_external_id:
-                print(f"      ✅ externalId encontrado")
+                print("      ✅ externalId encontrado")
                 if branch_external_id:
                     print(f"         • branchOffice.externalId: {branch_external_id}")
                 if head_external_id:
                     print(f"         • headOffice.externalId: {head_external_id}")
             else:
-                print(f"      ⚠️ externalId NÃO encontrado (RBAC não funcionará!)")
+                print("      ⚠️ externalId NÃO encontrado (RBAC não funcionará!)")
             
             print()
             
@@ -175,7 +451,7 @@ def test_connection():
             if missing_fields:
                 print()
                 print(f"   ⚠️ Campos ausentes: {', '.join(missing_fields)}")
-                print(f"   💡 Verifique a implementação do ETL do Tiago")
+                print("   💡 Verifique a implementação do ETL do Tiago")
                 return False
             
         except Exception as e:
@@ -184,25 +460,14 @@ def test_connection():
         
         print()
         
-        # 5. Teste de contagem total
-        print("5️⃣ Contando total de registros...")
+        # 5. Estimativas do catálogo (COUNT(*) varreria a tabela inteira)
+        print("5️⃣ Estimando tamanho da tabela...")
         
         try:
-            cursor = conn.cursor()
-            query = f"""
-                SELECT COUNT(*) as total
-                FROM {SCHEMA_NAME}.{TABLE_NAME}
-                WHERE {DETAILS_COLUMN} IS NOT NULL
-            """
-            cursor.execute(query)
-            result = cursor.fetchone()
-            total = result[0] if result else 0
-            cursor.close()
-            
-            print(f"   ✅ Total de candidatos na tabela: {total}")
-            
+            print_estimates(table_estimates())
+            print("   💡 Diagnóstico de desempenho: python scripts/test_supabase_connection.py --diagnose")
         except Exception as e:
-            print(f"   ⚠️ Não foi possível contar registros: {e}")
+            print(f"   ⚠️ Não foi possível ler as estimativas: {e}")
         
         print()
         print("=" * 60)
@@ -223,13 +488,41 @@ def test_connection():
         
     finally:
         if conn:
-            conn.close()
+            database.release(conn)
+            database.print_stats()
+            database.close_pool()
             print("🔌 Conexão fechada")
 
 
+def parse_args(argv=None):
+    """Lê os argumentos de linha de comando"""
+    parser = argparse.ArgumentParser(description="Teste de conexão e diagnóstico do audit_log")
+    parser.add_argument('--diagnose', action='store_true',
+                        help="Latência, estimativas, EXPLAIN ANALYZE e projeção da exportação")
+    parser.add_argument('--probes', type=int, default=PROBES,
+                        help=f"Sondas de latência (padrão: {PROBES})")
+    parser.add_argument('--days', type=int, default=HISTORY_DAYS,
+                        help=f"Dias de histórico para linhas por dia (padrão: {HISTORY_DAYS})")
+    parser.add_argument('--window', type=int, default=exporter.WINDOW_DAYS,
+                        help=f"Janela da projeção em dias (padrão: {exporter.WINDOW_DAYS})")
+    parser.add_argument('--sample', type=int, default=SAMPLE_ROWS,
+                        help=f"Linhas da amostra de payload/transformação (padrão: {SAMPLE_ROWS})")
+    parser.add_argument('--no-analyze', dest='analyze', action='store_false',
+                        help="Só EXPLAIN, sem executar a consulta da janela")
+    parser.add_argument('--timeout-ms', type=int, default=database.STATEMENT_TIMEOUT_MS,
+                        help=f"statement_timeout do EXPLAIN (padrão: {database.STATEMENT_TIMEOUT_MS})")
+    parser.add_argument('--json', type=Path, default=None,
+                        help="Grava o relatório do diagnóstico em JSON")
+    args = parser.parse_args(argv)
+    if args.probes < 1 or args.days < 1 or args.window < 1 or args.sample < 1:
+        parser.error("--probes, --days, --window e --sample devem ser pelo menos 1")
+    return args
+
+
 if __name__ == '__main__':
     try:
-        success = test_connection()
+        args = parse_args()
+        success = run_diagnostics(args) if args.diagnose else test_connection()
         exit(0 if success else 1)
     except KeyboardInterrupt:
         print("\n\n⚠️ Teste cancelado pelo usuário")
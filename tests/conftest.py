@@ -0,0 +1,12 @@
+"""
+Configuração comum dos testes - exportador Atrio
+
+Os módulos do exportador ficam na raiz do projeto (sem pacote instalável),
+então a raiz entra no sys.path antes de qualquer import.
+"""
+
+import sys
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(PROJECT_DIR))
@@ -0,0 +1,146 @@
+"""
+git_publish contra um repositório bare local
+
+Cada teste cria um remoto com `git init --bare` e um repositório de trabalho
+com o site na main, e publica/restaura o branch de dados por ele.
+"""
+
+import subprocess
+
+import pytest
+
+import git_publish
+
+BRANCH = 'data'
+
+
+def run(cwd, *args) -> str:
+    return subprocess.run(['git', *args], cwd=cwd, check=True, capture_output=True,
+                          text=True).stdout.strip()
+
+
+def clone(remote, target):
+    run(remote.parent, 'clone', '--quiet', str(remote), str(target))
+    return target
+
+
+@pytest.fixture
+def remote(tmp_path, monkeypatch):
+    """Repositório bare com a main do site (index.html)"""
+    for variable in ('GIT_AUTHOR', 'GIT_COMMITTER'):
+        monkeypatch.setenv(f'{variable}_NAME', 'Atrio Teste')
+        monkeypatch.setenv(f'{variable}_EMAIL', 'teste@example.com')
+    bare = tmp_path / 'site.git'
+    run(tmp_path, 'init', '--quiet', '--bare', '--initial-branch=main', str(bare))
+
+    seed = tmp_path / 'seed'
+    run(tmp_path, 'init', '--quiet', '--initial-branch=main', str(seed))
+    (seed / 'index.html').write_text('<html></html>\n', encoding='utf-8')
+    run(seed, 'add', 'index.html')
+    run(seed, 'commit', '--quiet', '-m', 'site')
+    run(seed, 'push', '--quiet', str(bare), 'main')
+    return bare
+
+
+@pytest.fixture
+def work(remote, tmp_path):
+    return clone(remote, tmp_path / 'work')
+
+
+def write_dataset(repo, version: int) -> list:
+    """applicants.json + data/ de uma versão; devolve os arquivos publicados"""
+    (repo / 'data').mkdir(exist_ok=True)
+    (repo / 'applicants.json').write_text(f'[{{"v": {version}}}]', encoding='utf-8')
+    (repo / 'data' / 'applicants.min.json').write_text(f'[{{"v":{version}}}]', encoding='utf-8')
+    return [repo / 'applicants.json', repo / 'data' / 'applicants.min.json']
+
+
+def remote_head(remote) -> str:
+    return run(remote, 'rev-parse', f'refs/heads/{BRANCH}')
+
+
+def show(remote, path: str) -> str:
+    return run(remote, 'show', f'{BRANCH}:{path}')
+
+
+def test_publish_twice(remote, work):
+    first = git_publish.publish(work, write_dataset(work, 1), BRANCH, depth=5)
+    assert remote_head(remote) == first
+    assert show(remote, 'applicants.json') == '[{"v": 1}]'
+    # Árvore do site + artefatos + .nojekyll
+    assert set(run(remote, 'ls-tree', '-r', '--name-only', BRANCH).split()) == {
+        '.nojekyll', 'index.html', 'applicants.json', 'data/applicants.min.json'
+    }
+
+    second = git_publish.publish(work, write_dataset(work, 2), BRANCH, depth=5)
+    assert remote_head(remote) == second
+    assert run(remote, 'rev-parse', f'{second}^') == first
+    assert show(remote, 'data/applicants.min.json') == '[{"v":2}]'
+    # A main não ganha commit nenhum
+    assert run(remote, 'rev-list', '--count', 'main') == '1'
+
+    # Mesma árvore: nada a publicar
+    assert git_publish.publish(work, write_dataset(work, 2), BRANCH, depth=5) is None
+    assert remote_head(remote) == second
+
+
+def test_removed_files_leave_the_branch(remote, work):
+    files = write_dataset(work, 1)
+    (work / 'data' / 'old.json').write_text('[]', encoding='utf-8')
+    git_publish.publish(work, files + [work / 'data' / 'old.json'], BRANCH)
+
+    (work / 'data' / 'old.json').unlink()
+    git_publish.publish(work, write_dataset(work, 2), BRANCH)
+    assert 'data/old.json' not in run(remote, 'ls-tree', '-r', '--name-only', BRANCH).split()
+
+
+@pytest.mark.parametrize('depth', [1, 3])
+def test_history_is_bounded(remote, work, depth):
+    trees = []
+    for version in range(1, 6):
+        git_publish.publish(work, write_dataset(work, version), BRANCH, depth=depth)
+        trees.append(run(remote, 'rev-parse', f'{BRANCH}^{{tree}}'))
+
+    assert run(remote, 'rev-list', '--count', BRANCH) == str(depth)
+    # Os commits mantidos são as últimas publicações (mesmas árvores, em ordem)
+    kept = run(remote, 'log', '--format=%T', BRANCH).split()
+    assert kept == trees[::-1][:depth]
+    assert show(remote, 'applicants.json') == '[{"v": 5}]'
+
+
+def test_restore(remote, work, tmp_path):
+    git_publish.publish(work, write_dataset(work, 1), BRANCH)
+    git_publish.publish(work, write_dataset(work, 2), BRANCH)
+
+    other = clone(remote, tmp_path / 'other')
+    dest = tmp_path / 'restored'
+    restored = git_publish.restore(other, BRANCH, ['applicants.json', 'data'], dest)
+    assert sorted(restored) == ['applicants.json', 'data/applicants.min.json']
+    assert (dest / 'applicants.json').read_text(encoding='utf-8') == '[{"v": 2}]'
+    assert (dest / 'data' / 'applicants.min.json').read_text(encoding='utf-8') == '[{"v":2}]'
+    assert not (dest / 'index.html').exists()
+
+
+def test_restore_without_branch(work, tmp_path):
+    assert git_publish.restore(work, BRANCH, ['applicants.json'], tmp_path / 'restored') == []
+
+
+def test_lease_rejected(remote, work, tmp_path, monkeypatch):
+    """Outro publicador empurrou depois da nossa leitura: o push é recusado"""
+    first = git_publish.publish(work, write_dataset(work, 1), BRANCH)
+
+    other = clone(remote, tmp_path / 'other')
+    stale = git_publish.fetch_branch(other, 'origin', BRANCH, 1)
+    assert stale == first
+
+    winner = git_publish.publish(work, write_dataset(work, 2), BRANCH)
+
+    # `other` publica achando que o remoto ainda está em `first`
+    monkeypatch.setattr(git_publish, 'fetch_branch', lambda *args: stale)
+    with pytest.raises(git_publish.GitError):
+        git_publish.publish(other, write_dataset(other, 3), BRANCH)
+
+    assert remote_head(remote) == winner
+    assert show(remote, 'applicants.json') == '[{"v": 2}]'
+    # A ref local só avança depois de um push aceito
+    assert git_publish.rev_parse(other, f'{git_publish.FETCH_NAMESPACE}/{BRANCH}') == stale